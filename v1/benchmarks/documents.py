@@ -0,0 +1,153 @@
+"""Synthetic documents for the benchmarks.
+
+Everything is generated locally and deterministically, so runs on different
+machines process exactly the same input.
+"""
+
+import io
+import random
+from typing import List
+
+from PIL import Image, ImageDraw, ImageFont
+
+# Fixed seed so every run generates the same text
+SEED = 1234
+
+WORDS = (
+    "invoice total amount due date customer account number payment terms "
+    "delivery address order quantity price tax subtotal balance reference "
+    "statement period description item service contract agreement signature"
+).split()
+
+
+def make_lines(count: int, words_per_line: int = 10, seed: int = SEED) -> List[str]:
+    """Generate lines of pseudo-random words.
+    
+    Args:
+        count: Number of lines
+        words_per_line: Number of words on each line
+        seed: Random seed
+    
+    Returns:
+        List[str]: The lines
+    """
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choice(WORDS) for _ in range(words_per_line))
+        for _ in range(count)
+    ]
+
+
+def make_page_image(
+    dpi: int = 200, lines: int = 40, seed: int = SEED
+) -> Image.Image:
+    """Render a letter-size page of text with Pillow.
+    
+    Args:
+        dpi: Resolution of the page
+        lines: Number of text lines on the page
+        seed: Random seed for the text
+    
+    Returns:
+        Image.Image: The rendered page in grayscale
+    """
+    width, height = int(8.5 * dpi), int(11 * dpi)
+    image = Image.new("L", (width, height), color=255)
+    draw = ImageDraw.Draw(image)
+    font_size = max(8, dpi // 8)
+    try:
+        font = ImageFont.load_default(size=font_size)
+    except TypeError:  # Pillow < 10.1 has a fixed-size default font
+        font = ImageFont.load_default()
+    
+    margin = dpi // 2
+    line_height = (height - 2 * margin) // max(lines, 1)
+    for i, line in enumerate(make_lines(lines, seed=seed)):
+        draw.text((margin, margin + i * line_height), line, fill=0, font=font)
+    return image
+
+
+def make_image_bytes(dpi: int = 200, format: str = "PNG") -> bytes:
+    """Render a single page as an encoded image.
+    
+    Args:
+        dpi: Resolution of the page
+        format: Image format understood by Pillow
+    
+    Returns:
+        bytes: The encoded image
+    """
+    buffer = io.BytesIO()
+    make_page_image(dpi=dpi).save(buffer, format=format)
+    return buffer.getvalue()
+
+
+def make_scanned_pdf(pages: int, dpi: int = 150) -> bytes:
+    """Build a PDF of page images without a text layer, like a scan.
+    
+    Args:
+        pages: Number of pages
+        dpi: Resolution of the page images
+    
+    Returns:
+        bytes: The PDF
+    """
+    images = [make_page_image(dpi=dpi, seed=SEED + i) for i in range(pages)]
+    buffer = io.BytesIO()
+    images[0].save(
+        buffer, format="PDF", save_all=True, append_images=images[1:], resolution=dpi
+    )
+    return buffer.getvalue()
+
+
+def make_text_pdf(pages: int, lines_per_page: int = 50) -> bytes:
+    """Build a PDF with a text layer on every page.
+    
+    The PDF is written by hand so that no PDF writer is needed.
+    
+    Args:
+        pages: Number of pages
+        lines_per_page: Number of text lines on each page
+    
+    Returns:
+        bytes: The PDF
+    """
+    objects: List[bytes] = []
+    
+    # 1: catalog, 2: page tree, 3: font, then a page and content stream per page
+    page_ids = [4 + 2 * i for i in range(pages)]
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    
+    for i, page_id in enumerate(page_ids):
+        lines = make_lines(lines_per_page, seed=SEED + i)
+        text = "\n".join(f"({line}) Tj T*" for line in lines)
+        stream = f"BT /F1 10 Tf 12 TL 50 770 Td\n{text}\nET".encode()
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> "
+            f"/Contents {page_id + 1} 0 R >>".encode()
+        )
+        objects.append(
+            b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n"
+            + stream + b"\nendstream"
+        )
+    
+    output = io.BytesIO()
+    output.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(output.tell())
+        output.write(f"{number} 0 obj\n".encode() + body + b"\nendobj\n")
+    
+    xref = output.tell()
+    output.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        output.write(f"{offset:010d} 00000 n \n".encode())
+    output.write(
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref}\n%%EOF\n".encode()
+    )
+    return output.getvalue()
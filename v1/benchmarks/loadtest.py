@@ -0,0 +1,404 @@
+#!/usr/bin/env python
+"""Load test of the API layer against the stub technology.
+
+Drives ``POST /api/v1/run`` and ``GET /api/v1/results/{job_id}`` at a fixed
+concurrency and reports throughput, p50/p99 latency and the server's event loop
+lag (read from ``/metrics``).
+
+Examples:
+    # Start a local server with the stub technology and load it
+    python benchmarks/loadtest.py --spawn --concurrency 32 --duration 30
+    
+    # Find blocking calls: CPU burned on the event loop shows up as lag
+    python benchmarks/loadtest.py --spawn --cpu 0.01 --blocking
+    
+    # Load an already running server that has the stub plugin configured
+    python benchmarks/loadtest.py --url http://localhost:8000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+benchmarks_dir = Path(__file__).parent
+src_dir = benchmarks_dir.parent / "src"
+
+LAG_METRIC = "document_reader_event_loop_lag_seconds"
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Document Reader load test")
+    parser.add_argument(
+        "--url",
+        type=str,
+        default="http://127.0.0.1:8000",
+        help="Base URL of the server (default: http://127.0.0.1:8000)"
+    )
+    parser.add_argument(
+        "--spawn",
+        action="store_true",
+        help="Start a local server with the stub technology"
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Only run a server with the stub technology"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes of a spawned server (default: 1)"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=16,
+        help="Number of concurrent clients (default: 16)"
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=10.0,
+        help="Seconds to generate load for (default: 10)"
+    )
+    parser.add_argument(
+        "--document-size",
+        type=int,
+        default=64 * 1024,
+        help="Size of the uploaded document in bytes (default: 64 KiB)"
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="Synthetic latency of the stub per job in seconds"
+    )
+    parser.add_argument(
+        "--cpu",
+        type=float,
+        default=0.0,
+        help="Synthetic CPU cost of the stub per job in seconds"
+    )
+    parser.add_argument(
+        "--pages",
+        type=int,
+        default=1,
+        help="Number of pages in each stub result"
+    )
+    parser.add_argument(
+        "--blocking",
+        action="store_true",
+        help="Burn the stub's CPU on the event loop"
+    )
+    parser.add_argument(
+        "--no-poll",
+        action="store_true",
+        help="Don't fetch the result after each job"
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="Write the report as JSON to this file"
+    )
+    return parser.parse_args()
+
+
+def serve(port: int, workers: int) -> None:
+    """Run a server with the stub technology registered as a plugin.
+    
+    Args:
+        port: Port to listen on
+        workers: Number of worker processes
+    """
+    sys.path.insert(0, str(src_dir))
+    sys.path.insert(0, str(benchmarks_dir))
+    # Settings are read from the environment by every worker process, so the
+    # plugin is registered before the app is imported
+    plugins = json.loads(os.environ.get("PLUGINS") or "{}")
+    plugins.setdefault("stub", "stub_technology:StubTechnology")
+    os.environ["PLUGINS"] = json.dumps(plugins)
+    
+    import uvicorn
+    
+    uvicorn.run(
+        "app.main:app",
+        host="127.0.0.1",
+        port=port,
+        workers=workers,
+        log_level="warning",
+    )
+
+
+def spawn_server(workers: int) -> Tuple[subprocess.Popen, str]:
+    """Start a server in a subprocess and wait until it is healthy.
+    
+    Args:
+        workers: Number of worker processes
+    
+    Returns:
+        Tuple[subprocess.Popen, str]: The server process and its base URL
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    
+    env = dict(os.environ)
+    # Make the stub importable in the server's worker processes as well
+    env["PYTHONPATH"] = os.pathsep.join(
+        [str(src_dir), str(benchmarks_dir), env.get("PYTHONPATH", "")]
+    )
+    env.setdefault(
+        "OUTPUT_DIRECTORY", tempfile.mkdtemp(prefix="document-reader-load-")
+    )
+    process = subprocess.Popen(
+        [sys.executable, __file__, "--serve", "--url", f"http://127.0.0.1:{port}",
+         "--workers", str(workers)],
+        env=env,
+    )
+    
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/health", timeout=1).status_code == 200:
+                return process, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("Server did not start within 30 seconds")
+
+
+def read_lag(url: str) -> Optional[Dict[str, float]]:
+    """Read the event loop lag histogram from the metrics endpoint.
+    
+    Args:
+        url: Base URL of the server
+    
+    Returns:
+        Optional[Dict[str, float]]: Bucket counts by upper bound, plus sum and
+            count, or None if the server has no metrics
+    """
+    try:
+        text = httpx.get(f"{url}/metrics", timeout=5).text
+    except httpx.HTTPError:
+        return None
+    
+    values: Dict[str, float] = {}
+    for line in text.splitlines():
+        match = re.match(rf'{LAG_METRIC}_bucket{{le="([^"]+)"}} (\S+)', line)
+        if match:
+            values[match.group(1)] = float(match.group(2))
+        elif line.startswith(f"{LAG_METRIC}_sum "):
+            values["sum"] = float(line.split()[1])
+        elif line.startswith(f"{LAG_METRIC}_count "):
+            values["count"] = float(line.split()[1])
+    return values or None
+
+
+def lag_summary(before: Dict[str, float], after: Dict[str, float]) -> Dict[str, float]:
+    """Summarize the event loop lag measured between two scrapes.
+    
+    Args:
+        before: The histogram before the load
+        after: The histogram after the load
+    
+    Returns:
+        Dict[str, float]: Mean lag and the bucket bound containing the p99
+    """
+    count = after.get("count", 0) - before.get("count", 0)
+    if count <= 0:
+        return {}
+    
+    p99 = None
+    bounds = sorted(
+        (key for key in after if key not in ("sum", "count")),
+        key=lambda key: float("inf") if key == "+Inf" else float(key),
+    )
+    for bound in bounds:
+        if after[bound] - before.get(bound, 0) >= 0.99 * count:
+            p99 = float("inf") if bound == "+Inf" else float(bound)
+            break
+    return {
+        "samples": count,
+        "mean_seconds": round((after["sum"] - before.get("sum", 0)) / count, 6),
+        "p99_bucket_seconds": p99,
+    }
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Get a percentile of a list of values.
+    
+    Args:
+        values: The values
+        fraction: The percentile as a fraction, e.g. 0.99
+    
+    Returns:
+        Optional[float]: The percentile, or None without values
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def client_loop(
+    client: httpx.AsyncClient,
+    args: argparse.Namespace,
+    document: bytes,
+    deadline: float,
+    latencies: Dict[str, List[float]],
+    statuses: Dict[str, int],
+) -> None:
+    """Submit jobs and fetch their results until the deadline.
+    
+    Args:
+        client: The HTTP client
+        args: The command line arguments
+        document: The document to upload
+        deadline: Monotonic time to stop at
+        latencies: Latencies by endpoint, appended to
+        statuses: Response counts by endpoint and status, updated
+    """
+    params = json.dumps({
+        "latency": args.latency,
+        "cpu": args.cpu,
+        "pages": args.pages,
+        "blocking": args.blocking,
+    })
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        response = await client.post(
+            "/api/v1/run",
+            files={"file": ("load.pdf", document, "application/pdf")},
+            data={"technology": "stub", "params": params},
+        )
+        latencies["run"].append(time.perf_counter() - started)
+        key = f"run {response.status_code}"
+        statuses[key] = statuses.get(key, 0) + 1
+        if response.status_code == 429:
+            await asyncio.sleep(float(response.headers.get("Retry-After", 1)))
+            continue
+        if response.status_code != 202 or args.no_poll:
+            continue
+        
+        job_id = response.json()["job_id"]
+        started = time.perf_counter()
+        response = await client.get(f"/api/v1/results/{job_id}")
+        latencies["results"].append(time.perf_counter() - started)
+        key = f"results {response.status_code}"
+        statuses[key] = statuses.get(key, 0) + 1
+
+
+async def generate_load(args: argparse.Namespace, url: str) -> Dict:
+    """Generate load against a server and build the report.
+    
+    Args:
+        args: The command line arguments
+        url: Base URL of the server
+    
+    Returns:
+        Dict: The report
+    """
+    document = os.urandom(args.document_size)
+    latencies: Dict[str, List[float]] = {"run": [], "results": []}
+    statuses: Dict[str, int] = {}
+    
+    lag_before = read_lag(url)
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=120) as client:
+        started = time.monotonic()
+        deadline = started + args.duration
+        await asyncio.gather(*(
+            client_loop(client, args, document, deadline, latencies, statuses)
+            for _ in range(args.concurrency)
+        ))
+        elapsed = time.monotonic() - started
+    lag_after = read_lag(url)
+    
+    report = {
+        "concurrency": args.concurrency,
+        "duration_seconds": round(elapsed, 3),
+        "jobs_per_second": round(statuses.get("run 202", 0) / elapsed, 2),
+        "responses": statuses,
+        "latency_seconds": {
+            endpoint: {
+                "p50": percentile(values, 0.50),
+                "p99": percentile(values, 0.99),
+                "mean": statistics.mean(values) if values else None,
+            }
+            for endpoint, values in latencies.items()
+        },
+        "event_loop_lag": (
+            lag_summary(lag_before, lag_after) if lag_before and lag_after else {}
+        ),
+    }
+    return report
+
+
+def print_report(report: Dict) -> None:
+    """Print a report.
+    
+    Args:
+        report: The report
+    """
+    print(f"\nConcurrency {report['concurrency']}, {report['duration_seconds']}s")
+    print(f"Throughput: {report['jobs_per_second']} jobs/s")
+    print(f"Responses:  {report['responses']}")
+    for endpoint, latency in report["latency_seconds"].items():
+        if latency["p50"] is None:
+            continue
+        print(
+            f"{endpoint:<8} p50 {latency['p50'] * 1000:8.1f} ms   "
+            f"p99 {latency['p99'] * 1000:8.1f} ms"
+        )
+    lag = report["event_loop_lag"]
+    if lag:
+        print(
+            f"Event loop lag: mean {lag['mean_seconds'] * 1000:.1f} ms, "
+            f"p99 <= {lag['p99_bucket_seconds'] * 1000:.1f} ms"
+        )
+
+
+def main():
+    """Main entry point."""
+    args = parse_args()
+    
+    if args.serve:
+        serve(int(args.url.rsplit(":", 1)[1]), args.workers)
+        return
+    
+    process = None
+    url = args.url
+    if args.spawn:
+        process, url = spawn_server(args.workers)
+    try:
+        report = asyncio.run(generate_load(args, url))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    
+    print_report(report)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
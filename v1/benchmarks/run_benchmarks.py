@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+"""Run the benchmark suite and compare the results with a baseline.
+
+Examples:
+    # Run everything and save the results as the new baseline
+    python benchmarks/run_benchmarks.py --save-baseline
+    
+    # Run the quick subset and fail on a regression of more than 15%
+    python benchmarks/run_benchmarks.py --quick --threshold 0.15
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Add the src directory to the Python path
+benchmarks_dir = Path(__file__).parent
+sys.path.insert(0, str(benchmarks_dir.parent / "src"))
+sys.path.insert(0, str(benchmarks_dir))
+
+from suite import BenchmarkCase, all_cases
+
+RESULTS_DIR = benchmarks_dir / "results"
+BASELINE_PATH = benchmarks_dir / "baseline.json"
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Document Reader benchmarks")
+    parser.add_argument(
+        "--quick",
+        action="store_true",
+        help="Only run the quick subset of the benchmarks"
+    )
+    parser.add_argument(
+        "--only",
+        nargs="*",
+        default=None,
+        help="Only run benchmarks whose name contains one of these strings"
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="Number of measured runs of each benchmark (default: 5)"
+    )
+    parser.add_argument(
+        "--warmup",
+        type=int,
+        default=1,
+        help="Number of unmeasured runs before measuring (default: 1)"
+    )
+    parser.add_argument(
+        "--baseline",
+        type=str,
+        default=str(BASELINE_PATH),
+        help=f"Baseline to compare against (default: {BASELINE_PATH})"
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Save the results as the new baseline"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="Allowed throughput drop before reporting a regression (default: 0.10)"
+    )
+    return parser.parse_args()
+
+
+def run_case(case: BenchmarkCase, repeat: int, warmup: int) -> Dict[str, Any]:
+    """Run one benchmark case.
+    
+    Args:
+        case: The benchmark case
+        repeat: Number of measured runs
+        warmup: Number of unmeasured runs
+    
+    Returns:
+        Dict[str, Any]: The measurements of the case
+    """
+    benchmark = case.setup()
+    for _ in range(warmup):
+        benchmark()
+    
+    durations: List[float] = []
+    units = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        units = benchmark()
+        durations.append(time.perf_counter() - started)
+    
+    median = statistics.median(durations)
+    return {
+        "unit": case.unit,
+        "units": units,
+        "runs": repeat,
+        "median_seconds": round(median, 6),
+        "min_seconds": round(min(durations), 6),
+        "stdev_seconds": round(statistics.stdev(durations), 6) if repeat > 1 else 0.0,
+        "throughput": round(units / median, 3) if median > 0 else None,
+    }
+
+
+def compare(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    threshold: float,
+) -> List[str]:
+    """Compare results with a baseline.
+    
+    Args:
+        results: The measurements of this run
+        baseline: The measurements of the baseline run
+        threshold: Allowed relative throughput drop
+    
+    Returns:
+        List[str]: The names of the regressed benchmarks
+    """
+    regressions = []
+    print(f"\n{'benchmark':<28} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous or not previous.get("throughput"):
+            continue
+        if not current["throughput"]:
+            continue
+        change = current["throughput"] / previous["throughput"] - 1
+        flag = ""
+        if change < -threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(
+            f"{name:<28} {previous['throughput']:>12.1f} "
+            f"{current['throughput']:>12.1f} {change:>+8.1%}{flag}"
+        )
+    return regressions
+
+
+def main():
+    """Main entry point."""
+    args = parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    
+    cases = [case for case in all_cases() if case.quick or not args.quick]
+    if args.only:
+        cases = [c for c in cases if any(part in c.name for part in args.only)]
+    
+    results: Dict[str, Dict[str, Any]] = {}
+    for case in cases:
+        reason = case.skip_reason()
+        if reason is not None:
+            print(f"{case.name:<28} skipped: {reason}")
+            continue
+        
+        results[case.name] = run_case(case, args.repeat, args.warmup)
+        measurement = results[case.name]
+        print(
+            f"{case.name:<28} {measurement['throughput']:>10.1f} "
+            f"{case.unit}/s  (median {measurement['median_seconds'] * 1000:.1f} ms)"
+        )
+    
+    report = {
+        "created_at": datetime.now().isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+    
+    RESULTS_DIR.mkdir(exist_ok=True)
+    output_path = RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    output_path.write_text(json.dumps(report, indent=2))
+    print(f"\nSaved results to {output_path}")
+    
+    regressions: List[str] = []
+    baseline_path = Path(args.baseline)
+    if baseline_path.exists() and not args.save_baseline:
+        baseline = json.loads(baseline_path.read_text())
+        regressions = compare(results, baseline["results"], args.threshold)
+    
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(report, indent=2))
+        print(f"Saved baseline to {baseline_path}")
+    
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed by more than "
+              f"{args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
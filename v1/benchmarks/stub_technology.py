@@ -0,0 +1,109 @@
+"""Stub technology with tunable synthetic latency and CPU cost.
+
+Used by the load test to measure what the API layer sustains on its own. Register
+it in a server with the ``plugins`` section of ``config.yaml``:
+
+    plugins:
+      stub: stub_technology:StubTechnology
+
+(with the ``benchmarks`` directory on the Python path), or start a server with
+``python benchmarks/loadtest.py --serve``.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict
+
+from core import metrics
+from core.base import BaseTechnology
+from core.context import to_thread
+from core.factory import TechnologyFactory
+from core.models import DocumentChunk, ProcessingResult
+
+
+def _burn_cpu(seconds: float) -> None:
+    """Keep a CPU busy for the given time."""
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+
+
+class StubTechnology(BaseTechnology):
+    """Stub technology that waits and burns CPU instead of processing."""
+    
+    @classmethod
+    def get_name(cls) -> str:
+        """Get the name of the technology."""
+        return "stub"
+    
+    async def run(self, document: bytes, **params) -> ProcessingResult:
+        """Pretend to process a document.
+        
+        Args:
+            document: The document content as bytes
+            **params: Synthetic cost parameters, see get_param_schema
+        
+        Returns:
+            ProcessingResult: A result with one chunk per page
+        """
+        params = self.resolve_params(params)
+        latency = float(params.get("latency", 0.0))
+        cpu = float(params.get("cpu", 0.0))
+        pages = int(params.get("pages", 1))
+        blocking = bool(params.get("blocking", False))
+        
+        chunks = []
+        for page in range(1, pages + 1):
+            with metrics.stage(self.get_name(), "ocr_page"):
+                if latency:
+                    await asyncio.sleep(latency / pages)
+                if cpu and blocking:
+                    # Deliberately block the event loop
+                    _burn_cpu(cpu / pages)
+                elif cpu:
+                    await to_thread(_burn_cpu, cpu / pages)
+            chunks.append(DocumentChunk(
+                text=f"Stub text of page {page}",
+                page=page,
+                metadata={"page": page}
+            ))
+        
+        return ProcessingResult(
+            data=chunks,
+            technology_used=self.get_name(),
+            metadata={"num_pages": pages, "document_size": len(document)}
+        )
+    
+    @classmethod
+    def get_param_schema(cls) -> Dict[str, Any]:
+        """Get the parameter schema for the stub.
+        
+        Returns:
+            Dict[str, Any]: The parameter schema
+        """
+        return {
+            "latency": {
+                "type": "number",
+                "description": "Seconds spent waiting without using CPU",
+                "default": 0.0
+            },
+            "cpu": {
+                "type": "number",
+                "description": "Seconds of CPU burned per job",
+                "default": 0.0
+            },
+            "pages": {
+                "type": "integer",
+                "description": "Number of pages in the result",
+                "default": 1
+            },
+            "blocking": {
+                "type": "boolean",
+                "description": "Burn the CPU on the event loop instead of a thread",
+                "default": False
+            }
+        }
+
+
+# Register the technology
+TechnologyFactory.register(StubTechnology)
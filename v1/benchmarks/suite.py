@@ -0,0 +1,190 @@
+"""Benchmarks of the document processing hot paths.
+
+Each benchmark prepares its input once and returns a function that processes it
+and returns the number of units (pages, results) it handled.
+"""
+
+import asyncio
+import atexit
+import shutil
+import tempfile
+from typing import Callable, List, Optional
+
+import documents
+
+# A prepared benchmark: returns the number of units processed
+Benchmark = Callable[[], int]
+
+
+class BenchmarkCase:
+    """A named benchmark with the unit its throughput is measured in."""
+    
+    def __init__(
+        self,
+        name: str,
+        unit: str,
+        setup: Callable[[], Benchmark],
+        requires: Optional[Callable[[], Optional[str]]] = None,
+        quick: bool = True,
+    ):
+        """Initialize the benchmark case.
+        
+        Args:
+            name: Unique name of the benchmark
+            unit: What the benchmark counts, e.g. "pages"
+            setup: Prepares the input and returns the benchmark function
+            requires: Returns a reason to skip the benchmark, or None to run it
+            quick: Whether the benchmark is part of the quick subset
+        """
+        self.name = name
+        self.unit = unit
+        self.setup = setup
+        self.requires = requires
+        self.quick = quick
+    
+    def skip_reason(self) -> Optional[str]:
+        """Get the reason the benchmark can't run here, if any.
+        
+        Returns:
+            Optional[str]: The reason, or None if the benchmark can run
+        """
+        return self.requires() if self.requires is not None else None
+
+
+def _requires_tesseract() -> Optional[str]:
+    """Skip Tesseract benchmarks when the binary is not installed."""
+    if shutil.which("tesseract") is None:
+        return "tesseract binary not found"
+    return None
+
+
+def _requires_poppler() -> Optional[str]:
+    """Skip PDF rasterization benchmarks when Poppler is not installed."""
+    if shutil.which("pdftoppm") is None:
+        return "pdftoppm (poppler) not found"
+    return _requires_tesseract()
+
+
+def _tesseract_run(document: bytes) -> Benchmark:
+    """Benchmark TesseractTechnology.run on a document."""
+    from technologies.tesseract import TesseractTechnology
+    
+    technology = TesseractTechnology()
+    
+    def run() -> int:
+        result = asyncio.run(technology.run(document, lang="eng"))
+        return result.metadata["num_pages"]
+    
+    return run
+
+
+def _pdf_text(pages: int) -> Benchmark:
+    """Benchmark extracting the text layer of a PDF."""
+    from technologies.openai import OpenAITechnology
+    
+    document = documents.make_text_pdf(pages)
+    
+    def run() -> int:
+        _, num_pages = OpenAITechnology._extract_text(document)
+        return num_pages
+    
+    return run
+
+
+def _large_result(pages: int):
+    """Build a ProcessingResult with one chunk of text per page."""
+    from core.models import DocumentChunk, ProcessingResult
+    
+    text = "\n".join(documents.make_lines(50))
+    return ProcessingResult(
+        data=[
+            DocumentChunk(text=text, page=i + 1, metadata={"page": i + 1})
+            for i in range(pages)
+        ],
+        technology_used="benchmark",
+        metadata={"num_pages": pages},
+    )
+
+
+def _markdown(pages: int) -> Benchmark:
+    """Benchmark rendering a large result as markdown."""
+    result = _large_result(pages)
+    
+    def run() -> int:
+        result.markdown
+        return pages
+    
+    return run
+
+
+def _result_handler(pages: int, load: bool) -> Benchmark:
+    """Benchmark saving or loading a large result with ResultHandler."""
+    from config.settings import settings
+    from core.models import ProcessRequest
+    from core.result_handler import ResultHandler
+    
+    output_directory = tempfile.mkdtemp(prefix="document-reader-bench-")
+    atexit.register(shutil.rmtree, output_directory, ignore_errors=True)
+    settings.output_directory = output_directory
+    handler = ResultHandler()
+    result = _large_result(pages)
+    request = ProcessRequest(technology="benchmark", filename="benchmark.pdf")
+    job_id = handler.save_result(result, request)
+    
+    def run() -> int:
+        if load:
+            handler.get_result(job_id)
+        else:
+            handler.save_result(result, request)
+        return pages
+    
+    return run
+
+
+def all_cases() -> List[BenchmarkCase]:
+    """Get every benchmark case.
+    
+    Returns:
+        List[BenchmarkCase]: The benchmark cases
+    """
+    cases = []
+    for dpi in (150, 300):
+        cases.append(BenchmarkCase(
+            f"tesseract_image_{dpi}dpi",
+            "pages",
+            lambda dpi=dpi: _tesseract_run(documents.make_image_bytes(dpi=dpi)),
+            requires=_requires_tesseract,
+            quick=dpi == 150,
+        ))
+    for pages in (1, 5):
+        cases.append(BenchmarkCase(
+            f"tesseract_pdf_{pages}pages",
+            "pages",
+            lambda pages=pages: _tesseract_run(documents.make_scanned_pdf(pages)),
+            requires=_requires_poppler,
+            quick=pages == 1,
+        ))
+    for pages in (10, 200):
+        cases.append(BenchmarkCase(
+            f"pdf_text_{pages}pages", "pages", lambda pages=pages: _pdf_text(pages),
+            quick=pages == 10,
+        ))
+    for pages in (100, 2000):
+        cases.append(BenchmarkCase(
+            f"result_save_{pages}pages",
+            "pages",
+            lambda pages=pages: _result_handler(pages, load=False),
+            quick=pages == 100,
+        ))
+        cases.append(BenchmarkCase(
+            f"result_load_{pages}pages",
+            "pages",
+            lambda pages=pages: _result_handler(pages, load=True),
+            quick=pages == 100,
+        ))
+    for pages in (1000, 10000):
+        cases.append(BenchmarkCase(
+            f"markdown_{pages}pages", "pages", lambda pages=pages: _markdown(pages),
+            quick=pages == 1000,
+        ))
+    return cases
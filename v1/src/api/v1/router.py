@@ -1,87 +1,301 @@
 """API router for document processing endpoints."""
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
+import asyncio
+import functools
+from typing import Any, Dict, List, Optional
+
+from fastapi import (
+    APIRouter, Body, File, Form, Header, HTTPException, Query, Request,
+    Response, UploadFile, status
+)
+from fastapi.responses import JSONResponse
 from pydantic import ValidationError
 
+from config.settings import reload_config, settings
+from config.settings import update_config as apply_config_updates
+from core import http_cache, metrics
+from core.admission import CapacityExceededError
+from core.context import JobCancelledError
 from core.factory import TechnologyFactory
-from core.models import ProcessRequest, ProcessResponse, ResultResponse
-from core.result_handler import ResultHandler
+from core.job_queue import JobQueue, QueuedJob, create_queue
+from core.job_store import CANCELLED, FAILED, QUEUED, get_job_store
+from core.limits import DocumentTooLargeError
+from core.models import (
+    JobStatus, ProcessRequest, ProcessResponse, ResultResponse, SearchHit,
+    SearchResponse
+)
+from core.processing import execute_job
+from core.result_handler import JOB_FILE, ResultHandler
+from core.search_index import SearchIndex
+from core.selection import InvalidSelectionError, PageSelection, parse_pages
+from core.sniff import SNIFF_BYTES, UnsupportedDocumentError, check_supported, sniff
+from core.startup import startup_report
 
 api_router = APIRouter()
 
 
+def _is_truthy(value: Optional[str]) -> bool:
+    """Check whether a header value turns an option on."""
+    return value is not None and value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _job_queue(http_request: Request) -> JobQueue:
+    """Get the queue handing jobs to the workers, created at startup."""
+    state = http_request.app.state
+    queue = getattr(state, "job_queue", None)
+    if queue is None:
+        # Queueing was turned on after startup
+        queue = state.job_queue = create_queue()
+    return queue
+
+
 @api_router.post("/run", response_model=ProcessResponse, status_code=status.HTTP_202_ACCEPTED)
 async def run_document_processing(
+    http_request: Request,
     file: UploadFile = File(...),
     technology: str = Form(...),
-    params: str = Form("{}")
+    params: str = Form("{}"),
+    timeout: Optional[float] = Form(None),
+    profile: bool = Query(False),
+    x_profile: Optional[str] = Header(None)
 ):
     """Process a document using the specified technology.
     
+    Every job records the time spent in each stage in the ``timings`` of the
+    result metadata. With ``?profile=true`` or an ``X-Profile: 1`` header the
+    job is also profiled, and the profile is stored next to the result.
+    
+    With a queue backend configured the document is only stored and the job is
+    queued for a worker (``worker.py``); poll ``/results/{job_id}`` for it.
+    
+    With a ``timeout``, the pages finished within that many seconds are saved as
+    a partial result. The job is cancelled if the client disconnects first.
+    
     Args:
+        http_request: The HTTP request, watched for the client disconnecting
         file: The document file to process
         technology: The technology to use for processing
         params: JSON string of parameters for the technology
-        
+        timeout: Time budget of the job in seconds
+        profile: Whether to profile the job
+        x_profile: Header alternative to the ``profile`` query parameter
+    
     Returns:
         ProcessResponse: Response with job ID
     """
+    job_id = None
+    job_store = get_job_store()
     try:
         # Parse request
         request = ProcessRequest(
             technology=technology,
             params=params,
-            filename=file.filename
+            filename=file.filename,
+            timeout=timeout
+        )
+        profile = profile or _is_truthy(x_profile)
+        
+        # Reject documents the technology can't process before any work
+        document_type = sniff(await file.read(SNIFF_BYTES))
+        await file.seek(0)
+        check_supported(
+            request.technology,
+            document_type,
+            TechnologyFactory.get_supported_types(request.technology)
         )
         
+        if settings.queue_backend:
+            # Workers run the technology, don't load it on this node
+            if request.technology not in TechnologyFactory.names():
+                raise KeyError(request.technology)
+            
+            job_id = ResultHandler.new_job_id()
+            await asyncio.to_thread(
+                job_store.create,
+                job_id,
+                request.technology,
+                request.filename,
+                status=QUEUED
+            )
+            queued = QueuedJob(job_id=job_id, request=request, profile=profile)
+            result_handler = ResultHandler()
+            await asyncio.to_thread(
+                result_handler.save_document, job_id, await file.read()
+            )
+            # Kept to queue the job again if its worker is interrupted
+            await asyncio.to_thread(
+                result_handler.save_artifact, job_id, JOB_FILE, queued.json()
+            )
+            await asyncio.to_thread(_job_queue(http_request).put, queued)
+            
+            metrics.requests_total.inc(technology=request.technology, outcome="queued")
+            return ProcessResponse(job_id=job_id, status=QUEUED)
+        
         # Get technology implementation
         tech_impl = TechnologyFactory.get_technology(request.technology)
+        check_supported(
+            request.technology, document_type, tech_impl.get_supported_types()
+        )
         
-        # Process the document
-        contents = await file.read()
-        result = await tech_impl.run(contents, **request.params_dict)
+        # Record the job where every worker process can see it
+        job_id = ResultHandler.new_job_id()
+        await asyncio.to_thread(
+            job_store.create,
+            job_id,
+            request.technology,
+            request.filename,
+            status=QUEUED
+        )
         
-        # Save result
-        result_handler = ResultHandler()
-        job_id = result_handler.save_result(result, request)
+        # The upload is read once a slot is free, so queued jobs only hold the
+        # spooled file
+        job_id = await execute_job(
+            request,
+            job_id,
+            file.read,
+            profile=profile,
+            disconnected=http_request.is_disconnected
+        )
         
+        metrics.requests_total.inc(technology=request.technology, outcome="success")
         return ProcessResponse(job_id=job_id, status="processing")
     
+    except CapacityExceededError as e:
+        metrics.requests_total.inc(technology=technology, outcome="rejected")
+        await asyncio.to_thread(job_store.update, job_id, FAILED, str(e))
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except JobCancelledError as e:
+        metrics.requests_total.inc(technology=technology, outcome="cancelled")
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job {job_id} cancelled: {str(e)}"
+        )
+    except UnsupportedDocumentError as e:
+        metrics.requests_total.inc(technology=technology, outcome="unsupported")
+        if job_id is not None:
+            await asyncio.to_thread(job_store.update, job_id, FAILED, str(e))
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=str(e)
+        )
+    except DocumentTooLargeError as e:
+        metrics.requests_total.inc(technology=technology, outcome="too_large")
+        if job_id is not None:
+            await asyncio.to_thread(job_store.update, job_id, FAILED, str(e))
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
     except ValidationError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Invalid request parameters: {str(e)}"
         )
+    except InvalidSelectionError as e:
+        metrics.requests_total.inc(technology=technology, outcome="error")
+        if job_id is not None:
+            await asyncio.to_thread(job_store.update, job_id, FAILED, str(e))
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid request parameters: {str(e)}"
+        )
     except KeyError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Unknown technology: {str(e)}"
         )
     except Exception as e:
+        metrics.requests_total.inc(technology=technology, outcome="error")
+        if job_id is not None:
+            await asyncio.to_thread(job_store.update, job_id, FAILED, str(e))
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error processing document: {str(e)}"
         )
 
 
-@api_router.get("/results/{job_id}", response_model=ResultResponse)
-async def get_result(job_id: str):
+@api_router.get(
+    "/results/{job_id}",
+    response_model=ResultResponse,
+    responses={202: {"model": JobStatus}}
+)
+async def get_result(
+    job_id: str,
+    offset: Optional[int] = Query(None, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    pages: Optional[str] = Query(None, description='Pages to return, e.g. "1,3-5,10-"'),
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+):
     """Get the result of a document processing job.
     
+    Jobs that have no result yet, because they are still queued or processing
+    on any worker process, failed or were cancelled, are answered with their
+    status.
+    
+    With ``offset``, ``limit`` or ``pages`` only those chunks of the result
+    are read and returned, along with the ``pagination`` of the response.
+    
+    Results carry an ETag and are answered with ``304 Not Modified`` when the
+    client already has them, and are compressed as the client accepts.
+    
     Args:
         job_id: The ID of the job
-        
+        offset: The number of (selected) chunks to skip
+        limit: The maximum number of chunks to return
+        pages: Only return the chunks of these pages
+        if_none_match: The ETags of the versions the client has
+        accept_encoding: The content encodings the client accepts
+    
     Returns:
         ResultResponse: The result of the job
     """
+    try:
+        page_selection = parse_pages(pages)
+    except InvalidSelectionError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
     try:
         result_handler = ResultHandler()
-        result = result_handler.get_result(job_id)
+        response = await asyncio.to_thread(
+            _cached_result, result_handler, job_id, offset, limit, page_selection,
+            if_none_match, accept_encoding
+        )
+        if response is not None:
+            return response
+        
+        if offset is None and limit is None and page_selection is None:
+            result = await asyncio.to_thread(result_handler.get_result, job_id)
+        else:
+            result = await asyncio.to_thread(
+                result_handler.get_result_page,
+                job_id,
+                offset or 0,
+                limit,
+                page_selection,
+            )
         
         if result is None:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Result with ID {job_id} not found"
+            job = await asyncio.to_thread(get_job_store().get, job_id)
+            if job is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Result with ID {job_id} not found"
+                )
+            job_status = JobStatus(
+                job_id=job_id, status=job["status"], error=job["error"]
+            )
+            return JSONResponse(
+                status_code=(
+                    status.HTTP_200_OK if job["status"] in (FAILED, CANCELLED)
+                    else status.HTTP_202_ACCEPTED
+                ),
+                content=job_status.dict(),
+                headers={"Cache-Control": http_cache.NO_CACHE}
             )
         
         return result
@@ -96,16 +310,176 @@ async def get_result(job_id: str):
         )
 
 
+def _cached_result(
+    result_handler: ResultHandler,
+    job_id: str,
+    offset: Optional[int],
+    limit: Optional[int],
+    page_selection: Optional[PageSelection],
+    if_none_match: Optional[str],
+    accept_encoding: Optional[str]
+) -> Optional[Response]:
+    """Answer a result request from the response body saved with the result.
+    
+    Args:
+        result_handler: The result handler
+        job_id: The ID of the job
+        offset: The number of (selected) chunks to skip
+        limit: The maximum number of chunks to return
+        page_selection: Only return the chunks of these pages
+        if_none_match: The If-None-Match header
+        accept_encoding: The Accept-Encoding header
+    
+    Returns:
+        Optional[Response]: The response, or None if the result was saved
+            without a response body or is not found
+    """
+    etag = result_handler.get_result_etag(job_id)
+    if etag is None:
+        return None
+    
+    paginated = offset is not None or limit is not None or page_selection is not None
+    if paginated:
+        etag = http_cache.derive_etag(
+            etag,
+            offset or 0,
+            limit,
+            None if page_selection is None else page_selection.to_list()
+        )
+    if http_cache.etag_matches(if_none_match, etag):
+        return http_cache.not_modified(etag, settings.result_cache_control)
+    
+    if paginated:
+        result = result_handler.get_result_page(
+            job_id, offset or 0, limit, page_selection
+        )
+        body = None if result is None else result.json().encode()
+        stored = None
+    else:
+        body = result_handler.get_response_body(job_id)
+        stored = functools.partial(result_handler.get_response_body, job_id)
+    if body is None:
+        return None
+    return http_cache.encoded_response(
+        body, etag, accept_encoding, settings.result_cache_control, stored
+    )
+
+
+@api_router.post("/results/{job_id}/cancel", response_model=JobStatus)
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job.
+    
+    The job is stopped by the worker process running it within a second, and
+    its status becomes ``cancelled``.
+    
+    Args:
+        job_id: The ID of the job
+    
+    Returns:
+        JobStatus: The status of the job
+    """
+    job_store = get_job_store()
+    if not await asyncio.to_thread(job_store.cancel, job_id):
+        job = await asyncio.to_thread(job_store.get, job_id)
+        if job is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Job with ID {job_id} not found"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job {job_id} is already {job['status']}"
+        )
+    return JobStatus(job_id=job_id, status=CANCELLED, error="Cancelled by request")
+
+
+@api_router.get("/search", response_model=SearchResponse)
+async def search_results(
+    q: str = Query(
+        ..., description="Words to find, a word ending in * matches a prefix"
+    ),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    technology: Optional[str] = Query(None),
+):
+    """Search the text of the stored results.
+    
+    Args:
+        q: The query
+        limit: The maximum number of hits to return
+        offset: The number of hits to skip
+        technology: Only search results of this technology
+    
+    Returns:
+        SearchResponse: The matching pages, best matches first
+    """
+    try:
+        total, hits = await asyncio.to_thread(
+            SearchIndex().search, q, limit, offset, technology
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    return SearchResponse(
+        query=q,
+        total=total,
+        offset=offset,
+        limit=limit,
+        hits=[SearchHit(**hit) for hit in hits]
+    )
+
+
 @api_router.get("/status")
 async def get_status():
     """Get the status of the API."""
     return {"status": "running"}
 
 
+@api_router.get("/startup")
+async def get_startup_report():
+    """Get the time taken by each startup step and the startup budget."""
+    return startup_report.to_dict()
+
+
 @api_router.post("/config")
-async def update_config():
+async def update_config(
+    updates: Dict[str, Any] = Body(default={}),
+    reload: bool = Query(False)
+):
     """Update the configuration dynamically.
     
-    This is a placeholder for future implementation.
+    The body has the layout of config.yaml and only needs the values that
+    change, e.g. ``{"technologies": {"tesseract": {"max_concurrency": 4}}}``.
+    With ``?reload=true`` config.yaml is reloaded first. The new settings are
+    validated and applied at once; running jobs are not affected. Settings
+    that need a restart (host, port, workers, ...) are reported, not applied.
+    
+    Args:
+        updates: The configuration updates
+        reload: Whether to reload config.yaml before applying the updates
+    
+    Returns:
+        Dict[str, Any]: The applied settings and the ones that require a restart
     """
-    return {"status": "not implemented"}
\ No newline at end of file
+    try:
+        applied: List[str] = []
+        require_restart: List[str] = []
+        if reload:
+            changes = reload_config()
+            applied += changes["applied"]
+            require_restart += changes["require_restart"]
+        if updates:
+            changes = apply_config_updates(updates)
+            applied += changes["applied"]
+            require_restart += changes["require_restart"]
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid configuration: {str(e)}"
+        )
+    
+    return {
+        "status": "updated",
+        "applied": sorted(set(applied)),
+        "require_restart": sorted(set(require_restart))
+    }
@@ -1,14 +1,24 @@
 """Main application entry point for Document Reader."""
 
+import asyncio
 import logging
 import os
 from pathlib import Path
 
-import uvicorn
-from fastapi import FastAPI
+from core.startup import startup_report
 
-from api.v1.router import api_router
-from config.settings import settings
+with startup_report.step("import app dependencies"):
+    import uvicorn
+    from fastapi import FastAPI
+    from fastapi.responses import PlainTextResponse
+    
+    from api.v1.router import api_router
+    from config.settings import export_settings, settings, watch_config_file
+    from core import metrics
+    from core.factory import TechnologyFactory
+    from core.job_queue import create_queue
+    from core.plugins import discover_technologies
+    from core.processing import recover_periodically
 
 # Configure logging
 logging.basicConfig(
@@ -27,6 +37,52 @@ app = FastAPI(
 # Include API router
 app.include_router(api_router, prefix="/api/v1")
 
+
+@app.on_event("startup")
+async def warm_up_technologies():
+    """Discover the technologies and warm up the preloaded ones.
+    
+    Technologies that are not preloaded are imported on first use, so the
+    time until the application serves requests stays within budget.
+    """
+    discover_technologies()
+    if settings.queue_backend:
+        # Standalone workers run the technologies, this node only queues jobs
+        logger.info(
+            f"Queueing jobs for workers with the {settings.queue_backend} backend"
+        )
+    else:
+        await TechnologyFactory.startup(settings.preload_technologies)
+    startup_report.finish(settings.startup_budget_seconds)
+    
+    # Jobs interrupted by a crash or restart are queued again for the workers,
+    # or marked failed when this node processed them itself
+    app.state.job_queue = create_queue() if settings.queue_backend else None
+    app.state.job_recovery = asyncio.create_task(
+        recover_periodically(app.state.job_queue)
+    )
+    
+    # Keep measuring event loop lag in the background
+    app.state.loop_monitor = asyncio.create_task(metrics.monitor_event_loop())
+    
+    # Pick up changes to the configuration file without a restart
+    if settings.config_reload_interval:
+        app.state.config_watcher = asyncio.create_task(watch_config_file())
+
+
+@app.on_event("shutdown")
+async def shut_down_technologies():
+    """Release the resources held by the technologies."""
+    for task_name in ("job_recovery", "loop_monitor", "config_watcher"):
+        task = getattr(app.state, task_name, None)
+        if task is not None:
+            task.cancel()
+    queue = getattr(app.state, "job_queue", None)
+    if queue is not None:
+        queue.close()
+    await TechnologyFactory.shutdown()
+
+
 # Health check endpoint
 @app.get("/health", tags=["health"])
 async def health_check():
@@ -34,6 +90,16 @@ async def health_check():
     return {"status": "healthy"}
 
 
+# Metrics endpoint
+@app.get("/metrics", tags=["monitoring"], response_class=PlainTextResponse)
+async def get_metrics():
+    """Metrics endpoint in the Prometheus text format."""
+    return PlainTextResponse(
+        metrics.registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 def create_output_directory():
     """Create output directory if it doesn't exist."""
     output_dir = Path(settings.output_directory)
@@ -47,14 +113,23 @@ def start():
     # Create output directory
     create_output_directory()
     
+    # Worker processes import the app afresh, hand the settings down to them
+    export_settings()
+    
+    workers = settings.workers
+    if settings.debug and workers > 1:
+        logger.warning("Auto-reload in debug mode runs a single worker process")
+        workers = 1
+    
     # Start the server
     uvicorn.run(
         "app.main:app",
         host=settings.host,
         port=settings.port,
         reload=settings.debug,
+        workers=workers,
     )
 
 
 if __name__ == "__main__":
-    start()
\ No newline at end of file
+    start()
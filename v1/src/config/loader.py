@@ -11,62 +11,110 @@ from config.settings import settings
 logger = logging.getLogger(__name__)
 
 
-def load_yaml_config(config_path: Optional[str] = None) -> Dict[str, Any]:
+# Configuration file used when no other is given
+DEFAULT_CONFIG_PATH = Path(__file__).parent / "config.yaml"
+
+
+def load_yaml_config(
+    config_path: Optional[str] = None, raise_errors: bool = False
+) -> Dict[str, Any]:
     """Load configuration from a YAML file.
     
     Args:
         config_path: Path to the configuration file
+        raise_errors: Raise instead of returning an empty configuration when
+            the file can't be read or parsed
         
     Returns:
         Dict[str, Any]: The configuration
     """
     if config_path is None:
         # Look for config.yaml in the config directory
-        config_dir = Path(__file__).parent
-        config_path = config_dir / "config.yaml"
+        config_path = DEFAULT_CONFIG_PATH
     
     try:
         with open(config_path, "r") as f:
-            config = yaml.safe_load(f)
+            config = yaml.safe_load(f) or {}
+        if not isinstance(config, dict):
+            raise ValueError("the configuration must be a mapping")
         
         logger.info(f"Loaded configuration from {config_path}")
         return config
     
     except Exception as e:
+        if raise_errors:
+            raise ValueError(
+                f"Error loading configuration from {config_path}: {str(e)}"
+            )
         logger.warning(f"Error loading configuration from {config_path}: {str(e)}")
         return {}
 
 
-def update_settings_from_yaml(config_path: Optional[str] = None) -> None:
-    """Update settings from a YAML configuration file.
+def settings_from_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Map the sections of a configuration to settings fields.
+    
+    Only the values present in the configuration are returned.
     
     Args:
-        config_path: Path to the configuration file
+        config: The configuration, in the layout of config.yaml
+        
+    Returns:
+        Dict[str, Any]: Settings field values by field name
     """
-    config = load_yaml_config(config_path)
+    fields: Dict[str, Any] = {}
     
-    # Update API settings
-    if "api" in config:
-        if "host" in config["api"]:
-            settings.host = config["api"]["host"]
-        if "port" in config["api"]:
-            settings.port = config["api"]["port"]
-        if "debug" in config["api"]:
-            settings.debug = config["api"]["debug"]
+    # API settings
+    api = config.get("api") or {}
+    for key in ("host", "port", "debug", "workers"):
+        if key in api:
+            fields[key] = api[key]
     
-    # Update application settings
-    if "app" in config:
-        if "project_name" in config["app"]:
-            settings.project_name = config["app"]["project_name"]
-        if "output_directory" in config["app"]:
-            settings.output_directory = config["app"]["output_directory"]
+    # Application settings
+    app = config.get("app") or {}
+    for key in (
+        "project_name",
+        "output_directory",
+        "preload_technologies",
+        "startup_budget_seconds",
+        "config_reload_interval",
+    ):
+        if key in app:
+            fields[key] = app[key]
     
-    # Update default technology
+    # Job queue settings
+    queue = config.get("queue") or {}
+    if "backend" in queue:
+        fields["queue_backend"] = queue["backend"]
+    if "url" in queue:
+        fields["queue_url"] = queue["url"]
+    
+    # Default technology
     if "default_technology" in config:
-        settings.default_technology = config["default_technology"]
+        fields["default_technology"] = config["default_technology"]
     
-    # Update technology-specific settings
+    # Technology-specific settings
     if "technologies" in config:
-        settings.technology_settings = config["technologies"]
+        fields["technology_settings"] = config["technologies"] or {}
+    
+    # Technology plugins
+    if "plugins" in config:
+        fields["plugins"] = config["plugins"] or {}
+    
+    return fields
+
+
+def update_settings_from_yaml(config_path: Optional[str] = None) -> None:
+    """Update settings from a YAML configuration file.
+    
+    Args:
+        config_path: Path to the configuration file
+    """
+    config = load_yaml_config(config_path)
+    
+    for name, value in settings_from_config(config).items():
+        if name == "plugins":
+            # Keep the plugins given in the environment
+            value = {**settings.plugins, **value}
+        setattr(settings, name, value)
     
-    logger.info("Updated settings from configuration file")
\ No newline at end of file
+    logger.info("Updated settings from configuration file")
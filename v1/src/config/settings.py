@@ -1,10 +1,41 @@
 """Application settings."""
 
+import asyncio
+import json
+import logging
 import os
+import threading
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from pydantic import BaseSettings, Field
+from pydantic import BaseSettings, Field, validator
+
+logger = logging.getLogger(__name__)
+
+# Admission limits of a technology and whether they may be None
+_LIMITS = {"max_concurrency": True, "max_queue": False, "queue_timeout": True}
+
+# Type and minimum of the tuning settings of technologies, None leaves the
+# technology's default
+_TUNING: Dict[str, Tuple[type, float]] = {
+    "ocr_workers": (int, 0),
+    "languages_per_worker": (int, 1),
+    "max_pages": (int, 1),
+    "max_page_pixels": (int, 1),
+    "max_decode_pixels": (int, 1),
+    "min_dpi": (int, 1),
+    "rasterize_batch_pages": (int, 1),
+    "max_pages_per_worker": (int, 1),
+    "max_worker_rss_mb": (float, 1),
+    "tile_pixels": (int, 1),
+    "tile_size": (int, 1),
+    "tile_overlap": (int, 0),
+    "max_parallel_pages": (int, 1),
+    "min_chars": (int, 0),
+    "min_word_ratio": (float, 0),
+    "max_tokens": (int, 1),
+    "temperature": (float, 0),
+}
 
 
 class Settings(BaseSettings):
@@ -18,6 +49,7 @@ class Settings(BaseSettings):
     host: str = Field(default="0.0.0.0", env="API_HOST")
     port: int = Field(default=8000, env="API_PORT")
     debug: bool = Field(default=False, env="DEBUG")
+    workers: int = Field(default=1, env="API_WORKERS")
     
     # Application settings
     project_name: str = Field(default="Document Reader", env="PROJECT_NAME")
@@ -32,6 +64,79 @@ class Settings(BaseSettings):
     # Technology-specific settings
     technology_settings: Dict[str, Dict] = Field(default_factory=dict)
     
+    # Extra technology plugins as name -> "module:Class"
+    plugins: Dict[str, str] = Field(default_factory=dict)
+    
+    # Technologies to import and warm up at startup, the rest load on first use
+    preload_technologies: List[str] = Field(default_factory=list)
+    
+    # Startup time budget in seconds, exceeding it logs a warning
+    startup_budget_seconds: Optional[float] = Field(
+        default=None, env="STARTUP_BUDGET_SECONDS"
+    )
+    
+    # Queue jobs for standalone workers ("sqlite" or "redis") instead of
+    # processing them in the API, and where the queue is
+    queue_backend: Optional[str] = Field(default=None, env="QUEUE_BACKEND")
+    queue_url: Optional[str] = Field(default=None, env="QUEUE_URL")
+    
+    # Seconds between checks of the configuration file for changes, None to
+    # only reload it on request
+    config_reload_interval: Optional[float] = Field(
+        default=None, env="CONFIG_RELOAD_INTERVAL"
+    )
+    
+    # Cache-Control header of stored results, which never change
+    result_cache_control: str = Field(
+        default="private, max-age=86400, immutable", env="RESULT_CACHE_CONTROL"
+    )
+    
+    @validator("workers")
+    def check_workers(cls, value: int) -> int:
+        """Check that at least one worker process serves requests."""
+        if value < 1:
+            raise ValueError("must be at least 1")
+        return value
+    
+    @validator("technology_settings")
+    def check_technology_limits(cls, value: Dict[str, Dict]) -> Dict[str, Dict]:
+        """Check the admission limits of every technology."""
+        for name, config in value.items():
+            for key, optional in _LIMITS.items():
+                limit = config.get(key)
+                if limit is None and (optional or key not in config):
+                    continue
+                if isinstance(limit, bool) or not isinstance(limit, (int, float)):
+                    raise ValueError(f"{name}.{key} must be a number")
+                if limit < 0 or (key == "max_concurrency" and limit < 1):
+                    raise ValueError(f"{name}.{key} is out of range")
+        return value
+    
+    @validator("technology_settings")
+    def check_technology_tuning(cls, value: Dict[str, Dict]) -> Dict[str, Dict]:
+        """Check the types and ranges of the tuning settings of every technology."""
+        for name, config in value.items():
+            for key, (kind, minimum) in _TUNING.items():
+                setting = config.get(key)
+                if setting is None:
+                    continue
+                if isinstance(setting, bool) or not isinstance(
+                    setting, int if kind is int else (int, float)
+                ):
+                    noun = "an integer" if kind is int else "a number"
+                    raise ValueError(f"{name}.{key} must be {noun}")
+                if setting < minimum:
+                    raise ValueError(f"{name}.{key} must be at least {minimum}")
+            tile_size = config.get("tile_size")
+            tile_overlap = config.get("tile_overlap")
+            if (
+                tile_size is not None
+                and tile_overlap is not None
+                and tile_overlap >= tile_size
+            ):
+                raise ValueError(f"{name}.tile_overlap must be smaller than tile_size")
+        return value
+    
     class Config:
         """Pydantic configuration."""
         env_file = ".env"
@@ -39,23 +144,206 @@ class Settings(BaseSettings):
         case_sensitive = False
 
 
+# Environment variable the effective settings are handed down to worker
+# processes in, so they see the configuration file and command line as well
+SETTINGS_ENV_VAR = "DOCUMENT_READER_SETTINGS"
+
+
+def _create_settings() -> Settings:
+    """Create the settings, using the ones handed down by a parent process.
+    
+    Returns:
+        Settings: The settings
+    """
+    exported = os.environ.get(SETTINGS_ENV_VAR)
+    if exported:
+        return Settings(**json.loads(exported))
+    return Settings()
+
+
+def export_settings() -> None:
+    """Hand the current settings down to worker processes started later."""
+    os.environ[SETTINGS_ENV_VAR] = settings.json()
+
+
 # Create settings instance
-settings = Settings()
+settings = _create_settings()
+
+
+# Settings that only take effect after a restart, reloads leave them unchanged
+RESTART_FIELDS = {
+    "host",
+    "port",
+    "workers",
+    "output_directory",
+    "queue_backend",
+    "queue_url",
+    "plugins",
+}
+
+_reload_listeners: List[Callable[[], None]] = []
+_reload_lock = threading.Lock()
+
 
+def on_reload(listener: Callable[[], None]) -> None:
+    """Call a function after every configuration reload.
+    
+    Args:
+        listener: Function applying the new settings, e.g. resizing a pool
+    """
+    _reload_listeners.append(listener)
 
-def load_config_from_file(config_path: Optional[str] = None) -> None:
-    """Load configuration from a file.
+
+def load_config_from_file(config_path: Optional[str] = None) -> Settings:
+    """Load and validate a configuration file on top of the current settings.
+    
+    The current settings are not changed.
     
     Args:
-        config_path: Path to the configuration file
+        config_path: Path to the configuration file, defaults to config.yaml
+    
+    Returns:
+        Settings: The settings the file describes
+    
+    Raises:
+        ValueError: If the file can't be read or its settings are invalid
     """
-    # This is a placeholder for loading configuration from a file
-    # In a real implementation, this would load YAML/JSON config
-    pass
+    from config.loader import load_yaml_config, settings_from_config
+    
+    config = load_yaml_config(config_path, raise_errors=True)
+    return Settings(**{**settings.dict(), **settings_from_config(config)})
 
 
-def reload_config() -> None:
-    """Reload configuration."""
-    # This is a placeholder for reloading configuration
-    # In a real implementation, this would reload the configuration
-    pass
\ No newline at end of file
+def apply_settings(new_settings: Settings) -> Dict[str, List[str]]:
+    """Replace the current settings with validated new ones.
+    
+    All changed values are swapped in at once, then the reload listeners apply
+    them to the running components. If a listener fails, the previous
+    settings are restored and applied again. Settings in RESTART_FIELDS are
+    left as they are.
+    
+    Args:
+        new_settings: The new settings
+    
+    Returns:
+        Dict[str, List[str]]: The ``applied`` settings and the ones that
+            ``require_restart``
+    
+    Raises:
+        ValueError: If the running components reject the new settings
+    """
+    with _reload_lock:
+        changed = [
+            name for name in Settings.__fields__
+            if getattr(new_settings, name) != getattr(settings, name)
+        ]
+        applied = [name for name in changed if name not in RESTART_FIELDS]
+        previous = {name: getattr(settings, name) for name in applied}
+        for name in applied:
+            setattr(settings, name, getattr(new_settings, name))
+        
+        if applied:
+            try:
+                for listener in _reload_listeners:
+                    listener()
+            except Exception as e:
+                logger.error(f"Rolling back new settings: {str(e)}")
+                for name, value in previous.items():
+                    setattr(settings, name, value)
+                _notify_listeners()
+                raise ValueError(str(e)) from e
+            logger.info(f"Applied new settings: {', '.join(applied)}")
+    
+    return {
+        "applied": applied,
+        "require_restart": [name for name in changed if name in RESTART_FIELDS],
+    }
+
+
+def _notify_listeners() -> None:
+    """Apply the current settings again, logging listeners that fail."""
+    for listener in _reload_listeners:
+        try:
+            listener()
+        except Exception as e:
+            logger.error(f"Error applying settings: {str(e)}")
+
+
+def reload_config(config_path: Optional[str] = None) -> Dict[str, List[str]]:
+    """Reload the configuration file.
+    
+    Nothing changes if the file is invalid.
+    
+    Args:
+        config_path: Path to the configuration file, defaults to config.yaml
+    
+    Returns:
+        Dict[str, List[str]]: The applied settings and the ones that require
+            a restart
+    
+    Raises:
+        ValueError: If the file can't be read or its settings are invalid
+    """
+    return apply_settings(load_config_from_file(config_path))
+
+
+def update_config(updates: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Apply configuration updates in the layout of config.yaml.
+    
+    Technology settings are merged into the current ones, so an update only
+    needs the values that change. Nothing changes if any value is invalid.
+    
+    Args:
+        updates: The configuration updates
+    
+    Returns:
+        Dict[str, List[str]]: The applied settings and the ones that require
+            a restart
+    
+    Raises:
+        ValueError: If the updated settings are invalid
+    """
+    from config.loader import settings_from_config
+    
+    fields = settings_from_config(updates)
+    if "technology_settings" in fields:
+        technology_settings = {
+            name: dict(config) for name, config in settings.technology_settings.items()
+        }
+        for name, config in fields["technology_settings"].items():
+            technology_settings.setdefault(name, {}).update(config or {})
+        fields["technology_settings"] = technology_settings
+    
+    return apply_settings(Settings(**{**settings.dict(), **fields}))
+
+
+async def watch_config_file(config_path: Optional[str] = None) -> None:
+    """Reload the configuration file whenever it changes.
+    
+    Checks the file every ``config_reload_interval`` seconds. Invalid changes
+    are logged and ignored until the file changes again.
+    
+    Args:
+        config_path: Path to the configuration file, defaults to config.yaml
+    """
+    from config.loader import DEFAULT_CONFIG_PATH
+    
+    path = Path(config_path or DEFAULT_CONFIG_PATH)
+    
+    def modified() -> Optional[float]:
+        try:
+            return path.stat().st_mtime
+        except OSError:
+            return None
+    
+    last_modified = modified()
+    while settings.config_reload_interval:
+        await asyncio.sleep(settings.config_reload_interval)
+        current = modified()
+        if current is None or current == last_modified:
+            continue
+        last_modified = current
+        try:
+            reload_config(str(path))
+        except ValueError as e:
+            logger.error(f"Ignoring invalid configuration change: {str(e)}")
@@ -0,0 +1,275 @@
+"""Admission control for document processing jobs.
+
+Each technology gets a concurrency limit and a bounded wait queue, configured in
+the ``technologies`` section of the configuration file:
+
+    technologies:
+      tesseract:
+        max_concurrency: 2   # jobs running at once
+        max_queue: 16        # jobs allowed to wait for a free slot
+        queue_timeout: 30    # seconds a job may wait before it is rejected
+
+Jobs over the limit wait in the queue. When the queue is full, or a job waited
+longer than the timeout, it is rejected with a CapacityExceededError carrying a
+Retry-After estimate, so throughput stays flat instead of collapsing.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+from config.settings import on_reload, settings
+
+logger = logging.getLogger(__name__)
+
+
+class CapacityExceededError(Exception):
+    """Raised when a technology cannot accept another job right now."""
+    
+    def __init__(self, technology: str, retry_after: int):
+        """Initialize the error.
+        
+        Args:
+            technology: The name of the technology
+            retry_after: Suggested number of seconds before retrying
+        """
+        super().__init__(f"Technology '{technology}' is at capacity")
+        self.technology = technology
+        self.retry_after = retry_after
+
+
+class ConcurrencyLimiter:
+    """Limits the number of concurrent jobs with a bounded, FIFO wait queue.
+    
+    Waiters are plain futures created in the running event loop, so a limiter
+    can outlive the event loop it was first used in.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: Optional[int] = None,
+        max_queue: int = 0,
+        queue_timeout: Optional[float] = None,
+    ):
+        """Initialize the limiter.
+        
+        Args:
+            name: The name of the technology being limited
+            max_concurrency: Maximum number of running jobs, None for no limit
+            max_queue: Maximum number of waiting jobs
+            queue_timeout: Maximum seconds a job may wait, None to wait forever
+        """
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        # Moving average of job durations, used for Retry-After estimates
+        self._average_duration = 1.0
+    
+    @property
+    def queue_depth(self) -> int:
+        """Get the number of jobs waiting for a slot.
+        
+        Returns:
+            int: The number of waiting jobs
+        """
+        return sum(1 for waiter in self._waiters if not waiter.done())
+    
+    def retry_after(self) -> int:
+        """Estimate how long until a new job could be accepted.
+        
+        Returns:
+            int: The estimate in whole seconds, at least 1
+        """
+        slots = self.max_concurrency or 1
+        estimate = self._average_duration * (self.queue_depth + 1) / slots
+        return max(1, math.ceil(estimate))
+    
+    def _has_free_slot(self) -> bool:
+        """Check whether a new job could start right away."""
+        return self.max_concurrency is None or self.in_flight < self.max_concurrency
+    
+    async def acquire(self) -> None:
+        """Acquire a slot, waiting in the queue if necessary.
+        
+        Raises:
+            CapacityExceededError: If the queue is full or the wait timed out
+        """
+        if self._has_free_slot() and not self.queue_depth:
+            self.in_flight += 1
+            return
+        
+        if self.queue_depth >= self.max_queue:
+            raise CapacityExceededError(self.name, self.retry_after())
+        
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait([waiter], timeout=self.queue_timeout)
+        except BaseException:
+            # Cancelled while waiting, hand back a slot granted meanwhile
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            waiter.cancel()
+            raise
+        finally:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+        
+        if not waiter.done():
+            waiter.cancel()
+            raise CapacityExceededError(self.name, self.retry_after())
+    
+    def release(self) -> None:
+        """Release a slot, handing it to the next waiting job if any."""
+        while self._waiters and self._has_free_slot_after_release():
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # The slot passes straight to the waiter
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+    
+    def resize(
+        self,
+        max_concurrency: Optional[int] = None,
+        max_queue: int = 0,
+        queue_timeout: Optional[float] = None,
+    ) -> None:
+        """Change the limits without affecting running or waiting jobs.
+        
+        Raising the concurrency starts waiting jobs right away. Lowering it lets
+        running jobs finish, new jobs only start once the running ones are
+        under the new limit. Jobs already waiting keep their place in the queue
+        and their timeout.
+        
+        Args:
+            max_concurrency: Maximum number of running jobs, None for no limit
+            max_queue: Maximum number of waiting jobs
+            queue_timeout: Maximum seconds a job may wait, None to wait forever
+        """
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        
+        while self._waiters and self._has_free_slot():
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+    
+    def _has_free_slot_after_release(self) -> bool:
+        """Check whether releasing one slot leaves room for a waiting job."""
+        return self.max_concurrency is None or self.in_flight <= self.max_concurrency
+    
+    def _record_duration(self, seconds: float) -> None:
+        """Update the moving average of job durations."""
+        self._average_duration = 0.8 * self._average_duration + 0.2 * seconds
+    
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold a slot for the duration of a job.
+        
+        Raises:
+            CapacityExceededError: If no slot could be acquired
+        """
+        await self.acquire()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._record_duration(time.monotonic() - started)
+            self.release()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get the current state of the limiter.
+        
+        Returns:
+            Dict[str, Any]: The limits, in-flight jobs and queue depth
+        """
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+        }
+
+
+class AdmissionController:
+    """Keeps one ConcurrencyLimiter per technology, built from the settings."""
+    
+    def __init__(self):
+        """Initialize the admission controller."""
+        self._limiters: Dict[str, ConcurrencyLimiter] = {}
+    
+    def limiter(self, technology: str) -> ConcurrencyLimiter:
+        """Get the limiter for a technology.
+        
+        Args:
+            technology: The name of the technology
+        
+        Returns:
+            ConcurrencyLimiter: The limiter for the technology
+        """
+        limiter = self._limiters.get(technology)
+        if limiter is None:
+            limiter = ConcurrencyLimiter(technology, **self._limits(technology))
+            self._limiters[technology] = limiter
+        return limiter
+    
+    @staticmethod
+    def _limits(technology: str) -> Dict[str, Any]:
+        """Get the configured limits of a technology.
+        
+        Args:
+            technology: The name of the technology
+        
+        Returns:
+            Dict[str, Any]: The limiter arguments
+        """
+        config = settings.technology_settings.get(technology) or {}
+        return {
+            "max_concurrency": config.get("max_concurrency"),
+            "max_queue": config.get("max_queue", 0),
+            "queue_timeout": config.get("queue_timeout"),
+        }
+    
+    def reconfigure(self) -> None:
+        """Resize every limiter to the current settings."""
+        for name, limiter in self._limiters.items():
+            limits = self._limits(name)
+            if limits != {key: getattr(limiter, key) for key in limits}:
+                limiter.resize(**limits)
+                logger.info(f"Resized admission limits of {name}: {limits}")
+    
+    def slot(self, technology: str):
+        """Hold a slot of a technology for the duration of a job.
+        
+        Args:
+            technology: The name of the technology
+        """
+        return self.limiter(technology).slot()
+    
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get the state of every limiter.
+        
+        Returns:
+            Dict[str, Dict[str, Any]]: Limiter stats by technology
+        """
+        return {name: limiter.stats() for name, limiter in self._limiters.items()}
+
+
+# Admission controller for the current process
+admission = AdmissionController()
+
+# Resize the limiters when the configuration is reloaded
+on_reload(admission.reconfigure)
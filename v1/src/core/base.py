@@ -1,7 +1,7 @@
 """Base technology abstract class."""
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Union
+from typing import Any, Dict, FrozenSet, Optional
 
 
 class BaseTechnology(ABC):
@@ -9,8 +9,70 @@ class BaseTechnology(ABC):
     
     All technology implementations must inherit from this class and implement
     the required methods.
+    
+    Instances are long-lived: the TechnologyFactory creates one instance per
+    technology, calls ``startup`` once before it serves requests and
+    ``shutdown`` when the application stops. Anything expensive (imported
+    modules, clients, loaded models) should be set up in ``startup`` and kept
+    on the instance so it stays resident between jobs.
     """
     
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """Initialize the technology.
+        
+        Args:
+            config: Technology-specific settings from the configuration file
+        """
+        self.config: Dict[str, Any] = dict(config or {})
+        self.started = False
+    
+    async def startup(self) -> None:
+        """Warm up the technology before it serves requests.
+        
+        The default implementation does nothing. Implementations override this
+        to load dependencies and acquire long-lived resources.
+        """
+        self.started = True
+    
+    async def shutdown(self) -> None:
+        """Release any resources held by the technology.
+        
+        The default implementation does nothing.
+        """
+        self.started = False
+    
+    def configure(self, config: Dict[str, Any]) -> None:
+        """Apply changed settings while the technology keeps serving requests.
+        
+        Called when the configuration is reloaded. The default implementation
+        replaces ``config``; jobs already running keep the parameters they
+        resolved when they started. Implementations holding resources sized
+        from the settings override this to resize them.
+        
+        Args:
+            config: The new technology-specific settings
+        """
+        self.config = dict(config)
+    
+    def resolve_params(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Merge request parameters with the configured defaults.
+        
+        Only keys declared in the parameter schema are taken from the
+        configuration, so tuning options never leak into ``run``.
+        
+        Args:
+            params: Parameters supplied with the request
+            
+        Returns:
+            Dict[str, Any]: The effective parameters
+        """
+        schema = self.get_param_schema()
+        resolved = {
+            key: value for key, value in self.config.items() if key in schema
+        }
+        resolved.update(params)
+        return resolved
+    
     @abstractmethod
     async def run(self, document: bytes, **params) -> Dict[str, Any]:
         """Process a document using this technology.
@@ -42,6 +104,30 @@ class BaseTechnology(ABC):
         """
         return cls.__doc__ or "No description available"
     
+    @classmethod
+    def get_supported_types(cls) -> Optional[FrozenSet[str]]:
+        """Get the document types the technology can process.
+        
+        Documents of other types (as detected by ``core.sniff``) are rejected
+        before they reach ``run``.
+        
+        Returns:
+            Optional[FrozenSet[str]]: The supported types, None for any type
+        """
+        return None
+    
+    @classmethod
+    def splits_pages(cls) -> bool:
+        """Tell whether every chunk the technology returns has its page number.
+        
+        Callers that need the text of each page, such as the cascade, can then
+        have several pages processed in one run.
+        
+        Returns:
+            bool: Whether the chunks are split by page
+        """
+        return False
+    
     @classmethod
     def get_param_schema(cls) -> Dict[str, Any]:
         """Get the parameter schema for the technology.
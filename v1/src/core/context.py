@@ -0,0 +1,326 @@
+"""Per-job context shared by the code processing a job.
+
+The context of the running job is kept in a context variable, so the router,
+the technologies and the worker threads they start all see the same JobContext
+without passing it around explicitly.
+
+A job can be given a time budget and cancelled. Technologies hand the chunks of
+every finished page to ``add_page``, so when the budget runs out the pages
+done so far are returned as a partial result, and pages restored from a
+checkpoint of an interrupted run are not processed again. Cancellation
+interrupts the job at its next ``await``: pages waiting to be rasterized,
+recognized or sent to a model are not started, while a call already running in
+a thread or an OCR worker finishes in the background and its result is dropped.
+"""
+
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import (
+    Any, Awaitable, Callable, Dict, Iterator, List, Optional, Set, TypeVar
+)
+
+from core.models import DocumentChunk
+
+T = TypeVar("T")
+
+_current_job: ContextVar[Optional["JobContext"]] = ContextVar(
+    "current_job", default=None
+)
+
+
+class JobCancelledError(Exception):
+    """Raised when a job is cancelled or runs out of time."""
+
+
+class JobContext:
+    """State of a single processing job."""
+    
+    def __init__(
+        self,
+        technology: str,
+        job_id: Optional[str] = None,
+        timeout: Optional[float] = None
+    ):
+        """Initialize the job context.
+        
+        Args:
+            technology: The name of the technology processing the job
+            job_id: The job ID, if already known
+            timeout: Time budget of the job in seconds, counted from now
+        """
+        self.technology = technology
+        self.job_id = job_id
+        self.timings: Dict[str, Dict[str, float]] = {}
+        # Threads currently working on this job, used by the profiler
+        self.threads: Set[int] = set()
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.cancel_reason: Optional[str] = None
+        # Chunks of the pages finished so far by page number, returned if time
+        # runs out
+        self.pages: Dict[int, List[DocumentChunk]] = {}
+        # Pages restored from the checkpoint of an interrupted run
+        self.resumed: Set[int] = set()
+        # Called with every finished page, to checkpoint it
+        self.on_page: Optional[Callable[[int, List[DocumentChunk]], None]] = None
+        # Bytes of decoded pages the job holds, and the most it held at once
+        self.memory = 0
+        self.peak_memory = 0
+        self._task: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+        # The job this one runs a technology for, see ``child``
+        self._parent: Optional["JobContext"] = None
+    
+    def child(self, technology: str) -> "JobContext":
+        """Get a context for a technology run on behalf of this job.
+        
+        The child shares the job's time budget, timings, threads and memory
+        accounting, and stops when the job does, but keeps the pages it
+        finishes to itself: they are not checkpointed, don't count as pages of
+        the job's partial result, and none of them are resumed.
+        
+        Args:
+            technology: The name of the technology run
+        
+        Returns:
+            JobContext: The context to run the technology in
+        """
+        child = JobContext(technology, self.job_id)
+        child.deadline = self.deadline
+        child.timings = self.timings
+        child.threads = self.threads
+        child._lock = self._lock
+        child._parent = self
+        return child
+    
+    def record(self, stage: str, seconds: float) -> None:
+        """Add the duration of a stage to the job's timings.
+        
+        A stage that runs several times, such as OCR of each page, accumulates
+        its total time and count.
+        
+        Args:
+            stage: The name of the stage
+            seconds: The duration in seconds
+        """
+        with self._lock:
+            timing = self.timings.setdefault(stage, {"seconds": 0.0, "count": 0})
+            timing["seconds"] = round(timing["seconds"] + seconds, 6)
+            timing["count"] += 1
+    
+    def allocate(self, nbytes: int) -> None:
+        """Account for memory taken by the job, such as a decoded page.
+        
+        Args:
+            nbytes: The number of bytes
+        """
+        if self._parent is not None:
+            self._parent.allocate(nbytes)
+            return
+        with self._lock:
+            self.memory += nbytes
+            self.peak_memory = max(self.peak_memory, self.memory)
+    
+    def free(self, nbytes: int) -> None:
+        """Account for memory the job no longer holds.
+        
+        Args:
+            nbytes: The number of bytes, as passed to ``allocate``
+        """
+        if self._parent is not None:
+            self._parent.free(nbytes)
+            return
+        with self._lock:
+            self.memory -= nbytes
+    
+    def remaining(self) -> Optional[float]:
+        """Get the time left in the job's budget.
+        
+        Returns:
+            Optional[float]: Seconds left, None without a time budget
+        """
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+    
+    def expired(self) -> bool:
+        """Check whether the job ran out of time."""
+        return self.deadline is not None and time.monotonic() >= self.deadline
+    
+    def check(self) -> None:
+        """Stop the job here if it was cancelled or ran out of time.
+        
+        Raises:
+            JobCancelledError: If the job should not go on
+        """
+        if self._parent is not None:
+            self._parent.check()
+        if self.cancel_reason is not None:
+            raise JobCancelledError(self.cancel_reason)
+        if self.expired():
+            raise JobCancelledError("Time budget exceeded")
+    
+    def cancel(self, reason: str) -> None:
+        """Cancel the job, interrupting it at its next ``await``.
+        
+        Must be called from the event loop running the job.
+        
+        Args:
+            reason: Why the job was cancelled
+        """
+        if self.cancel_reason is None:
+            self.cancel_reason = reason
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+    
+    @property
+    def chunks(self) -> List[DocumentChunk]:
+        """The chunks of the pages finished so far, in page order."""
+        with self._lock:
+            return [
+                chunk for number in sorted(self.pages) for chunk in self.pages[number]
+            ]
+    
+    def add_page(self, number: int, chunks: List[DocumentChunk]) -> None:
+        """Record the chunks of a finished page.
+        
+        Args:
+            number: The page number
+            chunks: The chunks of the page
+        """
+        with self._lock:
+            self.pages[number] = chunks
+        if self.on_page is not None:
+            self.on_page(number, chunks)
+    
+    def restore(self, pages: Dict[int, List[DocumentChunk]]) -> None:
+        """Restore the pages finished by an interrupted run of the job.
+        
+        Args:
+            pages: The chunks of the finished pages by page number
+        """
+        with self._lock:
+            self.pages.update(pages)
+            self.resumed.update(pages)
+    
+    def resumed_page(self, number: int) -> Optional[List[DocumentChunk]]:
+        """Get a page restored from a checkpoint.
+        
+        Args:
+            number: The page number
+        
+        Returns:
+            Optional[List[DocumentChunk]]: The chunks of the page, None if it
+                still has to be processed
+        """
+        if number not in self.resumed:
+            return None
+        return self.pages[number]
+    
+    async def run(self, work: Awaitable[T]) -> Optional[T]:
+        """Run the processing of the job within its time budget.
+        
+        Args:
+            work: The processing, e.g. the coroutine of a technology's ``run``
+        
+        Returns:
+            Optional[T]: The outcome of the processing, None if the time budget
+                ran out first, leaving the finished pages in ``pages``
+        
+        Raises:
+            JobCancelledError: If the job was cancelled
+        """
+        if self.cancel_reason is not None:
+            # Don't start the processing of a job cancelled while it waited
+            if asyncio.iscoroutine(work):
+                work.close()
+            raise JobCancelledError(self.cancel_reason)
+        
+        self._task = asyncio.ensure_future(work)
+        try:
+            done, _ = await asyncio.wait({self._task}, timeout=self.remaining())
+        except asyncio.CancelledError:
+            self._task.cancel()
+            raise
+        
+        if not done:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, JobCancelledError):
+                pass
+            return None
+        
+        try:
+            return self._task.result()
+        except asyncio.CancelledError:
+            raise JobCancelledError(self.cancel_reason or "Job cancelled") from None
+        except JobCancelledError:
+            # A stage noticed the deadline just before the wait did
+            if self.cancel_reason is None and self.expired():
+                return None
+            raise
+    
+    @contextmanager
+    def thread(self) -> Iterator[None]:
+        """Mark the current thread as working on this job."""
+        ident = threading.get_ident()
+        with self._lock:
+            self.threads.add(ident)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.threads.discard(ident)
+
+
+def current_job() -> Optional[JobContext]:
+    """Get the context of the job being processed.
+    
+    Returns:
+        Optional[JobContext]: The job context, or None outside a job
+    """
+    return _current_job.get()
+
+
+@contextmanager
+def job_context(job: JobContext) -> Iterator[JobContext]:
+    """Make a job context current for the duration of a block.
+    
+    Args:
+        job: The job context
+    """
+    token = _current_job.set(job)
+    try:
+        yield job
+    finally:
+        _current_job.reset(token)
+
+
+async def to_thread(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking function in a worker thread on behalf of the current job.
+    
+    Works like ``asyncio.to_thread``, but the worker thread is attributed to the
+    current job while it runs so that it shows up in the job's profile.
+    
+    Args:
+        func: The blocking function
+        *args: Positional arguments for the function
+        **kwargs: Keyword arguments for the function
+    
+    Returns:
+        Any: The return value of the function
+    """
+    job = current_job()
+    if job is None:
+        return await asyncio.to_thread(func, *args, **kwargs)
+    
+    def call() -> Any:
+        # Work queued for a thread is skipped once the job is stopped
+        job.check()
+        with job.thread():
+            return func(*args, **kwargs)
+    
+    return await asyncio.to_thread(call)
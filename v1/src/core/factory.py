@@ -2,9 +2,12 @@
 
 import importlib
 import logging
-from typing import Dict, Type
+from typing import Dict, FrozenSet, Iterable, List, Optional, Type
 
+from config.settings import on_reload, settings
+from core import metrics
 from core.base import BaseTechnology
+from core.startup import startup_report
 
 logger = logging.getLogger(__name__)
 
@@ -13,10 +16,16 @@ class TechnologyFactory:
     """Factory for creating technology instances.
     
     This class is responsible for loading and managing technology implementations.
-    It uses a registry pattern to keep track of available technologies.
+    It uses a registry pattern to keep track of available technologies and
+    keeps a single warm instance of each technology for the lifetime of the
+    application. Technologies can also be registered lazily by name and
+    ``module:Class`` target, in which case their module is only imported on
+    first use.
     """
     
     _registry: Dict[str, Type[BaseTechnology]] = {}
+    _lazy: Dict[str, str] = {}
+    _instances: Dict[str, BaseTechnology] = {}
     
     @classmethod
     def register(cls, technology_class: Type[BaseTechnology]) -> None:
@@ -27,45 +36,186 @@ class TechnologyFactory:
         """
         name = technology_class.get_name()
         cls._registry[name] = technology_class
+        # Drop any instance created from a previous registration
+        cls._instances.pop(name, None)
         logger.info(f"Registered technology: {name}")
     
+    @classmethod
+    def register_lazy(cls, name: str, target: str) -> None:
+        """Register a technology without importing it.
+        
+        Args:
+            name: The name of the technology
+            target: The technology class as ``module:Class``
+        """
+        cls._lazy[name] = target
+        logger.debug(f"Registered technology {name} from {target}")
+    
+    @classmethod
+    def _load(cls, name: str) -> None:
+        """Import a lazily registered technology and register its class.
+        
+        Args:
+            name: The name of the technology
+        
+        Raises:
+            KeyError: If the technology is unknown or cannot be imported
+        """
+        if name not in cls._lazy:
+            raise KeyError(f"Technology '{name}' not found")
+        
+        target = cls._lazy[name]
+        module_path, _, class_name = target.partition(":")
+        try:
+            with startup_report.step(f"import {module_path}"):
+                module = importlib.import_module(module_path)
+        except ImportError as e:
+            raise KeyError(f"Technology '{name}' could not be imported: {str(e)}")
+        
+        technology_class = getattr(module, class_name, None) if class_name else None
+        if technology_class is not None:
+            if technology_class.get_name() != name:
+                # Register under the name it was discovered with
+                cls._registry[name] = technology_class
+                cls._instances.pop(name, None)
+            elif cls._registry.get(name) is not technology_class:
+                cls.register(technology_class)
+        
+        if name not in cls._registry:
+            raise KeyError(f"Technology '{name}' not found after loading {target}")
+    
     @classmethod
     def get_technology(cls, name: str) -> BaseTechnology:
-        """Get a technology instance by name.
+        """Get the shared technology instance by name.
+        
+        The instance is created on first use and reused for every later job.
         
         Args:
             name: The name of the technology
-            
+        
         Returns:
-            BaseTechnology: An instance of the requested technology
-            
+            BaseTechnology: The instance of the requested technology
+        
         Raises:
             KeyError: If the technology is not found
         """
         if name not in cls._registry:
-            # Try to load the technology dynamically
+            cls._load(name)
+        
+        instance = cls._instances.get(name)
+        metrics.record_cache_lookup("technology_instance", instance is not None)
+        if instance is None:
+            config = settings.technology_settings.get(name) or {}
+            instance = cls._registry[name](config)
+            cls._instances[name] = instance
+        return instance
+    
+    @classmethod
+    def get_supported_types(cls, name: str) -> Optional[FrozenSet[str]]:
+        """Get the document types a technology supports, without loading it.
+        
+        Args:
+            name: The name of the technology
+        
+        Returns:
+            Optional[FrozenSet[str]]: The supported types, None for any type
+                or if the technology is not loaded yet
+        """
+        technology_class = cls._registry.get(name)
+        if technology_class is None:
+            return None
+        return technology_class.get_supported_types()
+    
+    @classmethod
+    async def startup(cls, names: Optional[Iterable[str]] = None) -> None:
+        """Create and warm up technology instances.
+        
+        A technology that fails to warm up (e.g. because an optional dependency
+        is missing) is logged and skipped so the other technologies still
+        start.
+        
+        Args:
+            names: The technologies to warm up, defaults to all registered ones
+        """
+        for name in list(names if names is not None else cls.names()):
             try:
-                module_path = f"technologies.{name}"
-                module = importlib.import_module(module_path)
-                # The module should register itself in its __init__ method
-                if name not in cls._registry:
-                    raise KeyError(f"Technology '{name}' not found after loading module")
-            except ImportError:
-                raise KeyError(f"Technology '{name}' not found")
+                instance = cls.get_technology(name)
+                if not instance.started:
+                    with startup_report.step(f"warm up {name}"):
+                        await instance.startup()
+                    logger.info(f"Warmed up technology: {name}")
+            except Exception as e:
+                logger.warning(f"Could not warm up technology {name}: {str(e)}")
+    
+    @classmethod
+    async def shutdown(cls) -> None:
+        """Shut down and discard all technology instances."""
+        instances = list(cls._instances.items())
+        cls._instances = {}
+        for name, instance in instances:
+            try:
+                await instance.shutdown()
+                logger.info(f"Shut down technology: {name}")
+            except Exception as e:
+                logger.warning(f"Error shutting down technology {name}: {str(e)}")
+    
+    @classmethod
+    def reconfigure(cls) -> None:
+        """Hand changed settings to the technology instances.
         
-        return cls._registry[name]()
+        Instances stay in place, so jobs they are running are not affected.
+        
+        Raises:
+            ValueError: If a technology rejects its new settings
+        """
+        for name, instance in list(cls._instances.items()):
+            config = settings.technology_settings.get(name) or {}
+            if config == instance.config:
+                continue
+            try:
+                instance.configure(config)
+            except Exception as e:
+                raise ValueError(f"Could not reconfigure technology {name}: {str(e)}")
+            logger.info(f"Reconfigured technology: {name}")
+    
+    @classmethod
+    def names(cls) -> List[str]:
+        """Get the names of all known technologies, loaded or not.
+        
+        Returns:
+            List[str]: The technology names
+        """
+        return list(dict.fromkeys([*cls._registry, *cls._lazy]))
     
     @classmethod
     def list_technologies(cls) -> Dict[str, Dict]:
         """List all registered technologies.
         
+        Technologies that have not been imported yet are listed without their
+        parameter schema rather than being imported.
+        
         Returns:
             Dict[str, Dict]: A dictionary of technology names and their metadata
         """
-        return {
+        technologies = {
+            name: {
+                "description": f"Not loaded yet ({target})",
+                "params": {},
+                "loaded": False
+            }
+            for name, target in cls._lazy.items()
+        }
+        technologies.update({
             name: {
                 "description": tech_class.get_description(),
-                "params": tech_class.get_param_schema()
+                "params": tech_class.get_param_schema(),
+                "document_types": sorted(tech_class.get_supported_types() or []),
+                "loaded": True
             }
             for name, tech_class in cls._registry.items()
-        }
\ No newline at end of file
+        })
+        return technologies
+
+
+# Hand changed technology settings to the instances on reload
+on_reload(TechnologyFactory.reconfigure)
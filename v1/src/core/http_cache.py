@@ -0,0 +1,247 @@
+"""Conditional requests and compression of API responses.
+
+Stored results never change, so their responses carry a strong ``ETag`` and a
+long-lived ``Cache-Control`` header, and a client polling with the ETag in
+``If-None-Match`` gets ``304 Not Modified`` without the result being read.
+
+Responses are compressed with the best encoding the client accepts: zstd or
+brotli when the optional ``zstandard`` or ``brotli`` packages are installed,
+otherwise gzip. Result responses are compressed once when the result is saved,
+see ``ResultHandler.save_result``.
+"""
+
+import gzip
+import hashlib
+from typing import Callable, Dict, List, Optional
+
+from fastapi import Response, status
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+# Compressors by encoding, most preferred first, with the level for responses
+# compressed once when saved and the one for responses compressed per request
+_COMPRESSORS: Dict[str, Callable[[bytes, int], bytes]] = {}
+_LEVELS: Dict[str, Dict[str, int]] = {}
+if zstandard is not None:
+    _COMPRESSORS["zstd"] = lambda data, level: zstandard.ZstdCompressor(
+        level=level
+    ).compress(data)
+    _LEVELS["zstd"] = {"stored": 12, "live": 3}
+if brotli is not None:
+    _COMPRESSORS["br"] = lambda data, level: brotli.compress(data, quality=level)
+    _LEVELS["br"] = {"stored": 9, "live": 4}
+_COMPRESSORS["gzip"] = lambda data, level: gzip.compress(
+    data, compresslevel=level, mtime=0
+)
+_LEVELS["gzip"] = {"stored": 9, "live": 6}
+
+# Suffix of the file holding a response compressed with an encoding
+SUFFIXES = {"zstd": ".zst", "br": ".br", "gzip": ".gz"}
+
+# Responses smaller than this are sent uncompressed
+MIN_COMPRESS_BYTES = 1024
+
+# Cache-Control of responses that may change, e.g. the status of a running job
+NO_CACHE = "no-cache"
+
+
+def encodings() -> List[str]:
+    """Get the supported content encodings, most preferred first."""
+    return list(_COMPRESSORS)
+
+
+def compress(data: bytes, encoding: str, stored: bool = False) -> bytes:
+    """Compress a response body.
+    
+    Args:
+        data: The body
+        encoding: The content encoding
+        stored: Whether the body is compressed once to be stored, which uses
+            a slower level that compresses better
+    
+    Returns:
+        bytes: The compressed body
+    
+    Raises:
+        KeyError: If the encoding is not supported
+    """
+    level = _LEVELS[encoding]["stored" if stored else "live"]
+    return _COMPRESSORS[encoding](data, level)
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """Choose the encoding of a response from the Accept-Encoding header.
+    
+    The encoding with the highest q-value wins, ties go to the preferred one.
+    
+    Args:
+        accept_encoding: The Accept-Encoding header
+    
+    Returns:
+        Optional[str]: The encoding, None to send the body uncompressed
+    """
+    if not accept_encoding:
+        return None
+    
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+    
+    best, best_weight = None, 0.0
+    for encoding in _COMPRESSORS:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def make_etag(data: bytes) -> str:
+    """Get the strong ETag of a body.
+    
+    Args:
+        data: The body
+    
+    Returns:
+        str: The quoted ETag
+    """
+    return '"' + hashlib.sha256(data).hexdigest()[:32] + '"'
+
+
+def derive_etag(etag: str, *parts: object) -> str:
+    """Get the ETag of a representation derived from another one.
+    
+    Used for parts of a result, so they are validated without being read.
+    
+    Args:
+        etag: The ETag of the whole
+        parts: What selects the representation, e.g. query parameters
+    
+    Returns:
+        str: The quoted ETag
+    """
+    return make_etag("\0".join([etag, *map(repr, parts)]).encode())
+
+
+def _encoded_etag(etag: str, encoding: Optional[str]) -> str:
+    """Get the ETag of a body sent with a content encoding."""
+    return etag if encoding is None else etag[:-1] + "-" + encoding + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check whether the If-None-Match header holds an ETag.
+    
+    The ETags of the compressed variants of a body match as well, as they only
+    differ in their encoding.
+    
+    Args:
+        if_none_match: The If-None-Match header
+        etag: The ETag of the uncompressed body
+    
+    Returns:
+        bool: Whether the client has the current body
+    """
+    if not if_none_match:
+        return False
+    
+    candidates = set()
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        candidates.add(candidate)
+    return any(
+        _encoded_etag(etag, encoding) in candidates
+        for encoding in [None, *_COMPRESSORS]
+    )
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    """Build the 304 Not Modified response of a conditional request.
+    
+    Args:
+        etag: The ETag of the uncompressed body
+        cache_control: The Cache-Control header
+    
+    Returns:
+        Response: The response
+    """
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={
+            "ETag": etag,
+            "Cache-Control": cache_control,
+            "Vary": "Accept-Encoding",
+        },
+    )
+
+
+def encoded_response(
+    body: bytes,
+    etag: str,
+    accept_encoding: Optional[str],
+    cache_control: str,
+    stored: Optional[Callable[[str], Optional[bytes]]] = None,
+    media_type: str = "application/json"
+) -> Response:
+    """Build a response compressed with the encoding the client prefers.
+    
+    Args:
+        body: The uncompressed body
+        etag: The ETag of the uncompressed body
+        accept_encoding: The Accept-Encoding header
+        cache_control: The Cache-Control header
+        stored: Gets the body compressed with an encoding when it was saved,
+            None if it was not
+        media_type: The media type of the body
+    
+    Returns:
+        Response: The response
+    """
+    encoding = negotiate(accept_encoding) if len(body) >= MIN_COMPRESS_BYTES else None
+    if encoding is not None:
+        compressed = stored(encoding) if stored is not None else None
+        body = compressed if compressed is not None else compress(body, encoding)
+    
+    headers = {
+        "ETag": _encoded_etag(etag, encoding),
+        "Cache-Control": cache_control,
+        "Vary": "Accept-Encoding"
+    }
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def precompress(data: bytes) -> Dict[str, bytes]:
+    """Compress a body to be stored with every supported encoding.
+    
+    Args:
+        data: The body
+    
+    Returns:
+        Dict[str, bytes]: The compressed bodies by encoding, empty if the body
+            is too small to be worth compressing
+    """
+    if len(data) < MIN_COMPRESS_BYTES:
+        return {}
+    return {
+        encoding: compress(data, encoding, stored=True) for encoding in _COMPRESSORS
+    }
@@ -0,0 +1,223 @@
+"""Queues handing jobs from API nodes to worker processes.
+
+API nodes running in enqueue mode store the uploaded document in the result
+store and put a reference to the job on a queue. Workers (``worker.py``) take
+jobs from the queue, process them and write the results to the same store.
+
+Two backends are available:
+
+- ``sqlite``: an embedded queue in a SQLite database in the output directory,
+  for workers on the same machine or sharing the output directory
+- ``redis``: a list in a Redis server, for workers on other machines. Requires
+  the ``redis`` package; anything speaking the Redis protocol can stand in.
+"""
+
+import logging
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from pydantic import BaseModel
+
+from config.settings import settings
+from core.models import ProcessRequest
+
+logger = logging.getLogger(__name__)
+
+
+class QueuedJob(BaseModel):
+    """A job waiting for a worker."""
+    job_id: str
+    request: ProcessRequest
+    profile: bool = False
+
+
+class JobQueue(ABC):
+    """Base class for job queue backends."""
+    
+    @abstractmethod
+    def put(self, job: QueuedJob) -> None:
+        """Add a job to the queue.
+        
+        Args:
+            job: The job
+        """
+        pass
+    
+    @abstractmethod
+    def get(self, timeout: float = 1.0) -> Optional[QueuedJob]:
+        """Take the next job from the queue.
+        
+        Args:
+            timeout: Seconds to wait for a job
+        
+        Returns:
+            Optional[QueuedJob]: The job, or None if none arrived in time
+        """
+        pass
+    
+    def close(self) -> None:
+        """Release the resources held by the queue."""
+        pass
+
+
+class SQLiteQueue(JobQueue):
+    """Queue in a SQLite database, shared by every process using the same file."""
+    
+    def __init__(self, path: Optional[str] = None, poll_interval: float = 0.2):
+        """Initialize the queue.
+        
+        Args:
+            path: Path of the database, defaults to queue.db in the output directory
+            poll_interval: Seconds between checks for new jobs while waiting
+        """
+        if path is None:
+            path = str(Path(settings.output_directory) / "queue.db")
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.poll_interval = poll_interval
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS queue ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "payload TEXT NOT NULL)"
+            )
+    
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection in autocommit mode."""
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield connection
+        finally:
+            connection.close()
+    
+    def put(self, job: QueuedJob) -> None:
+        """Add a job to the queue.
+        
+        Args:
+            job: The job
+        """
+        with self._connect() as connection:
+            connection.execute("INSERT INTO queue (payload) VALUES (?)", (job.json(),))
+    
+    def _claim(self) -> Optional[QueuedJob]:
+        """Remove the oldest job from the queue and return it, if any."""
+        with self._connect() as connection:
+            # Take the write lock first, so two workers never claim the same job
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = connection.execute(
+                    "SELECT id, payload FROM queue ORDER BY id LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    connection.execute("DELETE FROM queue WHERE id = ?", (row[0],))
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+        return QueuedJob.parse_raw(row[1]) if row is not None else None
+    
+    def get(self, timeout: float = 1.0) -> Optional[QueuedJob]:
+        """Take the next job from the queue.
+        
+        Args:
+            timeout: Seconds to wait for a job
+        
+        Returns:
+            Optional[QueuedJob]: The job, or None if none arrived in time
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self._claim()
+            if job is not None or time.monotonic() >= deadline:
+                return job
+            time.sleep(min(self.poll_interval, max(0.0, deadline - time.monotonic())))
+
+
+class RedisQueue(JobQueue):
+    """Queue in a Redis list, shared by workers on any machine."""
+    
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        key: str = "document_reader:jobs",
+        client: Any = None
+    ):
+        """Initialize the queue.
+        
+        Args:
+            url: URL of the Redis server, e.g. redis://broker:6379/0
+            key: Name of the list holding the jobs
+            client: A Redis client to use instead of connecting to ``url``
+        """
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise RuntimeError(
+                    "The redis queue backend requires the redis package"
+                ) from e
+            client = redis.Redis.from_url(url or "redis://localhost:6379/0")
+        self.client = client
+        self.key = key
+    
+    def put(self, job: QueuedJob) -> None:
+        """Add a job to the queue.
+        
+        Args:
+            job: The job
+        """
+        self.client.lpush(self.key, job.json())
+    
+    def get(self, timeout: float = 1.0) -> Optional[QueuedJob]:
+        """Take the next job from the queue.
+        
+        Args:
+            timeout: Seconds to wait for a job
+        
+        Returns:
+            Optional[QueuedJob]: The job, or None if none arrived in time
+        """
+        # BRPOP blocks for whole seconds, 0 would block forever
+        item = self.client.brpop(self.key, timeout=max(1, int(round(timeout))))
+        if item is None:
+            return None
+        return QueuedJob.parse_raw(item[1])
+    
+    def close(self) -> None:
+        """Close the connection to the server."""
+        self.client.close()
+
+
+# Queue backends by name, as used in the ``queue`` section of config.yaml
+QUEUE_BACKENDS: Dict[str, Callable[..., JobQueue]] = {
+    "sqlite": lambda url: SQLiteQueue(url),
+    "redis": lambda url: RedisQueue(url),
+}
+
+
+def create_queue(backend: Optional[str] = None, url: Optional[str] = None) -> JobQueue:
+    """Create the configured job queue.
+    
+    Args:
+        backend: Name of the backend, defaults to the configured one
+        url: Location of the queue, defaults to the configured one
+    
+    Returns:
+        JobQueue: The job queue
+    
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    backend = backend or settings.queue_backend
+    if backend not in QUEUE_BACKENDS:
+        raise ValueError(
+            f"Unknown queue backend {backend!r}, expected one of "
+            f"{', '.join(QUEUE_BACKENDS)}"
+        )
+    return QUEUE_BACKENDS[backend](url or settings.queue_url)
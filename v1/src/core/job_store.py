@@ -0,0 +1,224 @@
+"""Job state shared by all worker processes.
+
+Job states are kept in a SQLite database next to the results, so a job submitted
+to one worker process can be polled from any other. SQLite's write-ahead log
+lets many processes read while one writes.
+"""
+
+import logging
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Job statuses
+QUEUED = "queued"
+PROCESSING = "processing"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    technology TEXT NOT NULL,
+    filename TEXT,
+    status TEXT NOT NULL,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    resumes INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+# Columns added since the first version of the schema
+_MIGRATIONS = {
+    "resumes": "ALTER TABLE jobs ADD COLUMN resumes INTEGER NOT NULL DEFAULT 0",
+}
+
+
+class JobStore:
+    """SQLite-backed store of job states, safe to use from several processes."""
+    
+    def __init__(self, path: Optional[Path] = None):
+        """Initialize the job store.
+        
+        Args:
+            path: Path of the database, defaults to jobs.db in the output directory
+        """
+        if path is None:
+            path = Path(settings.output_directory) / "jobs.db"
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(_SCHEMA)
+            columns = {
+                row["name"] for row in connection.execute("PRAGMA table_info(jobs)")
+            }
+            for column, statement in _MIGRATIONS.items():
+                if column not in columns:
+                    connection.execute(statement)
+    
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection and commit when the block succeeds."""
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.row_factory = sqlite3.Row
+        try:
+            yield connection
+            connection.commit()
+        finally:
+            connection.close()
+    
+    def create(
+        self,
+        job_id: str,
+        technology: str,
+        filename: Optional[str] = None,
+        status: str = PROCESSING
+    ) -> None:
+        """Record a new job.
+        
+        Args:
+            job_id: The job ID
+            technology: The technology processing the job
+            filename: The name of the uploaded file
+            status: The initial status
+        """
+        now = time.time()
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT INTO jobs (job_id, technology, filename, status, "
+                "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, technology, filename, status, now, now)
+            )
+    
+    def update(self, job_id: str, status: str, error: Optional[str] = None) -> None:
+        """Update the status of a job.
+        
+        Args:
+            job_id: The job ID
+            status: The new status
+            error: The error message of a failed job
+        """
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? "
+                "WHERE job_id = ?",
+                (status, error, time.time(), job_id)
+            )
+    
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job.
+        
+        Args:
+            job_id: The job ID
+        
+        Returns:
+            Optional[Dict[str, Any]]: The job, or None if not found
+        """
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT * FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return dict(row) if row is not None else None
+    
+    def cancel(self, job_id: str) -> bool:
+        """Ask for a queued or running job to be cancelled.
+        
+        The process running the job notices the status change and stops it.
+        
+        Args:
+            job_id: The job ID
+        
+        Returns:
+            bool: Whether the job was still queued or running
+        """
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? "
+                "WHERE job_id = ? AND status IN (?, ?)",
+                (
+                    CANCELLED,
+                    "Cancelled by request",
+                    time.time(),
+                    job_id,
+                    QUEUED,
+                    PROCESSING,
+                ),
+            )
+        return cursor.rowcount > 0
+    
+    def heartbeat(self, job_id: str) -> None:
+        """Record that a running job is still being processed.
+        
+        Args:
+            job_id: The job ID
+        """
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE jobs SET updated_at = ? WHERE job_id = ? AND status = ?",
+                (time.time(), job_id, PROCESSING)
+            )
+    
+    def stale_jobs(self, before: float) -> List[str]:
+        """Find running jobs that stopped sending heartbeats.
+        
+        Args:
+            before: Jobs without a heartbeat since this time are stale
+        
+        Returns:
+            List[str]: The IDs of the stale jobs
+        """
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT job_id FROM jobs WHERE status = ? AND updated_at < ?",
+                (PROCESSING, before)
+            ).fetchall()
+        return [row["job_id"] for row in rows]
+    
+    def resume(self, job_id: str, before: float) -> bool:
+        """Claim a stale job to queue it again, counting the resume.
+        
+        Only one of several processes looking for stale jobs claims each one.
+        
+        Args:
+            job_id: The job ID
+            before: The job must not have sent a heartbeat since this time
+        
+        Returns:
+            bool: Whether the job was claimed
+        """
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET status = ?, resumes = resumes + 1, updated_at = ? "
+                "WHERE job_id = ? AND status = ? AND updated_at < ?",
+                (QUEUED, time.time(), job_id, PROCESSING, before)
+            )
+        return cursor.rowcount > 0
+
+
+# Stores opened so far, by database path
+_stores: Dict[Path, JobStore] = {}
+
+
+def get_job_store() -> JobStore:
+    """Get the job store in the configured output directory.
+    
+    The store is opened, and its schema checked, once per database rather than
+    for every request.
+    
+    Returns:
+        JobStore: The job store
+    """
+    path = Path(settings.output_directory) / "jobs.db"
+    store = _stores.get(path)
+    if store is None:
+        store = _stores.setdefault(path, JobStore(path))
+    return store
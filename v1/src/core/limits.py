@@ -0,0 +1,245 @@
+"""Page and pixel budgets for decoding documents.
+
+A small upload can decode into gigabytes: a PDF with a poster-sized page, or
+an image whose header promises billions of pixels (a "decompression bomb").
+Pages are checked against the budgets before they are decoded, from the page
+size in the PDF or the image header, and are rasterized at a lower resolution
+when they exceed the pixel budget, or rejected when that is not possible.
+Pages large enough to be recognized in tiles are only held to the decode
+budget, as tiling keeps the cost of recognizing them in check.
+"""
+
+import math
+from typing import Any, Dict, Optional, Set, Tuple
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - depends on the environment
+    Image = None
+
+# Resolution PDF pages are rasterized at, the default of pdf2image
+DEFAULT_DPI = 200
+
+# Lowest resolution a large PDF page is rasterized at, larger pages are rejected
+MIN_DPI = 72
+
+# Default pixels per decoded page, e.g. a 25 x 25 inch page at 200 DPI
+DEFAULT_MAX_PAGE_PIXELS = 25_000_000
+
+# Default pixels an image may have to be decoded in full before downscaling
+DEFAULT_MAX_DECODE_PIXELS = 100_000_000
+
+# Width and height of a PDF page in points
+PageSize = Tuple[float, float]
+
+
+class DocumentTooLargeError(ValueError):
+    """Raised when a document exceeds the page or pixel budget."""
+
+
+def image_bytes(image: Any) -> int:
+    """Get the memory taken by the pixels of a decoded image.
+    
+    Args:
+        image: The image
+    
+    Returns:
+        int: The size of its pixel data in bytes
+    """
+    width, height = image.size
+    return width * height * len(image.getbands())
+
+
+def allow_decoding(pixels: Optional[int]) -> None:
+    """Let Pillow open images of up to a number of pixels.
+    
+    Pillow refuses to open images far above its decompression bomb limit, which
+    would keep pages within a larger decode budget from being tiled. The limit
+    is process-wide, so it is only ever raised here, to the most generous
+    budget of any technology, and never turned off. The budget itself is still
+    checked for every image before it is decoded.
+    
+    Args:
+        pixels: Pixels of the largest image to decode, None to keep the limit
+    """
+    if Image is None or not pixels or Image.MAX_IMAGE_PIXELS is None:
+        return
+    if pixels > Image.MAX_IMAGE_PIXELS:
+        Image.MAX_IMAGE_PIXELS = pixels
+
+
+class PixelBudget:
+    """The page and pixel budgets of a job, and the pages it downscaled."""
+    
+    def __init__(
+        self,
+        max_pages: Optional[int] = None,
+        max_page_pixels: Optional[int] = DEFAULT_MAX_PAGE_PIXELS,
+        max_decode_pixels: Optional[int] = DEFAULT_MAX_DECODE_PIXELS,
+        min_dpi: int = MIN_DPI,
+        tile_pixels: Optional[int] = None
+    ):
+        """Initialize the budget.
+        
+        Args:
+            max_pages: Pages a job may process, None for any number
+            max_page_pixels: Pixels of a decoded page, larger pages are
+                downscaled, None for any size
+            max_decode_pixels: Pixels of an image that has to be decoded in
+                full to be downscaled, larger images are rejected
+            min_dpi: Lowest resolution a PDF page is downscaled to
+            tile_pixels: Pixels above which a page is recognized in tiles,
+                such pages are only downscaled to ``max_decode_pixels``, None
+                if pages are never tiled
+        """
+        self.max_pages = max_pages
+        self.max_page_pixels = max_page_pixels
+        self.max_decode_pixels = max_decode_pixels
+        self.min_dpi = min_dpi
+        self.tile_pixels = tile_pixels
+        # Numbers of the pages decoded at a lower resolution
+        self.downscaled: Set[int] = set()
+    
+    @classmethod
+    def from_config(
+        cls, config: Dict[str, Any], tile_pixels: Optional[int] = None
+    ) -> "PixelBudget":
+        """Create the budget from technology settings.
+        
+        Args:
+            config: The settings, with optional ``max_pages``,
+                ``max_page_pixels``, ``max_decode_pixels`` and ``min_dpi``
+            tile_pixels: Pixels above which the technology tiles a page, None
+                if it never does
+        
+        Returns:
+            PixelBudget: The budget
+        """
+        return cls(
+            max_pages=config.get("max_pages"),
+            max_page_pixels=config.get("max_page_pixels", DEFAULT_MAX_PAGE_PIXELS),
+            max_decode_pixels=config.get(
+                "max_decode_pixels", DEFAULT_MAX_DECODE_PIXELS
+            ),
+            min_dpi=config.get("min_dpi") or MIN_DPI,
+            tile_pixels=tile_pixels
+        )
+    
+    def page_limit(self, pixels: float) -> Optional[int]:
+        """Get the most pixels a page is decoded with.
+        
+        Args:
+            pixels: The pixels of the page at full resolution
+        
+        Returns:
+            Optional[int]: The pixel budget of the page, None for any size
+        """
+        if self.tile_pixels and pixels > self.tile_pixels:
+            return self.max_decode_pixels
+        return self.max_page_pixels
+    
+    def check_pages(self, count: int) -> None:
+        """Check the number of pages of a job.
+        
+        Args:
+            count: The number of pages to process
+        
+        Raises:
+            DocumentTooLargeError: If there are too many pages
+        """
+        if self.max_pages is not None and count > self.max_pages:
+            raise DocumentTooLargeError(
+                f"Document has {count} pages to process, the limit is {self.max_pages}"
+            )
+    
+    def pdf_dpi(
+        self, number: int, size: Optional[PageSize], dpi: int = DEFAULT_DPI
+    ) -> int:
+        """Get the resolution to rasterize a PDF page at.
+        
+        Args:
+            number: The page number
+            size: The page size in points, None if unknown
+            dpi: The resolution wanted
+        
+        Returns:
+            int: The resolution keeping the page within the pixel budget
+        
+        Raises:
+            DocumentTooLargeError: If the page is too large even at ``min_dpi``
+        """
+        if size is None:
+            return dpi
+        width, height = size
+        pixels = (width / 72 * dpi) * (height / 72 * dpi)
+        limit = self.page_limit(pixels)
+        if not limit or pixels <= limit:
+            return dpi
+        
+        fitting = int(dpi * math.sqrt(limit / pixels))
+        if fitting < self.min_dpi:
+            raise DocumentTooLargeError(
+                f"Page {number} is too large to decode ({width:.0f} x {height:.0f} pt)"
+            )
+        self.downscaled.add(number)
+        return fitting
+    
+    def load(self, image: Any, number: int = 1) -> Any:
+        """Decode an opened image within the pixel budget.
+        
+        The size is known from the header once the image is opened. A JPEG
+        larger than the budget is decoded at a reduced scale right away, other
+        images are decoded in full and downscaled, unless they exceed
+        ``max_decode_pixels``.
+        
+        Args:
+            image: The image, opened but not loaded yet
+            number: The page number of the image
+        
+        Returns:
+            Any: The decoded image
+        
+        Raises:
+            DocumentTooLargeError: If the image is too large to decode
+        """
+        pixels = image.width * image.height
+        limit = self.page_limit(pixels)
+        if limit and pixels > limit:
+            if image.format == "JPEG":
+                scale = math.sqrt(limit / pixels)
+                image.draft(
+                    image.mode, (int(image.width * scale), int(image.height * scale))
+                )
+                self.downscaled.add(number)
+            if (
+                self.max_decode_pixels
+                and image.width * image.height > self.max_decode_pixels
+            ):
+                raise DocumentTooLargeError(
+                    f"Image is too large to decode "
+                    f"({image.width} x {image.height} pixels)"
+                )
+        
+        image.load()
+        return self.fit(image, number)
+    
+    def fit(self, image: Any, number: int = 1) -> Any:
+        """Downscale a decoded image to the pixel budget.
+        
+        Args:
+            image: The image
+            number: The page number of the image
+        
+        Returns:
+            Any: The image, or a smaller copy of it
+        """
+        pixels = image.width * image.height
+        limit = self.page_limit(pixels)
+        if not limit or pixels <= limit:
+            return image
+        scale = math.sqrt(limit / pixels)
+        self.downscaled.add(number)
+        return image.resize(
+            (max(1, int(image.width * scale)), max(1, int(image.height * scale))),
+            Image.LANCZOS
+        )
@@ -0,0 +1,429 @@
+"""Application metrics in the Prometheus text exposition format.
+
+A small, dependency-free implementation of counters, gauges and histograms. The
+metrics are kept per process and rendered by the ``/metrics`` endpoint.
+"""
+
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from core.context import current_job
+
+LabelValues = Tuple[str, ...]
+
+# Latency buckets in seconds, from a fast page up to a long LLM call
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0,
+)
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value."""
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """Format label names and values as ``{name="value",...}``."""
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n")
+        escaped = escaped.replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Metric:
+    """Base class for metrics with a fixed set of label names."""
+    
+    type_name = "untyped"
+    
+    def __init__(self, name: str, description: str, labels: Sequence[str] = ()):
+        """Initialize the metric.
+        
+        Args:
+            name: The metric name
+            description: The help text
+            labels: The label names
+        """
+        self.name = name
+        self.description = description
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+    
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        """Get the label values in the order of the label names."""
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+    
+    def samples(self) -> List[Tuple[str, str, float]]:
+        """Get the samples of the metric.
+        
+        Returns:
+            List[Tuple[str, str, float]]: Sample name, labels and value
+        """
+        raise NotImplementedError
+    
+    def render(self) -> str:
+        """Render the metric in the text exposition format.
+        
+        Returns:
+            str: The rendered metric
+        """
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        for sample_name, labels, value in self.samples():
+            lines.append(f"{sample_name}{labels} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """A value that only goes up."""
+    
+    type_name = "counter"
+    
+    def __init__(self, name: str, description: str, labels: Sequence[str] = ()):
+        """Initialize the counter."""
+        super().__init__(name, description, labels)
+        self._values: Dict[LabelValues, float] = {}
+    
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """Increment the counter.
+        
+        Args:
+            amount: The amount to add
+            **labels: The label values
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def value(self, **labels: str) -> float:
+        """Get the current value.
+        
+        Args:
+            **labels: The label values
+        
+        Returns:
+            float: The value
+        """
+        return self._values.get(self._key(labels), 0)
+    
+    def samples(self) -> List[Tuple[str, str, float]]:
+        """Get the samples of the counter."""
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            (self.name, _format_labels(self.label_names, key), value)
+            for key, value in items
+        ]
+
+
+class Gauge(Metric):
+    """A value that can go up and down, optionally read from a callback."""
+    
+    type_name = "gauge"
+    
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: Sequence[str] = (),
+        callback: Optional[Callable[[], Dict[LabelValues, float]]] = None,
+    ):
+        """Initialize the gauge.
+        
+        Args:
+            name: The metric name
+            description: The help text
+            labels: The label names
+            callback: Returns the current values by label values at render time
+        """
+        super().__init__(name, description, labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._callback = callback
+    
+    def set(self, value: float, **labels: str) -> None:
+        """Set the gauge.
+        
+        Args:
+            value: The new value
+            **labels: The label values
+        """
+        with self._lock:
+            self._values[self._key(labels)] = value
+    
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """Increment the gauge.
+        
+        Args:
+            amount: The amount to add, negative to decrement
+            **labels: The label values
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        """Decrement the gauge.
+        
+        Args:
+            amount: The amount to subtract
+            **labels: The label values
+        """
+        self.inc(-amount, **labels)
+    
+    def samples(self) -> List[Tuple[str, str, float]]:
+        """Get the samples of the gauge."""
+        with self._lock:
+            values = dict(self._values)
+        if self._callback is not None:
+            values.update(self._callback())
+        return [
+            (self.name, _format_labels(self.label_names, key), value)
+            for key, value in sorted(values.items())
+        ]
+
+
+class Histogram(Metric):
+    """Counts observations in cumulative buckets."""
+    
+    type_name = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        """Initialize the histogram.
+        
+        Args:
+            name: The metric name
+            description: The help text
+            labels: The label names
+            buckets: The upper bounds of the buckets
+        """
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # Per label values: bucket counts, sum and count
+        self._values: Dict[LabelValues, Tuple[List[int], float, int]] = {}
+    
+    def observe(self, value: float, **labels: str) -> None:
+        """Record an observation.
+        
+        Args:
+            value: The observed value
+            **labels: The label values
+        """
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(
+                key, ([0] * len(self.buckets), 0.0, 0)
+            )
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value, count + 1)
+    
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the duration of a block in seconds.
+        
+        Args:
+            **labels: The label values
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+    
+    def count(self, **labels: str) -> int:
+        """Get the number of observations.
+        
+        Args:
+            **labels: The label values
+        
+        Returns:
+            int: The number of observations
+        """
+        values = self._values.get(self._key(labels))
+        return values[2] if values else 0
+    
+    def samples(self) -> List[Tuple[str, str, float]]:
+        """Get the samples of the histogram."""
+        with self._lock:
+            items = sorted(
+                (key, (list(counts), total, count))
+                for key, (counts, total, count) in self._values.items()
+            )
+        samples = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(
+                    self.label_names + ("le",), key + (_format_value(bound),)
+                )
+                samples.append((f"{self.name}_bucket", labels, cumulative))
+            labels = _format_labels(self.label_names, key)
+            samples.append((f"{self.name}_sum", labels, total))
+            samples.append((f"{self.name}_count", labels, count))
+        return samples
+
+
+class MetricsRegistry:
+    """Holds the metrics of the application and renders them."""
+    
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._metrics: Dict[str, Metric] = {}
+    
+    def register(self, metric: Metric) -> Metric:
+        """Register a metric.
+        
+        Args:
+            metric: The metric to register
+        
+        Returns:
+            Metric: The registered metric
+        """
+        self._metrics[metric.name] = metric
+        return metric
+    
+    def render(self) -> str:
+        """Render all metrics in the text exposition format.
+        
+        Returns:
+            str: The rendered metrics
+        """
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+def _admission_values(field: str) -> Dict[LabelValues, float]:
+    """Read a field of every admission limiter for a callback gauge."""
+    from core.admission import admission
+    
+    return {
+        (technology,): stats[field]
+        for technology, stats in admission.stats().items()
+    }
+
+
+registry = MetricsRegistry()
+
+requests_total = registry.register(Counter(
+    "document_reader_requests_total",
+    "Processing requests by technology and outcome",
+    ["technology", "outcome"],
+))
+stage_duration = registry.register(Histogram(
+    "document_reader_stage_duration_seconds",
+    "Duration of each processing stage",
+    ["technology", "stage"],
+))
+bytes_processed = registry.register(Counter(
+    "document_reader_bytes_processed_total",
+    "Bytes of uploaded documents processed",
+    ["technology"],
+))
+pages_processed = registry.register(Counter(
+    "document_reader_pages_processed_total",
+    "Pages processed",
+    ["technology"],
+))
+in_flight_jobs = registry.register(Gauge(
+    "document_reader_in_flight_jobs",
+    "Jobs currently running",
+    ["technology"],
+    callback=lambda: _admission_values("in_flight"),
+))
+queue_depth = registry.register(Gauge(
+    "document_reader_queue_depth",
+    "Jobs waiting for a free slot",
+    ["technology"],
+    callback=lambda: _admission_values("queue_depth"),
+))
+event_loop_lag = registry.register(Histogram(
+    "document_reader_event_loop_lag_seconds",
+    "How late the event loop wakes up a sleeping task, high when calls block it",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+))
+ocr_workers_recycled = registry.register(Counter(
+    "document_reader_ocr_workers_recycled_total",
+    "OCR worker processes replaced, by reason (pages, memory or died)",
+    ["reason"],
+))
+cascade_pages = registry.register(Counter(
+    "document_reader_cascade_pages_total",
+    "Pages finished by the cascade technology, by the tier that produced them",
+    ["tier"],
+))
+cache_requests = registry.register(Counter(
+    "document_reader_cache_requests_total",
+    "Cache lookups by cache and result (hit or miss)",
+    ["cache", "result"],
+))
+
+
+@contextmanager
+def stage(technology: str, name: str) -> Iterator[None]:
+    """Time a processing stage.
+    
+    Stages are ``upload_read``, ``decode``, ``rasterize``, ``ocr_page``,
+    ``llm_call`` and ``persist``. The duration is observed in the stage
+    histogram and added to the timings of the current job, if any.
+    
+    Args:
+        technology: The name of the technology
+        name: The name of the stage
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        stage_duration.observe(elapsed, technology=technology, stage=name)
+        job = current_job()
+        if job is not None:
+            job.record(name, elapsed)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """Record a cache hit or miss.
+    
+    Args:
+        cache: The name of the cache
+        hit: Whether the lookup was a hit
+    """
+    cache_requests.inc(cache=cache, result="hit" if hit else "miss")
+
+
+async def monitor_event_loop(interval: float = 0.1) -> None:
+    """Measure event loop lag until cancelled.
+    
+    The task sleeps for ``interval`` and records how much later than that it
+    woke up. Anything blocking the event loop, such as a synchronous call in a
+    request handler, shows up as lag.
+    
+    Args:
+        interval: Time between measurements in seconds
+    """
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag = time.perf_counter() - started - interval
+        event_loop_lag.observe(max(lag, 0.0))
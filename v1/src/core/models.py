@@ -12,6 +12,15 @@ class ProcessRequest(BaseModel):
     technology: str
     params: str = "{}"
     filename: str
+    # Time budget in seconds, after which the pages done so far are returned
+    timeout: Optional[float] = None
+    
+    @validator("timeout")
+    def check_timeout(cls, value: Optional[float]) -> Optional[float]:
+        """Check that the time budget is positive."""
+        if value is not None and value <= 0:
+            raise ValueError("must be positive")
+        return value
     
     @property
     def params_dict(self) -> Dict[str, Any]:
@@ -31,6 +40,13 @@ class ProcessResponse(BaseModel):
     status: str
 
 
+class JobStatus(BaseModel):
+    """Response model for a job without a result yet."""
+    job_id: str
+    status: str
+    error: Optional[str] = None
+
+
 class DocumentChunk(BaseModel):
     """Model for a chunk of document content."""
     text: str
@@ -81,8 +97,36 @@ class ProcessingResult(BaseModel):
         return [chunk.dict() for chunk in self.data]
 
 
+class ResultPagination(BaseModel):
+    """The part of a result returned by a paginated read."""
+    offset: int
+    limit: Optional[int] = None
+    pages: Optional[List[str]] = None
+    total_chunks: int
+
+
 class ResultResponse(BaseModel):
     """Response model for result retrieval."""
     job_id: str
     result: ProcessingResult
-    status: str = "completed"
\ No newline at end of file
+    status: str = "completed"
+    pagination: Optional[ResultPagination] = None
+
+
+class SearchHit(BaseModel):
+    """A page matching a search."""
+    job_id: str
+    page: Optional[int] = None
+    technology: str
+    filename: Optional[str] = None
+    snippet: str
+    score: float
+
+
+class SearchResponse(BaseModel):
+    """Response model for a search of the stored results."""
+    query: str
+    total: int
+    offset: int
+    limit: int
+    hits: List[SearchHit]
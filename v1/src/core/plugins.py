@@ -0,0 +1,71 @@
+"""Discovery of technology plugins.
+
+Technologies are discovered from three sources, without importing them:
+
+* the built-in technologies listed in the ``technologies`` package,
+* installed packages exposing the ``document_reader.technologies`` entry point
+  group,
+* the ``plugins`` section of the configuration file.
+
+Each source yields a name and a ``module:Class`` target. The module is only
+imported when the technology is first used or warmed up.
+"""
+
+import logging
+from importlib import metadata
+from typing import Dict, Optional
+
+from config.settings import settings
+from core.factory import TechnologyFactory
+from core.startup import startup_report
+
+logger = logging.getLogger(__name__)
+
+# Entry point group that third-party packages use to provide technologies
+ENTRY_POINT_GROUP = "document_reader.technologies"
+
+
+def _entry_point_targets() -> Dict[str, str]:
+    """Get the technologies provided through entry points.
+    
+    Returns:
+        Dict[str, str]: Technology names mapped to their targets
+    """
+    try:
+        entry_points = metadata.entry_points()
+        if hasattr(entry_points, "select"):
+            group = entry_points.select(group=ENTRY_POINT_GROUP)
+        else:  # Python < 3.10
+            group = entry_points.get(ENTRY_POINT_GROUP, [])
+    except Exception as e:
+        logger.warning(f"Could not read technology entry points: {str(e)}")
+        return {}
+    
+    return {entry_point.name: entry_point.value for entry_point in group}
+
+
+def discover_technologies(extra: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Discover the available technologies and register them lazily.
+    
+    Later sources override earlier ones, so a configured plugin can replace a
+    built-in technology of the same name.
+    
+    Args:
+        extra: Additional technology names mapped to ``module:Class`` targets
+    
+    Returns:
+        Dict[str, str]: The registered technology names and targets
+    """
+    from technologies import BUILTIN_TECHNOLOGIES
+    
+    with startup_report.step("discover technology plugins"):
+        targets: Dict[str, str] = dict(BUILTIN_TECHNOLOGIES)
+        targets.update(_entry_point_targets())
+        targets.update(settings.plugins)
+        targets.update(extra or {})
+    
+    for name, target in targets.items():
+        with startup_report.step(f"register {name}"):
+            TechnologyFactory.register_lazy(name, target)
+    
+    return targets
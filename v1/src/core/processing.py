@@ -0,0 +1,306 @@
+"""Running a job, shared by the API and the standalone workers."""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Awaitable, Callable, List, Optional, Set
+
+from core import metrics
+from core.admission import admission
+from core.context import JobCancelledError, JobContext, job_context
+from core.factory import TechnologyFactory
+from core.job_queue import JobQueue, QueuedJob
+from core.job_store import (
+    CANCELLED, COMPLETED, FAILED, PROCESSING, JobStore, get_job_store
+)
+from core.models import DocumentChunk, ProcessingResult, ProcessRequest
+from core.profiling import SamplingProfiler
+from core.result_handler import JOB_FILE, ResultHandler
+from core.sniff import check_supported, sniff
+
+logger = logging.getLogger(__name__)
+
+# Collapsed stacks of a profiled job, saved next to its result
+PROFILE_FILE = "profile.folded"
+
+# Seconds between checks whether a running job was cancelled
+CANCEL_POLL_INTERVAL = 0.5
+
+# Seconds between heartbeats of a running job
+HEARTBEAT_INTERVAL = 10.0
+
+# Seconds without a heartbeat after which a running job is considered
+# interrupted, e.g. because its worker crashed
+STALE_AFTER = 60.0
+
+
+def _save_profile(
+    result_handler: ResultHandler, job_id: str, profiler: SamplingProfiler
+) -> None:
+    """Save the profile of a job next to its result.
+    
+    Args:
+        result_handler: The result handler that saved the result
+        job_id: The job ID
+        profiler: The profiler that sampled the job
+    """
+    result_handler.save_artifact(job_id, PROFILE_FILE, profiler.collapsed())
+    result_handler.save_artifact(
+        job_id, "profile.json", json.dumps(profiler.summary(), indent=2)
+    )
+
+
+async def _watch_job(
+    job: JobContext,
+    job_store: JobStore,
+    disconnected: Optional[Callable[[], Awaitable[bool]]]
+) -> None:
+    """Send heartbeats for a running job and cancel it when asked to.
+    
+    The job is cancelled when it is cancelled in the job store or its client
+    leaves.
+    
+    Args:
+        job: The running job
+        job_store: The job store
+        disconnected: Tells whether the client that waits for the job is gone
+    """
+    last_heartbeat = time.monotonic()
+    while True:
+        await asyncio.sleep(CANCEL_POLL_INTERVAL)
+        if time.monotonic() - last_heartbeat >= HEARTBEAT_INTERVAL:
+            await asyncio.to_thread(job_store.heartbeat, job.job_id)
+            last_heartbeat = time.monotonic()
+        if disconnected is not None and await disconnected():
+            job.cancel("Client disconnected")
+            return
+        record = await asyncio.to_thread(job_store.get, job.job_id)
+        if record is not None and record["status"] == CANCELLED:
+            job.cancel("Cancelled by request")
+            return
+
+
+def _partial_result(job: JobContext) -> ProcessingResult:
+    """Build the result of a job that ran out of time from its finished pages.
+    
+    Args:
+        job: The job
+    
+    Returns:
+        ProcessingResult: The chunks of the pages finished in time
+    """
+    return ProcessingResult(
+        data=job.chunks,
+        technology_used=job.technology,
+        metadata={"num_pages": len(job.pages), "partial": True}
+    )
+
+
+async def execute_job(
+    request: ProcessRequest,
+    job_id: str,
+    read_document: Callable[[], Awaitable[bytes]],
+    profile: bool = False,
+    disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+    checkpoint: bool = False
+) -> str:
+    """Process a document and save the result.
+    
+    The job waits for a free slot of its technology before the document is
+    read, records the time spent in each stage in the ``timings`` of the result
+    metadata and is marked completed in the job store once the result is saved.
+    
+    With a ``timeout`` in the request, the pages finished when the time budget
+    runs out (counted from the call, including the wait for a slot) are saved
+    as the result, marked ``partial`` in its metadata. A job cancelled in the
+    job store or whose client disconnects is stopped and marked cancelled.
+    
+    With ``checkpoint``, for queued jobs a worker can resume, finished pages
+    are checkpointed next to the result as they complete. A job resumed after
+    an interrupted run (see ``recover_interrupted_jobs``) skips the pages in
+    its checkpoint, and its result metadata records the number of ``resumes``
+    and ``resumed_pages``.
+    
+    Args:
+        request: The request
+        job_id: The job ID, already recorded in the job store
+        read_document: Reads the document content
+        profile: Whether to profile the job and save the profile with the result
+        disconnected: Tells whether the client waiting for the job is gone
+        checkpoint: Whether to checkpoint finished pages to resume the job from
+    
+    Returns:
+        str: The job ID
+    
+    Raises:
+        KeyError: If the technology is not registered
+        CapacityExceededError: If the technology has no free slot
+        UnsupportedDocumentError: If the technology can't process the document
+        JobCancelledError: If the job was cancelled
+    """
+    tech_impl = TechnologyFactory.get_technology(request.technology)
+    
+    job = JobContext(request.technology, job_id, timeout=request.timeout)
+    profiler = SamplingProfiler(job) if profile else None
+    job_store = get_job_store()
+    result_handler = ResultHandler()
+    document_type = None
+    
+    async def process() -> ProcessingResult:
+        nonlocal document_type
+        async with admission.slot(request.technology):
+            await asyncio.to_thread(job_store.update, job_id, PROCESSING)
+            with metrics.stage(request.technology, "upload_read"):
+                contents = await read_document()
+            metrics.bytes_processed.inc(len(contents), technology=request.technology)
+            
+            document_type = sniff(contents)
+            check_supported(
+                request.technology, document_type, tech_impl.get_supported_types()
+            )
+            
+            if profiler is not None:
+                profiler.start()
+            try:
+                return await tech_impl.run(contents, **request.params_dict)
+            finally:
+                if profiler is not None:
+                    profiler.stop()
+    
+    record = await asyncio.to_thread(job_store.get, job_id)
+    if record is not None and record["status"] == CANCELLED:
+        # Cancelled while it was queued
+        raise JobCancelledError("Cancelled by request")
+    resumes = record["resumes"] if record is not None else 0
+    
+    # Pick up where an interrupted run left off, and checkpoint every page
+    if resumes:
+        job.restore(await asyncio.to_thread(result_handler.load_checkpoint, job_id))
+        logger.info(
+            f"Resuming job {job_id} (resume {resumes}) after "
+            f"{len(job.resumed)} checkpointed page(s)"
+        )
+    checkpoints: Set["asyncio.Future[None]"] = set()
+    if checkpoint:
+        # Pages are written one at a time, in a worker thread
+        checkpoint_lock = asyncio.Lock()
+        
+        async def save_page(number: int, chunks: List[DocumentChunk]) -> None:
+            async with checkpoint_lock:
+                await asyncio.to_thread(
+                    result_handler.append_checkpoint, job_id, number, chunks
+                )
+        
+        def on_page(number: int, chunks: List[DocumentChunk]) -> None:
+            future = asyncio.ensure_future(save_page(number, chunks))
+            checkpoints.add(future)
+            future.add_done_callback(checkpoints.discard)
+        
+        job.on_page = on_page
+    
+    watcher = asyncio.create_task(_watch_job(job, job_store, disconnected))
+    try:
+        with job_context(job):
+            result = await job.run(process())
+    except JobCancelledError as e:
+        logger.info(f"Job {job_id} cancelled: {str(e)}")
+        await asyncio.to_thread(job_store.update, job_id, CANCELLED, str(e))
+        raise
+    finally:
+        watcher.cancel()
+    if checkpoints:
+        await asyncio.gather(*checkpoints, return_exceptions=True)
+    
+    if result is None:
+        logger.info(
+            f"Job {job_id} ran out of time after {len(job.pages)} page(s), "
+            f"saving a partial result"
+        )
+        result = _partial_result(job)
+    
+    if resumes:
+        result.metadata["resumes"] = resumes
+        result.metadata["resumed_pages"] = len(job.resumed)
+    result.metadata["document_type"] = document_type
+    result.metadata["timings"] = job.timings
+    if job.peak_memory:
+        result.metadata["peak_memory_bytes"] = job.peak_memory
+    if profiler is not None:
+        result.metadata["profile"] = {
+            "file": PROFILE_FILE,
+            "samples": profiler.samples
+        }
+    
+    # Save result. Precompressing and indexing it block, so they run in a
+    # worker thread to keep the event loop responsive
+    def persist() -> str:
+        saved_id = result_handler.save_result(result, request, job_id)
+        if profiler is not None:
+            _save_profile(result_handler, saved_id, profiler)
+        job_store.update(saved_id, COMPLETED)
+        result_handler.delete_checkpoint(saved_id)
+        return saved_id
+    
+    with metrics.stage_duration.time(technology=request.technology, stage="persist"):
+        job_id = await asyncio.to_thread(persist)
+    
+    return job_id
+
+
+def recover_interrupted_jobs(
+    queue: Optional[JobQueue], stale_after: float = STALE_AFTER
+) -> int:
+    """Queue the jobs of crashed or killed workers again.
+    
+    A running job that has not sent a heartbeat for ``stale_after`` seconds is
+    resumed from its checkpoint by the next worker taking it from the queue.
+    Jobs the API processed itself can't be resumed, as their document is not
+    kept, and are marked failed, as are all interrupted jobs without a queue.
+    
+    Args:
+        queue: The queue to put the interrupted jobs on, None without workers
+        stale_after: Seconds without a heartbeat after which a job is interrupted
+    
+    Returns:
+        int: The number of jobs queued again
+    """
+    job_store = get_job_store()
+    result_handler = ResultHandler()
+    before = time.time() - stale_after
+    
+    requeued = 0
+    for job_id in job_store.stale_jobs(before):
+        if not job_store.resume(job_id, before):
+            # Another worker claimed it
+            continue
+        try:
+            if queue is None:
+                raise FileNotFoundError(job_id)
+            job = QueuedJob.parse_raw(result_handler.get_artifact(job_id, JOB_FILE))
+            if not result_handler.has_document(job_id):
+                raise FileNotFoundError(job_id)
+        except (FileNotFoundError, ValueError):
+            logger.warning(f"Job {job_id} was interrupted and can't be resumed")
+            job_store.update(job_id, FAILED, "Interrupted")
+            result_handler.delete_checkpoint(job_id)
+            continue
+        
+        queue.put(job)
+        requeued += 1
+        logger.info(f"Queued interrupted job {job_id} again")
+    return requeued
+
+
+async def recover_periodically(queue: Optional[JobQueue]) -> None:
+    """Look for interrupted jobs right away and then every so often.
+    
+    Args:
+        queue: The queue to put the interrupted jobs on, None without workers
+    """
+    while True:
+        try:
+            await asyncio.to_thread(recover_interrupted_jobs, queue)
+        except Exception:
+            logger.exception("Failed to recover interrupted jobs")
+        await asyncio.sleep(STALE_AFTER / 2)
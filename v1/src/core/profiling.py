@@ -0,0 +1,127 @@
+"""On-demand sampling profiler for individual jobs.
+
+The profiler periodically samples the stacks of the threads working on a job
+(see ``JobContext.thread``) and aggregates them as collapsed stacks, the format
+used by flame graph tools such as ``flamegraph.pl`` and speedscope.
+
+Only threads of the process running the job are sampled. Work handed to other
+processes, such as pages recognized in the OCR worker pool (``ocr_workers``),
+shows up as the thread waiting for the result rather than as the stacks doing
+the work; the ``ocr_page`` timing still covers it.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from core.context import JobContext
+
+# Default time between samples in seconds
+DEFAULT_INTERVAL = 0.005
+
+
+class SamplingProfiler:
+    """Samples the stacks of a job's threads from a background thread."""
+    
+    def __init__(self, job: JobContext, interval: float = DEFAULT_INTERVAL):
+        """Initialize the profiler.
+        
+        Args:
+            job: The job to profile
+            interval: Time between samples in seconds
+        """
+        self.job = job
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+    
+    def start(self) -> None:
+        """Start sampling."""
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._run, name="job-profiler", daemon=True
+        )
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """Stop sampling."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self._started
+    
+    def __enter__(self) -> "SamplingProfiler":
+        """Start sampling when entering the block."""
+        self.start()
+        return self
+    
+    def __exit__(self, *exc_info: Any) -> None:
+        """Stop sampling when leaving the block."""
+        self.stop()
+    
+    def _run(self) -> None:
+        """Take samples until stopped."""
+        while not self._stop.wait(self.interval):
+            self._sample()
+    
+    def _sample(self) -> None:
+        """Record the current stack of every thread working on the job."""
+        threads = set(self.job.threads)
+        if not threads:
+            return
+        for ident, frame in sys._current_frames().items():
+            if ident not in threads:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                filename = os.path.basename(code.co_filename)
+                stack.append(f"{code.co_name} ({filename}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+    
+    def collapsed(self) -> str:
+        """Get the samples as collapsed stacks, one ``stack count`` per line.
+        
+        Returns:
+            str: The collapsed stacks
+        """
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.stacks.most_common()
+        )
+    
+    def summary(self, limit: int = 20) -> Dict[str, Any]:
+        """Summarize the profile by the functions samples were taken in.
+        
+        Args:
+            limit: Maximum number of functions to list
+        
+        Returns:
+            Dict[str, Any]: Sample counts and the functions with most samples
+        """
+        leaves: Counter = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        
+        top: List[Dict[str, Any]] = [
+            {
+                "function": function,
+                "samples": count,
+                "share": round(count / self.samples, 4),
+            }
+            for function, count in leaves.most_common(limit)
+        ]
+        return {
+            "interval": self.interval,
+            "duration": round(self.duration, 6),
+            "samples": self.samples,
+            "top": top,
+        }
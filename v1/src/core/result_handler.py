@@ -2,16 +2,53 @@
 
 import json
 import logging
+import os
+import struct
+import time
 import uuid
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Optional
+from typing import IO, Dict, Iterator, List, Optional, Tuple
 
 from config.settings import settings
-from core.models import ProcessRequest, ProcessingResult, ResultResponse
+from core import http_cache
+from core.models import (
+    DocumentChunk, ProcessingResult, ProcessRequest, ResultPagination, ResultResponse
+)
+from core.search_index import SearchIndex
+from core.selection import PageSelection
 
 logger = logging.getLogger(__name__)
 
+# Uploaded document of a queued job, kept until a worker has processed it
+DOCUMENT_FILE = "document"
+
+# Queued job, kept so an interrupted job can be queued again
+JOB_FILE = "job.json"
+
+# Pages finished by a running job, one JSON line per page
+CHECKPOINT_FILE = "checkpoint.jsonl"
+
+# Chunks of a result, one JSON line each, the byte range of every line and the
+# result without its chunks, so part of a large result is read without loading
+# all of it
+CHUNKS_FILE = "chunks.jsonl"
+CHUNK_INDEX_FILE = "chunks.idx"
+RESULT_META_FILE = "result_meta.json"
+
+# Body of the response to a request for the whole result, next to its copies
+# compressed with each content encoding, and its ETag, written last
+RESPONSE_FILE = "response.json"
+RESPONSE_ETAG_FILE = "response.etag"
+
+# Entry of the chunk index: the page of the chunk (0 if it has none), and the
+# offset and length of its line
+_INDEX_ENTRY = struct.Struct("<IQI")
+
+# Chunk index entry as read: page, offset, length
+IndexEntry = Tuple[int, int, int]
+
 
 class ResultHandler:
     """Handler for saving and retrieving processing results."""
@@ -21,41 +58,255 @@ class ResultHandler:
         self.output_dir = Path(settings.output_directory)
         self.output_dir.mkdir(parents=True, exist_ok=True)
     
-    def save_result(self, result: ProcessingResult, request: ProcessRequest) -> str:
+    def save_result(
+        self,
+        result: ProcessingResult,
+        request: ProcessRequest,
+        job_id: Optional[str] = None
+    ) -> str:
         """Save a processing result.
         
+        Every file is written to a temporary file and renamed into place, so
+        other processes polling the result never see a partially written file.
+        
         Args:
             result: The processing result
             request: The original request
+            job_id: The job ID, a new one is generated if not given
             
         Returns:
             str: The job ID
         """
         # Generate a unique job ID
-        job_id = str(uuid.uuid4())
+        if job_id is None:
+            job_id = self.new_job_id()
+        
+        started = time.perf_counter()
         
         # Create result directory
         result_dir = self.output_dir / job_id
         result_dir.mkdir(parents=True, exist_ok=True)
         
-        # Save result as JSON
-        result_path = result_dir / "result.json"
-        with open(result_path, "w") as f:
-            json.dump(result.dict(), f, default=self._json_serializer)
-        
         # Save request for reference
         request_path = result_dir / "request.json"
-        with open(request_path, "w") as f:
+        with self._atomic_open(request_path) as f:
             json.dump(request.dict(), f)
         
         # Save markdown output
         markdown_path = result_dir / "output.md"
-        with open(markdown_path, "w") as f:
+        with self._atomic_open(markdown_path) as f:
             f.write(result.markdown)
         
+        # Save the chunks with their index for paginated reads
+        if isinstance(result.data, list):
+            self._save_chunks(result_dir, result.data)
+        else:
+            for name in (CHUNKS_FILE, CHUNK_INDEX_FILE, RESULT_META_FILE):
+                (result_dir / name).unlink(missing_ok=True)
+        
+        # Save result as JSON last, so the time spent persisting the other
+        # files is part of the stage timings stored with it
+        timings = result.metadata.get("timings")
+        if isinstance(timings, dict):
+            timings["persist"] = {
+                "seconds": round(time.perf_counter() - started, 6),
+                "count": 1
+            }
+        if isinstance(result.data, list):
+            with self._atomic_open(result_dir / RESULT_META_FILE) as f:
+                json.dump(
+                    result.dict(exclude={"data"}), f, default=self._json_serializer
+                )
+        result_path = result_dir / "result.json"
+        with self._atomic_open(result_path) as f:
+            json.dump(result.dict(), f, default=self._json_serializer)
+        
+        self._save_response(result_dir, ResultResponse(job_id=job_id, result=result))
+        
+        # Make the result searchable; it is saved even if indexing fails, and
+        # SearchIndex.rebuild can index it later
+        try:
+            search_index = SearchIndex(self.output_dir / "search.db")
+            search_index.index_result(job_id, result, request)
+        except Exception as e:
+            logger.error(f"Failed to index result {job_id}: {str(e)}")
+        
         logger.info(f"Saved result {job_id} to {result_dir}")
         return job_id
     
+    def _save_chunks(self, result_dir: Path, chunks: List[DocumentChunk]) -> None:
+        """Save the chunks of a result as JSON lines and index their byte ranges.
+        
+        Args:
+            result_dir: The result directory
+            chunks: The chunks, in order
+        """
+        offset = 0
+        with self._atomic_open(result_dir / CHUNKS_FILE, "wb") as lines, \
+                self._atomic_open(result_dir / CHUNK_INDEX_FILE, "wb") as index:
+            for chunk in chunks:
+                line = json.dumps(chunk.dict(), default=self._json_serializer).encode()
+                lines.write(line + b"\n")
+                index.write(_INDEX_ENTRY.pack(chunk.page or 0, offset, len(line)))
+                offset += len(line) + 1
+    
+    def _save_response(self, result_dir: Path, response: ResultResponse) -> None:
+        """Save the response body of a result, compressed once for every request.
+        
+        Args:
+            result_dir: The result directory
+            response: The result response
+        """
+        # The ETag is written last, so it never validates an older body
+        (result_dir / RESPONSE_ETAG_FILE).unlink(missing_ok=True)
+        body = response.json().encode()
+        compressed = http_cache.precompress(body)
+        for encoding, suffix in http_cache.SUFFIXES.items():
+            path = result_dir / (RESPONSE_FILE + suffix)
+            if encoding in compressed:
+                with self._atomic_open(path, "wb") as f:
+                    f.write(compressed[encoding])
+            else:
+                path.unlink(missing_ok=True)
+        with self._atomic_open(result_dir / RESPONSE_FILE, "wb") as f:
+            f.write(body)
+        with self._atomic_open(result_dir / RESPONSE_ETAG_FILE) as f:
+            f.write(http_cache.make_etag(body))
+    
+    def save_artifact(self, job_id: str, name: str, content: str) -> Path:
+        """Save an additional file next to a result.
+        
+        Args:
+            job_id: The job ID
+            name: The file name
+            content: The file content
+            
+        Returns:
+            Path: The path of the saved file
+        """
+        artifact_path = self.output_dir / job_id / Path(name).name
+        artifact_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._atomic_open(artifact_path) as f:
+            f.write(content)
+        return artifact_path
+    
+    def save_document(self, job_id: str, content: bytes) -> Path:
+        """Save the uploaded document of a job for a worker to process.
+        
+        Args:
+            job_id: The job ID
+            content: The document content
+            
+        Returns:
+            Path: The path of the saved document
+        """
+        document_path = self.output_dir / job_id / DOCUMENT_FILE
+        document_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._atomic_open(document_path, "wb") as f:
+            f.write(content)
+        return document_path
+    
+    def get_document(self, job_id: str) -> bytes:
+        """Get the uploaded document of a job.
+        
+        Args:
+            job_id: The job ID
+            
+        Returns:
+            bytes: The document content
+        """
+        return (self.output_dir / job_id / DOCUMENT_FILE).read_bytes()
+    
+    def has_document(self, job_id: str) -> bool:
+        """Check whether the uploaded document of a job is kept.
+        
+        Args:
+            job_id: The job ID
+            
+        Returns:
+            bool: Whether the document exists
+        """
+        return (self.output_dir / job_id / DOCUMENT_FILE).exists()
+    
+    def delete_document(self, job_id: str) -> None:
+        """Delete the uploaded document of a job once it is processed.
+        
+        Args:
+            job_id: The job ID
+        """
+        (self.output_dir / job_id / DOCUMENT_FILE).unlink(missing_ok=True)
+    
+    def get_artifact(self, job_id: str, name: str) -> str:
+        """Get an additional file saved next to a result.
+        
+        Args:
+            job_id: The job ID
+            name: The file name
+            
+        Returns:
+            str: The file content
+        
+        Raises:
+            FileNotFoundError: If there is no such file
+        """
+        return (self.output_dir / job_id / Path(name).name).read_text()
+    
+    def append_checkpoint(
+        self, job_id: str, page: int, chunks: List[DocumentChunk]
+    ) -> None:
+        """Add a finished page to the checkpoint of a running job.
+        
+        Pages are appended as single lines, each starting on a new line, so a
+        line cut short by a crash only loses that page.
+        
+        Args:
+            job_id: The job ID
+            page: The page number
+            chunks: The chunks of the page
+        """
+        line = json.dumps({"page": page, "chunks": [chunk.dict() for chunk in chunks]})
+        checkpoint_path = self.output_dir / job_id / CHECKPOINT_FILE
+        checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(checkpoint_path, "a") as f:
+            f.write("\n" + line)
+    
+    def load_checkpoint(self, job_id: str) -> Dict[int, List[DocumentChunk]]:
+        """Get the pages an interrupted run of a job finished.
+        
+        Args:
+            job_id: The job ID
+            
+        Returns:
+            Dict[int, List[DocumentChunk]]: The chunks of the finished pages by
+                page number, empty if there is no checkpoint
+        """
+        checkpoint_path = self.output_dir / job_id / CHECKPOINT_FILE
+        if not checkpoint_path.exists():
+            return {}
+        
+        pages: Dict[int, List[DocumentChunk]] = {}
+        with open(checkpoint_path, "r") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                    pages[int(entry["page"])] = [
+                        DocumentChunk(**chunk) for chunk in entry["chunks"]
+                    ]
+                except (ValueError, KeyError, TypeError):
+                    # The last line may have been cut short
+                    logger.warning(f"Skipping damaged checkpoint line of job {job_id}")
+        return pages
+    
+    def delete_checkpoint(self, job_id: str) -> None:
+        """Delete the checkpoint of a job once its result is saved.
+        
+        Args:
+            job_id: The job ID
+        """
+        (self.output_dir / job_id / CHECKPOINT_FILE).unlink(missing_ok=True)
+    
     def get_result(self, job_id: str) -> Optional[ResultResponse]:
         """Get a processing result by job ID.
         
@@ -92,6 +343,194 @@ class ResultHandler:
             logger.error(f"Error loading result {job_id}: {str(e)}")
             return None
     
+    def get_result_etag(self, job_id: str) -> Optional[str]:
+        """Get the ETag of the saved response body of a result.
+        
+        Args:
+            job_id: The job ID
+            
+        Returns:
+            Optional[str]: The ETag, or None if the result is not found or was
+                saved without a response body
+        """
+        try:
+            return (self.output_dir / job_id / RESPONSE_ETAG_FILE).read_text()
+        except FileNotFoundError:
+            return None
+    
+    def get_response_body(
+        self, job_id: str, encoding: Optional[str] = None
+    ) -> Optional[bytes]:
+        """Get the saved response body of a result.
+        
+        Args:
+            job_id: The job ID
+            encoding: The content encoding, None for the uncompressed body
+            
+        Returns:
+            Optional[bytes]: The body, or None if it was not saved with the encoding
+        """
+        name = RESPONSE_FILE + (
+            "" if encoding is None else http_cache.SUFFIXES[encoding]
+        )
+        try:
+            return (self.output_dir / job_id / name).read_bytes()
+        except FileNotFoundError:
+            return None
+    
+    def get_result_page(
+        self,
+        job_id: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        pages: Optional[PageSelection] = None
+    ) -> Optional[ResultResponse]:
+        """Get part of a processing result by job ID.
+        
+        Only the index entries and lines of the returned chunks are read, so
+        the time and memory it takes don't grow with the size of the result.
+        Selecting pages reads the whole index, 16 bytes per chunk. Results
+        saved without a chunk index are loaded whole and sliced, and results
+        whose data is text rather than chunks are returned whole.
+        
+        Args:
+            job_id: The job ID
+            offset: The number of selected chunks to skip
+            limit: The maximum number of chunks to return, all if None
+            pages: Only return the chunks of these pages
+            
+        Returns:
+            Optional[ResultResponse]: The result response with the selected
+                chunks and the pagination, or None if not found
+        """
+        result_dir = self.output_dir / job_id
+        if not (result_dir / CHUNK_INDEX_FILE).exists():
+            return self._slice_result(job_id, offset, limit, pages)
+        
+        try:
+            with open(result_dir / RESULT_META_FILE, "r") as f:
+                result_data = json.load(f)
+            
+            with open(result_dir / CHUNK_INDEX_FILE, "rb") as f:
+                if pages is None:
+                    total = os.fstat(f.fileno()).st_size // _INDEX_ENTRY.size
+                    count = max(0, total - offset)
+                    if limit is not None:
+                        count = min(count, limit)
+                    f.seek(offset * _INDEX_ENTRY.size)
+                    entries = list(
+                        _INDEX_ENTRY.iter_unpack(f.read(count * _INDEX_ENTRY.size))
+                    )
+                else:
+                    entries = [
+                        entry for entry in _INDEX_ENTRY.iter_unpack(f.read())
+                        if entry[0] and entry[0] in pages
+                    ]
+                    total = len(entries)
+                    end = None if limit is None else offset + limit
+                    entries = entries[offset:end]
+            
+            result_data["data"] = self._read_chunks(result_dir / CHUNKS_FILE, entries)
+            return ResultResponse(
+                job_id=job_id,
+                result=ProcessingResult(**result_data),
+                status="completed",
+                pagination=self._pagination(offset, limit, pages, total)
+            )
+        
+        except Exception as e:
+            logger.error(f"Error loading result {job_id}: {str(e)}")
+            return None
+    
+    @staticmethod
+    def _read_chunks(
+        chunks_path: Path, entries: List[IndexEntry]
+    ) -> List[DocumentChunk]:
+        """Read chunks by their index entries.
+        
+        Args:
+            chunks_path: The path of the chunk lines
+            entries: The index entries of the chunks to read
+            
+        Returns:
+            List[DocumentChunk]: The chunks
+        """
+        chunks = []
+        with open(chunks_path, "rb") as f:
+            for _, start, length in entries:
+                f.seek(start)
+                chunks.append(DocumentChunk(**json.loads(f.read(length))))
+        return chunks
+    
+    def _slice_result(
+        self,
+        job_id: str,
+        offset: int,
+        limit: Optional[int],
+        pages: Optional[PageSelection]
+    ) -> Optional[ResultResponse]:
+        """Get part of a result saved without a chunk index.
+        
+        Args:
+            job_id: The job ID
+            offset: The number of selected chunks to skip
+            limit: The maximum number of chunks to return, all if None
+            pages: Only return the chunks of these pages
+            
+        Returns:
+            Optional[ResultResponse]: The result response, or None if not found
+        """
+        response = self.get_result(job_id)
+        if response is None or isinstance(response.result.data, str):
+            return response
+        
+        chunks = response.result.data
+        if pages is not None:
+            chunks = [chunk for chunk in chunks if chunk.page and chunk.page in pages]
+        end = None if limit is None else offset + limit
+        response.result.data = chunks[offset:end]
+        response.pagination = self._pagination(offset, limit, pages, len(chunks))
+        return response
+    
+    @staticmethod
+    def _pagination(
+        offset: int, limit: Optional[int], pages: Optional[PageSelection], total: int
+    ) -> ResultPagination:
+        """Describe the part of a result that was read."""
+        return ResultPagination(
+            offset=offset,
+            limit=limit,
+            pages=None if pages is None else pages.to_list(),
+            total_chunks=total
+        )
+    
+    @staticmethod
+    def new_job_id() -> str:
+        """Generate a unique job ID.
+        
+        Returns:
+            str: The job ID
+        """
+        return str(uuid.uuid4())
+    
+    @staticmethod
+    @contextmanager
+    def _atomic_open(path: Path, mode: str = "w") -> Iterator[IO]:
+        """Open a file for writing that only appears once completely written.
+        
+        Args:
+            path: The path of the file
+            mode: The mode to open the file in, "w" or "wb"
+        """
+        temp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            with open(temp_path, mode) as f:
+                yield f
+            os.replace(temp_path, path)
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+    
     @staticmethod
     def _json_serializer(obj):
         """Custom JSON serializer for objects not serializable by default json code.
@@ -105,4 +544,4 @@ class ResultHandler:
         if isinstance(obj, datetime):
             return obj.isoformat()
         
-        raise TypeError(f"Type {type(obj)} not serializable")
\ No newline at end of file
+        raise TypeError(f"Type {type(obj)} not serializable")
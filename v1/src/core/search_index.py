@@ -0,0 +1,228 @@
+"""Full-text index of the stored results.
+
+Every saved result is indexed page by page in a SQLite FTS5 table next to the
+results, so documents can be found by their content in milliseconds, with hits
+ranked by BM25 down to the job and page.
+"""
+
+import json
+import logging
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from config.settings import settings
+from core.models import ProcessingResult, ProcessRequest
+
+logger = logging.getLogger(__name__)
+
+# The text of every page is in the FTS5 table, and where it comes from in a
+# regular table sharing its rowid, so the pages of a job are found through an
+# index when it is indexed again
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS page_refs (
+    id INTEGER PRIMARY KEY,
+    job_id TEXT NOT NULL,
+    page INTEGER,
+    technology TEXT NOT NULL,
+    filename TEXT
+);
+CREATE INDEX IF NOT EXISTS page_refs_job_id ON page_refs (job_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS pages USING fts5(
+    text,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+# Marks around the matched terms in snippets
+SNIPPET_START = "<b>"
+SNIPPET_END = "</b>"
+
+# Number of tokens in a snippet
+SNIPPET_TOKENS = 16
+
+
+def build_query(text: str) -> str:
+    """Turn a search box query into an FTS5 query.
+
+    Every word must occur; a word ending in ``*`` matches as a prefix. Words
+    are quoted, so punctuation such as dashes in ``2023-01`` is searched for
+    rather than read as query syntax.
+
+    Args:
+        text: The query as typed
+
+    Returns:
+        str: The FTS5 query
+
+    Raises:
+        ValueError: If the query has no words
+    """
+    terms = []
+    for word in text.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*")
+        if not word:
+            continue
+        quoted = '"' + word.replace('"', '""') + '"'
+        terms.append(quoted + "*" if prefix else quoted)
+    if not terms:
+        raise ValueError("Empty search query")
+    return " ".join(terms)
+
+
+class SearchIndex:
+    """SQLite FTS5 index of result pages, safe to use from several processes."""
+
+    def __init__(self, path: Optional[Path] = None):
+        """Initialize the search index.
+
+        Args:
+            path: Path of the database, defaults to search.db in the output directory
+        """
+        if path is None:
+            path = Path(settings.output_directory) / "search.db"
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection and commit when the block succeeds."""
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.row_factory = sqlite3.Row
+        try:
+            yield connection
+            connection.commit()
+        finally:
+            connection.close()
+
+    def index_result(
+        self, job_id: str, result: ProcessingResult, request: ProcessRequest
+    ) -> None:
+        """Index the pages of a result, replacing an earlier version of it.
+
+        Args:
+            job_id: The job ID
+            result: The processing result
+            request: The original request
+        """
+        with self._connect() as connection:
+            connection.execute(
+                "DELETE FROM pages WHERE rowid IN "
+                "(SELECT id FROM page_refs WHERE job_id = ?)",
+                (job_id,)
+            )
+            connection.execute("DELETE FROM page_refs WHERE job_id = ?", (job_id,))
+            for page, text in self._pages(result):
+                if not text.strip():
+                    continue
+                cursor = connection.execute(
+                    "INSERT INTO page_refs (job_id, page, technology, filename) "
+                    "VALUES (?, ?, ?, ?)",
+                    (job_id, page, result.technology_used, request.filename)
+                )
+                connection.execute(
+                    "INSERT INTO pages (rowid, text) VALUES (?, ?)",
+                    (cursor.lastrowid, text)
+                )
+
+    @staticmethod
+    def _pages(result: ProcessingResult) -> List[Tuple[Optional[int], str]]:
+        """Get the text of each page of a result.
+
+        Args:
+            result: The processing result
+
+        Returns:
+            List[Tuple[Optional[int], str]]: The page numbers, None for text not
+                tied to a page, and their text
+        """
+        if isinstance(result.data, str):
+            return [(None, result.data)]
+
+        pages: Dict[Optional[int], List[str]] = {}
+        for chunk in result.data:
+            pages.setdefault(chunk.page, []).append(chunk.text)
+        return [(page, "\n\n".join(texts)) for page, texts in pages.items()]
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        offset: int = 0,
+        technology: Optional[str] = None
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """Find the pages matching a query, best matches first.
+
+        Args:
+            query: The query, see ``build_query``
+            limit: The maximum number of hits to return
+            offset: The number of hits to skip
+            technology: Only search results of this technology
+
+        Returns:
+            Tuple[int, List[Dict[str, Any]]]: The total number of hits, and the
+                requested hits with their job ID, page, technology, filename,
+                snippet and score (higher is better)
+
+        Raises:
+            ValueError: If the query has no words
+        """
+        match = build_query(query)
+        where = "pages MATCH ?"
+        args: List[Any] = [match]
+        if technology is not None:
+            where += " AND refs.technology = ?"
+            args.append(technology)
+        tables = "pages JOIN page_refs AS refs ON refs.id = pages.rowid"
+
+        with self._connect() as connection:
+            total = connection.execute(
+                f"SELECT COUNT(*) FROM {tables} WHERE {where}", args
+            ).fetchone()[0]
+            rows = connection.execute(
+                "SELECT refs.job_id, refs.page, refs.technology, refs.filename, "
+                f"snippet(pages, 0, ?, ?, '…', {SNIPPET_TOKENS}) AS snippet, "
+                f"bm25(pages) AS rank FROM {tables} WHERE {where} "
+                "ORDER BY rank LIMIT ? OFFSET ?",
+                [SNIPPET_START, SNIPPET_END, *args, limit, offset]
+            ).fetchall()
+
+        hits = []
+        for row in rows:
+            hit = dict(row)
+            # BM25 ranks are negative, lower is better
+            hit["score"] = round(-hit.pop("rank"), 6)
+            hits.append(hit)
+        return total, hits
+
+    def rebuild(self, output_dir: Optional[Path] = None) -> int:
+        """Index every result stored in the output directory.
+
+        Used to index results saved before the index existed.
+
+        Args:
+            output_dir: The output directory, defaults to the configured one
+
+        Returns:
+            int: The number of indexed results
+        """
+        output_dir = Path(output_dir or settings.output_directory)
+        indexed = 0
+        for result_path in sorted(output_dir.glob("*/result.json")):
+            job_dir = result_path.parent
+            try:
+                result = ProcessingResult(**json.loads(result_path.read_text()))
+                request = ProcessRequest(
+                    **json.loads((job_dir / "request.json").read_text())
+                )
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping result {job_dir.name}: {str(e)}")
+                continue
+            self.index_result(job_dir.name, result, request)
+            indexed += 1
+        return indexed
@@ -0,0 +1,187 @@
+"""Page and region selection parameters shared by the technologies.
+
+``pages`` selects pages by number, counting from 1, as a string such as
+``"1,3-5,10-"`` (``10-`` meaning page 10 to the end) or a list of numbers.
+
+``regions`` selects boxes on every selected page as a list of
+``[left, top, right, bottom]``, each a fraction of the page width or height
+measured from the top left corner, e.g. ``[[0, 0, 1, 0.15]]`` for a header band.
+"""
+
+from typing import Any, List, Optional, Sequence, Tuple
+
+# A box as fractions of the page: left, top, right, bottom
+Region = Tuple[float, float, float, float]
+
+# A run of consecutive pages, the last one None for "to the end"
+PageRun = Tuple[int, Optional[int]]
+
+PAGES_SCHEMA = {
+    "type": "string",
+    "description": "Pages to process, e.g. \"1,3-5,10-\"; all pages by default"
+}
+
+REGIONS_SCHEMA = {
+    "type": "array",
+    "description": (
+        "Boxes to process on every page as [left, top, right, bottom] fractions "
+        "of the page size, e.g. [[0, 0, 1, 0.15]]; the whole page by default"
+    )
+}
+
+
+class InvalidSelectionError(ValueError):
+    """Raised when the pages or regions parameter is malformed."""
+
+
+class PageSelection:
+    """A set of selected pages, possibly open-ended."""
+    
+    def __init__(self, runs: Sequence[PageRun]):
+        """Initialize the selection.
+        
+        Args:
+            runs: Sorted, non-overlapping runs of consecutive pages
+        """
+        self.runs = list(runs)
+    
+    def __contains__(self, page: int) -> bool:
+        """Check whether a page is selected."""
+        return any(
+            first <= page and (last is None or page <= last)
+            for first, last in self.runs
+        )
+    
+    def pages(self, num_pages: int) -> List[int]:
+        """Get the selected pages of a document.
+        
+        Args:
+            num_pages: Number of pages in the document
+        
+        Returns:
+            List[int]: The selected page numbers that exist, in order
+        """
+        selected: List[int] = []
+        for first, last in self.runs:
+            end = num_pages if last is None else min(last, num_pages)
+            selected.extend(range(first, end + 1))
+        return selected
+    
+    def to_list(self) -> List[str]:
+        """Get the selection in the notation of the ``pages`` parameter."""
+        return [
+            str(first) if first == last else f"{first}-{'' if last is None else last}"
+            for first, last in self.runs
+        ]
+
+
+def parse_pages(spec: Any) -> Optional[PageSelection]:
+    """Parse the ``pages`` parameter.
+    
+    Args:
+        spec: A string such as "1,3-5,10-", a page number or a list of them
+    
+    Returns:
+        Optional[PageSelection]: The selected pages, None for every page
+    
+    Raises:
+        InvalidSelectionError: If the selection is malformed
+    """
+    if spec is None or spec == "" or spec == []:
+        return None
+    
+    if isinstance(spec, int) and not isinstance(spec, bool):
+        parts: List[str] = [str(spec)]
+    elif isinstance(spec, str):
+        parts = [part.strip() for part in spec.split(",") if part.strip()]
+    elif isinstance(spec, (list, tuple)):
+        parts = [str(part).strip() for part in spec]
+    else:
+        raise InvalidSelectionError(f"Invalid pages {spec!r}")
+    
+    runs: List[PageRun] = []
+    for part in parts:
+        first_text, separator, last_text = part.partition("-")
+        try:
+            first = int(first_text)
+            last = (
+                (int(last_text) if last_text.strip() else None) if separator else first
+            )
+        except ValueError:
+            raise InvalidSelectionError(f"Invalid page range {part!r}")
+        if first < 1 or (last is not None and last < first):
+            raise InvalidSelectionError(f"Invalid page range {part!r}")
+        runs.append((first, last))
+    
+    # Merge overlapping and adjacent runs
+    runs.sort(key=lambda run: run[0])
+    merged: List[PageRun] = []
+    for first, last in runs:
+        if merged:
+            previous_first, previous_last = merged[-1]
+            if previous_last is None:
+                # The previous run already goes to the end
+                continue
+            if first <= previous_last + 1:
+                merged[-1] = (
+                    previous_first, None if last is None else max(previous_last, last)
+                )
+                continue
+        merged.append((first, last))
+    return PageSelection(merged)
+
+
+def parse_regions(spec: Any) -> Optional[List[Region]]:
+    """Parse the ``regions`` parameter.
+    
+    Args:
+        spec: A list of [left, top, right, bottom] fractions of the page size
+    
+    Returns:
+        Optional[List[Region]]: The regions, None for the whole page
+    
+    Raises:
+        InvalidSelectionError: If a region is malformed
+    """
+    if spec is None or spec == []:
+        return None
+    if not isinstance(spec, (list, tuple)):
+        raise InvalidSelectionError(f"Invalid regions {spec!r}")
+    # A single box may be given without the enclosing list
+    if len(spec) == 4 and all(isinstance(value, (int, float)) for value in spec):
+        spec = [spec]
+    
+    regions: List[Region] = []
+    for box in spec:
+        try:
+            left, top, right, bottom = (float(value) for value in box)
+        except (TypeError, ValueError):
+            raise InvalidSelectionError(
+                f"Invalid region {box!r}, expected [left, top, right, bottom]"
+            )
+        if not (0 <= left < right <= 1 and 0 <= top < bottom <= 1):
+            raise InvalidSelectionError(
+                f"Invalid region {box!r}, expected fractions of the page"
+            )
+        regions.append((left, top, right, bottom))
+    return regions
+
+
+def crop_box(region: Region, width: float, height: float) -> Tuple[int, int, int, int]:
+    """Get the pixel box of a region on a page image.
+    
+    Args:
+        region: The region as fractions of the page
+        width: Width of the page image in pixels
+        height: Height of the page image in pixels
+    
+    Returns:
+        Tuple[int, int, int, int]: The box as left, top, right, bottom pixels
+    """
+    left, top, right, bottom = region
+    return (
+        int(left * width),
+        int(top * height),
+        max(int(left * width) + 1, round(right * width)),
+        max(int(top * height) + 1, round(bottom * height)),
+    )
@@ -0,0 +1,116 @@
+"""Document type detection from the leading bytes of a document.
+
+Technologies route documents to the right decoder by their detected type
+instead of trying decoders in turn, and the API rejects documents a technology
+can't process before any work is done.
+"""
+
+from typing import Iterable, Optional, Tuple
+
+# Document types
+PDF = "pdf"
+PNG = "png"
+JPEG = "jpeg"
+TIFF = "tiff"
+GIF = "gif"
+BMP = "bmp"
+WEBP = "webp"
+JPEG2000 = "jp2"
+ZIP = "zip"
+TEXT = "text"
+UNKNOWN = "unknown"
+
+# Types decoded as a single raster image (or a multi-frame one, for TIFF and GIF)
+IMAGE_TYPES = frozenset({PNG, JPEG, TIFF, GIF, BMP, WEBP, JPEG2000})
+
+# Number of leading bytes needed to detect every type
+SNIFF_BYTES = 1024
+
+# Signatures at the start of a document
+_SIGNATURES: Tuple[Tuple[bytes, str], ...] = (
+    (b"\x89PNG\r\n\x1a\n", PNG),
+    (b"\xff\xd8\xff", JPEG),
+    (b"II*\x00", TIFF),
+    (b"MM\x00*", TIFF),
+    (b"II+\x00", TIFF),
+    (b"MM\x00+", TIFF),
+    (b"GIF87a", GIF),
+    (b"GIF89a", GIF),
+    (b"\x00\x00\x00\x0cjP  \r\n\x87\n", JPEG2000),
+    (b"\xff\x4f\xff\x51", JPEG2000),
+    (b"PK\x03\x04", ZIP),
+    (b"%PDF-", PDF),
+)
+
+
+class UnsupportedDocumentError(ValueError):
+    """Raised when a technology can't process a type of document."""
+    
+    def __init__(self, technology: str, document_type: str):
+        """Initialize the error.
+        
+        Args:
+            technology: The name of the technology
+            document_type: The detected document type
+        """
+        super().__init__(
+            f"Technology '{technology}' does not support {document_type} documents"
+        )
+        self.technology = technology
+        self.document_type = document_type
+
+
+def sniff(document: bytes) -> str:
+    """Detect the type of a document from its leading bytes.
+    
+    Args:
+        document: The document content, or at least its first SNIFF_BYTES bytes
+    
+    Returns:
+        str: The document type, UNKNOWN if it is not recognized
+    """
+    head = bytes(document[:SNIFF_BYTES])
+    for signature, document_type in _SIGNATURES:
+        if head.startswith(signature):
+            return document_type
+    
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return WEBP
+    # Bitmaps have four reserved zero bytes after the file size
+    if head[:2] == b"BM" and head[6:10] == b"\x00\x00\x00\x00":
+        return BMP
+    # PDF readers accept the header anywhere in the first kilobyte
+    if b"%PDF-" in head:
+        return PDF
+    if head and _is_text(head):
+        return TEXT
+    return UNKNOWN
+
+
+def _is_text(head: bytes) -> bool:
+    """Check whether the leading bytes look like UTF-8 text."""
+    if b"\x00" in head:
+        return False
+    try:
+        head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # A multi-byte character may be cut off at the end
+        return e.start >= len(head) - 3
+    return True
+
+
+def check_supported(
+    technology: str, document_type: str, supported: Optional[Iterable[str]]
+) -> None:
+    """Make sure a technology supports a type of document.
+    
+    Args:
+        technology: The name of the technology
+        document_type: The detected document type
+        supported: The types the technology supports, None for any type
+    
+    Raises:
+        UnsupportedDocumentError: If the type is not supported
+    """
+    if supported is not None and document_type not in supported:
+        raise UnsupportedDocumentError(technology, document_type)
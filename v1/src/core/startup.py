@@ -0,0 +1,90 @@
+"""Startup timing report for keeping cold starts within a budget."""
+
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StartupReport:
+    """Records how long each import and registration step of startup takes.
+    
+    Steps are recorded until ``finish`` is called. After that the report is
+    frozen, so technologies loaded lazily on first use don't count towards the
+    startup total.
+    """
+    
+    def __init__(self):
+        """Initialize an empty report."""
+        self.steps: List[Dict[str, Any]] = []
+        self.finished = False
+        self.budget_seconds: Optional[float] = None
+    
+    @contextmanager
+    def step(self, name: str) -> Iterator[None]:
+        """Time a startup step.
+        
+        Args:
+            name: A short description of the step
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            if not self.finished:
+                self.steps.append({"step": name, "seconds": round(elapsed, 6)})
+            logger.debug(f"{name} took {elapsed * 1000:.1f} ms")
+    
+    @property
+    def total_seconds(self) -> float:
+        """Get the total time of all recorded steps.
+        
+        Returns:
+            float: The total time in seconds
+        """
+        return round(sum(step["seconds"] for step in self.steps), 6)
+    
+    def finish(self, budget_seconds: Optional[float] = None) -> None:
+        """Freeze the report and log it.
+        
+        Args:
+            budget_seconds: The startup budget; a warning is logged if the
+                recorded steps exceed it
+        """
+        self.finished = True
+        self.budget_seconds = budget_seconds
+        
+        lines = [f"  {s['seconds'] * 1000:9.1f} ms  {s['step']}" for s in self.steps]
+        logger.info(
+            f"Startup took {self.total_seconds * 1000:.1f} ms:\n" + "\n".join(lines)
+        )
+        
+        if budget_seconds is not None and self.total_seconds > budget_seconds:
+            slowest = max(self.steps, key=lambda s: s["seconds"])
+            logger.warning(
+                f"Startup took {self.total_seconds:.3f}s, over the budget of "
+                f"{budget_seconds:.3f}s (slowest step: {slowest['step']})"
+            )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the report as a dictionary.
+        
+        Returns:
+            Dict[str, Any]: The steps, total and budget
+        """
+        return {
+            "steps": list(self.steps),
+            "total_seconds": self.total_seconds,
+            "budget_seconds": self.budget_seconds,
+            "within_budget": (
+                self.budget_seconds is None
+                or self.total_seconds <= self.budget_seconds
+            ),
+        }
+
+
+# Report for the current process
+startup_report = StartupReport()
@@ -37,6 +37,12 @@ def parse_args():
         default=settings.debug,
         help="Enable debug mode"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help=f"Number of worker processes (default: {settings.workers})"
+    )
     parser.add_argument(
         "--output-dir",
         type=str,
@@ -59,6 +65,8 @@ def main():
     settings.port = args.port
     settings.debug = args.debug
     settings.output_directory = args.output_dir
+    if args.workers is not None:
+        settings.workers = args.workers
     
     # Configure logging
     log_level = logging.DEBUG if settings.debug else logging.INFO
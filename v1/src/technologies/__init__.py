@@ -3,7 +3,14 @@
 This package contains implementations of various document processing technologies.
 Each technology is implemented as a separate module that registers itself with
 the TechnologyFactory.
+
+The modules are not imported here: they pull in heavy optional dependencies, so
+they are registered lazily by name and only imported on first use or warm-up.
 """
 
-# Import technologies to register them
-from technologies import tesseract, openai
\ No newline at end of file
+# Built-in technologies as name -> "module:Class"
+BUILTIN_TECHNOLOGIES = {
+    "tesseract": "technologies.tesseract:TesseractTechnology",
+    "openai": "technologies.openai:OpenAITechnology",
+    "cascade": "technologies.cascade:CascadeTechnology",
+}
@@ -0,0 +1,428 @@
+"""Cascade technology, escalating pages from cheap to capable technologies."""
+
+import asyncio
+import io
+import logging
+import re
+import string
+from contextlib import nullcontext
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from core import metrics
+from core.admission import CapacityExceededError, admission
+from core.base import BaseTechnology
+from core.context import JobCancelledError, current_job, job_context, to_thread
+from core.factory import TechnologyFactory
+from core.models import DocumentChunk, ProcessingResult
+from core.selection import (
+    PAGES_SCHEMA, InvalidSelectionError, PageSelection, parse_pages
+)
+from core.sniff import IMAGE_TYPES, PDF, TEXT, check_supported, sniff
+
+# Optional dependencies are imported once with the module rather than on every
+# run, so the cost is paid when the technology is first loaded or warmed up.
+try:
+    import PyPDF2
+except ImportError as e:  # pragma: no cover - depends on the environment
+    PyPDF2 = None
+    _IMPORT_ERROR = e
+else:
+    _IMPORT_ERROR = None
+
+logger = logging.getLogger(__name__)
+
+# Tier reading the embedded text of the document, the cheapest of all
+TEXT_LAYER = "text"
+
+DEFAULT_TIERS = [TEXT_LAYER, "tesseract"]
+
+# A token that reads as a word or a number once surrounding punctuation is
+# stripped, as opposed to OCR noise such as "|~;" or "l1I"
+_WORD = re.compile(r"[^\W\d_]+(?:['’-][^\W\d_]+)*|[\d.,:/%-]+")
+_PUNCTUATION = string.punctuation + "“”‘’«»…"
+
+
+def text_quality(text: str) -> Dict[str, float]:
+    """Measure how much a page's text looks like real text.
+    
+    Args:
+        text: The text of a page
+    
+    Returns:
+        Dict[str, float]: The number of non-whitespace characters (``chars``)
+            and the fraction of tokens that are words or numbers (``word_ratio``)
+    """
+    tokens = text.split()
+    words = sum(1 for token in tokens if _WORD.fullmatch(token.strip(_PUNCTUATION)))
+    return {
+        "chars": sum(len(token) for token in tokens),
+        "word_ratio": round(words / len(tokens), 4) if tokens else 0.0
+    }
+
+
+class CascadeTechnology(BaseTechnology):
+    """Cascade of technologies per page, from the cheapest to the most capable.
+    
+    Every page is first read from the text layer of the document. Pages whose
+    text is too short or looks garbled are sent to the next tier, Tesseract by
+    default, and so on until a tier gives good text; pages no tier reads well
+    keep the best text any tier gave. Each chunk records the ``tier`` that
+    produced it and the ``quality`` of its page.
+    """
+    
+    async def startup(self) -> None:
+        """Check the dependencies once at startup."""
+        self._require_dependencies()
+        await super().startup()
+    
+    async def run(self, document: bytes, **params) -> ProcessingResult:
+        """Process a document with the cheapest technology that reads it well.
+        
+        Args:
+            document: The document content as bytes
+            **params: Additional parameters for the cascade
+        
+        Returns:
+            ProcessingResult: The processing result
+        
+        Raises:
+            KeyError: If a tier is not a known technology
+            InvalidSelectionError: If the cascade is one of its own tiers
+            CapacityExceededError: If a tier has no free slot
+        """
+        try:
+            self._require_dependencies()
+            params = self.resolve_params(params)
+            
+            # Get parameters
+            tiers = list(params.get("tiers") or DEFAULT_TIERS)
+            if self.get_name() in tiers:
+                # It would run itself on the same pages until the stack ran out
+                raise InvalidSelectionError("The cascade can't be one of its own tiers")
+            min_chars = int(params.get("min_chars", 50))
+            min_word_ratio = float(params.get("min_word_ratio", 0.7))
+            tier_params = params.get("tier_params") or {}
+            selection = parse_pages(params.get("pages"))
+            
+            document_type = sniff(document)
+            check_supported(self.get_name(), document_type, self.get_supported_types())
+            
+            numbers = await to_thread(
+                self._page_numbers, document, document_type, selection
+            )
+            job = current_job()
+            
+            finished: Dict[int, List[DocumentChunk]] = {}
+            # Best chunks of every unfinished page so far, with their score
+            best: Dict[int, Tuple[float, List[DocumentChunk]]] = {}
+            pending: List[int] = []
+            for number in numbers:
+                resumed = job.resumed_page(number) if job is not None else None
+                if resumed is not None and all(
+                    "tier" in chunk.metadata for chunk in resumed
+                ):
+                    # Finished by the cascade before the job was interrupted
+                    finished[number] = resumed
+                else:
+                    pending.append(number)
+            
+            escalated = 0
+            tried = False
+            for tier in tiers:
+                if not pending:
+                    break
+                pages = await self._run_tier(
+                    tier, document, document_type, pending, tier_params.get(tier) or {}
+                )
+                if pages is None:
+                    # The tier can't read documents of this type
+                    continue
+                if tried:
+                    escalated += len(pending)
+                tried = True
+                
+                unfinished: List[int] = []
+                for number in pending:
+                    texts = [chunk.text for chunk in pages.get(number, [])]
+                    quality = text_quality("\n".join(texts))
+                    chunks = [
+                        DocumentChunk(
+                            text=text,
+                            page=number,
+                            metadata={"page": number, "tier": tier, "quality": quality}
+                        )
+                        for text in texts or [""]
+                    ]
+                    if (
+                        quality["chars"] >= min_chars
+                        and quality["word_ratio"] >= min_word_ratio
+                    ):
+                        finished[number] = chunks
+                        continue
+                    score = (
+                        min(1.0, quality["chars"] / max(min_chars, 1))
+                        * quality["word_ratio"]
+                    )
+                    if number not in best or score > best[number][0]:
+                        best[number] = (score, chunks)
+                    unfinished.append(number)
+                for number in pending:
+                    if number in finished:
+                        self._finish_page(job, number, finished[number])
+                pending = unfinished
+            
+            # Pages no tier reads well enough keep the best text any tier gave
+            for number in pending:
+                finished[number] = best[number][1] if number in best else [
+                    DocumentChunk(text="", page=number, metadata={"page": number})
+                ]
+                self._finish_page(job, number, finished[number])
+            
+            tier_counts: Dict[str, int] = {}
+            for chunks in finished.values():
+                tier = chunks[0].metadata.get("tier")
+                if tier is not None:
+                    tier_counts[tier] = tier_counts.get(tier, 0) + 1
+            
+            # Create result
+            metadata: Dict[str, Any] = {
+                "num_pages": len(numbers),
+                "tiers": tier_counts,
+                "escalated_pages": escalated
+            }
+            if selection is not None:
+                metadata["pages"] = selection.to_list()
+            return ProcessingResult(
+                data=[chunk for number in numbers for chunk in finished[number]],
+                technology_used=self.get_name(),
+                metadata=metadata
+            )
+        
+        except Exception as e:
+            logger.error(f"Error processing document with the cascade: {str(e)}")
+            raise
+    
+    @staticmethod
+    def _finish_page(job: Any, number: int, chunks: List[DocumentChunk]) -> None:
+        """Record the final chunks of a page.
+        
+        Args:
+            job: The current job, if any
+            number: The page number
+            chunks: The chunks of the page
+        """
+        tier = chunks[0].metadata.get("tier")
+        if tier is not None:
+            metrics.cascade_pages.inc(tier=tier)
+        if job is not None:
+            job.add_page(number, chunks)
+    
+    async def _run_tier(
+        self,
+        tier: str,
+        document: bytes,
+        document_type: str,
+        numbers: List[int],
+        params: Dict[str, Any]
+    ) -> Optional[Dict[int, List[DocumentChunk]]]:
+        """Read pages with one tier of the cascade.
+        
+        Technologies that split their chunks by page read all the pages in one
+        run. Others (such as OpenAI) are run page by page, up to
+        ``max_parallel_pages`` at once, so their pages are still told apart.
+        Every run holds an admission slot of the technology and has a child
+        context of the cascade's job. Pages of a run the tier fails on are
+        logged and left without text.
+        
+        Args:
+            tier: The technology, or ``text`` for the text layer
+            document: The document content as bytes
+            document_type: The detected document type
+            numbers: The pages to read
+            params: Parameters for the technology
+        
+        Returns:
+            Optional[Dict[int, List[DocumentChunk]]]: The chunks by page
+                number, None if the tier can't read documents of this type
+        """
+        if tier == TEXT_LAYER:
+            if document_type not in (PDF, TEXT):
+                return None
+            with metrics.stage(self.get_name(), "decode"):
+                return await to_thread(
+                    self._read_text_layer, document, document_type, numbers
+                )
+        
+        technology = TechnologyFactory.get_technology(tier)
+        supported = technology.get_supported_types()
+        if supported is not None and document_type not in supported:
+            return None
+        if "pages" not in technology.get_param_schema() and numbers != [1]:
+            logger.warning(f"Cascade tier {tier} can't select pages, skipping it")
+            return None
+        
+        in_flight = asyncio.Semaphore(int(self.config.get("max_parallel_pages") or 4))
+        
+        job = current_job()
+        
+        async def read(selected: List[int]) -> Dict[int, List[DocumentChunk]]:
+            # Each run takes a slot of the tier, as a job of its own would,
+            # and the pages it finishes stay out of the cascade's job
+            spec = ",".join(str(number) for number in selected)
+            async with in_flight:
+                try:
+                    scope = job_context(job.child(tier)) if job else nullcontext()
+                    async with admission.slot(tier):
+                        with scope:
+                            result = await technology.run(
+                                document, **{**params, "pages": spec}
+                            )
+                except (JobCancelledError, CapacityExceededError):
+                    # The job is stopped, or fails or is queued again like any
+                    # job over the tier's capacity, rather than falling back
+                    raise
+                except Exception as e:
+                    logger.warning(
+                        f"Cascade tier {tier} failed on page(s) {spec}: {str(e)}"
+                    )
+                    return {}
+            if isinstance(result.data, str):
+                chunks = [DocumentChunk(text=result.data, page=selected[0])]
+                return {selected[0]: chunks}
+            if len(selected) == 1:
+                return {selected[0]: result.data}
+            by_page: Dict[int, List[DocumentChunk]] = {}
+            for chunk in result.data:
+                by_page.setdefault(chunk.page, []).append(chunk)
+            return by_page
+        
+        # Reading every page in one run pays for its setup, such as Tesseract
+        # writing the PDF to a temporary file, once per tier
+        if technology.splits_pages():
+            return await read(numbers)
+        pages: Dict[int, List[DocumentChunk]] = {}
+        for part in await asyncio.gather(*(read([number]) for number in numbers)):
+            pages.update(part)
+        return pages
+    
+    @staticmethod
+    def _page_numbers(
+        document: bytes, document_type: str, selection: Optional[PageSelection] = None
+    ) -> List[int]:
+        """Get the numbers of the pages to process.
+        
+        Args:
+            document: The document content as bytes
+            document_type: The detected document type
+            selection: The pages to process, None for every page
+        
+        Returns:
+            List[int]: The page numbers, in order
+        """
+        if document_type != PDF:
+            return [1] if selection is None or 1 in selection else []
+        num_pages = len(PyPDF2.PdfReader(io.BytesIO(document)).pages)
+        if selection is None:
+            return list(range(1, num_pages + 1))
+        return selection.pages(num_pages)
+    
+    @staticmethod
+    def _read_text_layer(
+        document: bytes, document_type: str, numbers: List[int]
+    ) -> Dict[int, List[DocumentChunk]]:
+        """Read the embedded text of pages.
+        
+        Args:
+            document: The document content as bytes
+            document_type: PDF or plain text
+            numbers: The pages to read
+        
+        Returns:
+            Dict[int, List[DocumentChunk]]: The chunks by page number
+        """
+        if document_type == TEXT:
+            return {
+                1: [
+                    DocumentChunk(
+                        text=document.decode("utf-8", errors="replace"), page=1
+                    )
+                ]
+            }
+        
+        pdf_reader = PyPDF2.PdfReader(io.BytesIO(document))
+        job = current_job()
+        pages: Dict[int, List[DocumentChunk]] = {}
+        for number in numbers:
+            if job is not None:
+                # Stop reading once the job is cancelled or out of time
+                job.check()
+            text = pdf_reader.pages[number - 1].extract_text() or ""
+            pages[number] = [DocumentChunk(text=text, page=number)]
+        return pages
+    
+    @staticmethod
+    def _require_dependencies() -> None:
+        """Make sure the optional dependencies are installed.
+        
+        Raises:
+            RuntimeError: If a required package is not installed
+        """
+        if _IMPORT_ERROR is not None:
+            logger.error(f"Required package not installed: {str(_IMPORT_ERROR)}")
+            raise RuntimeError(
+                f"Required package not installed: {str(_IMPORT_ERROR)}. "
+                f"Please install PyPDF2."
+            )
+    
+    @classmethod
+    def get_supported_types(cls) -> FrozenSet[str]:
+        """Get the document types the cascade can process.
+        
+        Returns:
+            FrozenSet[str]: PDFs, raster images and plain text
+        """
+        return IMAGE_TYPES | {PDF, TEXT}
+    
+    @classmethod
+    def get_param_schema(cls) -> Dict[str, Any]:
+        """Get the parameter schema for the cascade.
+        
+        Returns:
+            Dict[str, Any]: The parameter schema
+        """
+        return {
+            "tiers": {
+                "type": "array",
+                "description": (
+                    'Technologies to try, cheapest first; "text" reads the '
+                    "text layer of the document"
+                ),
+                "default": DEFAULT_TIERS,
+            },
+            "min_chars": {
+                "type": "integer",
+                "description": "Characters a page needs to not be escalated",
+                "default": 50,
+            },
+            "min_word_ratio": {
+                "type": "number",
+                "description": (
+                    "Fraction of a page's tokens that must be words or numbers"
+                ),
+                "default": 0.7,
+                "minimum": 0.0,
+                "maximum": 1.0,
+            },
+            "tier_params": {
+                "type": "object",
+                "description": (
+                    'Parameters for each tier, e.g. {"tesseract": {"lang": "deu"}}'
+                ),
+                "default": {},
+            },
+            "pages": PAGES_SCHEMA,
+        }
+
+
+# Register the technology
+TechnologyFactory.register(CascadeTechnology)
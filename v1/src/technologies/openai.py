@@ -1,11 +1,29 @@
 """OpenAI technology implementation for document processing."""
 
+import io
 import logging
-from typing import Any, Dict, List
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
 
+from core import metrics
 from core.base import BaseTechnology
+from core.context import current_job, to_thread
 from core.factory import TechnologyFactory
 from core.models import DocumentChunk, ProcessingResult
+from core.selection import (
+    PAGES_SCHEMA, REGIONS_SCHEMA, PageSelection, Region, parse_pages, parse_regions
+)
+from core.sniff import PDF, TEXT, check_supported, sniff
+
+# Optional dependencies are imported once with the module rather than on every
+# run, so the cost is paid when the technology is first loaded or warmed up.
+try:
+    import openai
+    import PyPDF2
+except ImportError as e:  # pragma: no cover - depends on the environment
+    openai = PyPDF2 = None
+    _IMPORT_ERROR = e
+else:
+    _IMPORT_ERROR = None
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +31,11 @@ logger = logging.getLogger(__name__)
 class OpenAITechnology(BaseTechnology):
     """OpenAI technology for processing documents using GPT models."""
     
+    async def startup(self) -> None:
+        """Check the dependencies once at startup."""
+        self._require_dependencies()
+        await super().startup()
+    
     async def run(self, document: bytes, **params) -> ProcessingResult:
         """Process a document using OpenAI's GPT models.
         
@@ -24,10 +47,8 @@ class OpenAITechnology(BaseTechnology):
             ProcessingResult: The processing result
         """
         try:
-            # Lazy import to avoid requiring openai for all users
-            import openai
-            import io
-            import PyPDF2
+            self._require_dependencies()
+            params = self.resolve_params(params)
             
             # Get parameters
             model = params.get("model", "gpt-4")
@@ -42,14 +63,15 @@ class OpenAITechnology(BaseTechnology):
             if not api_key:
                 raise ValueError("OpenAI API key is required")
             
-            # Set API key
-            openai.api_key = api_key
+            selection = parse_pages(params.get("pages"))
+            regions = parse_regions(params.get("regions"))
             
-            # Extract text from PDF
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(document))
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n\n"
+            # Extract the text, off the event loop as PDF parsing blocks
+            with metrics.stage(self.get_name(), "decode"):
+                text, num_pages = await to_thread(
+                    self._extract_text, document, selection, regions
+                )
+            metrics.pages_processed.inc(num_pages, technology=self.get_name())
             
             # Prepare chunks for processing
             chunks: List[DocumentChunk] = []
@@ -57,26 +79,35 @@ class OpenAITechnology(BaseTechnology):
             # Process with OpenAI
             prompt = prompt_template.format(text=text)
             
-            # Use the appropriate API based on the model
-            if model.startswith("gpt-4") or model.startswith("gpt-3.5"):
-                response = openai.ChatCompletion.create(
-                    model=model,
-                    messages=[
-                        {"role": "system", "content": "You are a document analysis assistant."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=max_tokens,
-                    temperature=temperature
-                )
-                result_text = response.choices[0].message.content
-            else:
-                response = openai.Completion.create(
-                    model=model,
-                    prompt=prompt,
-                    max_tokens=max_tokens,
-                    temperature=temperature
-                )
-                result_text = response.choices[0].text
+            # Use the appropriate API based on the model. The key goes with each
+            # request, as jobs of different callers run concurrently
+            with metrics.stage(self.get_name(), "llm_call"):
+                if model.startswith("gpt-4") or model.startswith("gpt-3.5"):
+                    response = await to_thread(
+                        openai.ChatCompletion.create,
+                        api_key=api_key,
+                        model=model,
+                        messages=[
+                            {
+                                "role": "system",
+                                "content": "You are a document analysis assistant.",
+                            },
+                            {"role": "user", "content": prompt},
+                        ],
+                        max_tokens=max_tokens,
+                        temperature=temperature,
+                    )
+                    result_text = response.choices[0].message.content
+                else:
+                    response = await to_thread(
+                        openai.Completion.create,
+                        api_key=api_key,
+                        model=model,
+                        prompt=prompt,
+                        max_tokens=max_tokens,
+                        temperature=temperature
+                    )
+                    result_text = response.choices[0].text
             
             # Create a single chunk with the result
             chunks.append(DocumentChunk(
@@ -85,25 +116,120 @@ class OpenAITechnology(BaseTechnology):
             ))
             
             # Create result
+            metadata: Dict[str, Any] = {
+                "model": model,
+                "num_pages": num_pages
+            }
+            if selection is not None:
+                metadata["pages"] = selection.to_list()
+            if regions is not None:
+                metadata["regions"] = [list(region) for region in regions]
             return ProcessingResult(
                 data=chunks,
                 technology_used=self.get_name(),
-                metadata={
-                    "model": model,
-                    "num_pages": len(pdf_reader.pages)
-                }
+                metadata=metadata
             )
         
-        except ImportError as e:
-            logger.error(f"Required package not installed: {str(e)}")
+        except Exception as e:
+            logger.error(f"Error processing document with OpenAI: {str(e)}")
+            raise
+    
+    @classmethod
+    def _extract_text(
+        cls,
+        document: bytes,
+        selection: Optional[PageSelection] = None,
+        regions: Optional[List[Region]] = None
+    ) -> Tuple[str, int]:
+        """Extract the text of a plain text document or the text layer of a PDF.
+        
+        Only the selected pages of a PDF are extracted, and with regions only
+        the text positioned inside them.
+        
+        Args:
+            document: The document content as bytes
+            selection: The pages to extract, None for every page
+            regions: The regions to extract on every page, None for the whole page
+            
+        Returns:
+            Tuple[str, int]: The text and the number of extracted pages
+        """
+        document_type = sniff(document)
+        check_supported(cls.get_name(), document_type, cls.get_supported_types())
+        if document_type == TEXT:
+            if selection is not None and 1 not in selection:
+                return "", 0
+            return document.decode("utf-8", errors="replace"), 1
+        
+        pdf_reader = PyPDF2.PdfReader(io.BytesIO(document))
+        numbers = (
+            range(1, len(pdf_reader.pages) + 1) if selection is None
+            else selection.pages(len(pdf_reader.pages))
+        )
+        job = current_job()
+        text = ""
+        for number in numbers:
+            if job is not None:
+                # Stop extracting once the job is cancelled or out of time
+                job.check()
+            page = pdf_reader.pages[number - 1]
+            if regions is None:
+                text += page.extract_text() + "\n\n"
+            else:
+                text += "\n".join(cls._extract_regions(page, regions)) + "\n\n"
+        return text, len(numbers)
+    
+    @staticmethod
+    def _extract_regions(page: Any, regions: List[Region]) -> List[str]:
+        """Extract the text positioned inside regions of a PDF page.
+        
+        Args:
+            page: The PDF page
+            regions: The regions as fractions of the page
+            
+        Returns:
+            List[str]: The text of each region
+        """
+        box = page.mediabox
+        left, bottom = float(box.left), float(box.bottom)
+        width, height = float(box.width), float(box.height)
+        parts: List[List[str]] = [[] for _ in regions]
+        
+        def visit(text, cm, tm, font_dict, font_size):
+            # Position of the text on the page, measured from the top left
+            x = tm[4] * cm[0] + tm[5] * cm[2] + cm[4]
+            y = tm[4] * cm[1] + tm[5] * cm[3] + cm[5]
+            fx = (x - left) / width
+            fy = 1 - (y - bottom) / height
+            for i, (r_left, r_top, r_right, r_bottom) in enumerate(regions):
+                if r_left <= fx <= r_right and r_top <= fy <= r_bottom:
+                    parts[i].append(text)
+        
+        page.extract_text(visitor_text=visit)
+        return ["".join(part) for part in parts]
+    
+    @staticmethod
+    def _require_dependencies() -> None:
+        """Make sure the optional dependencies are installed.
+        
+        Raises:
+            RuntimeError: If a required package is not installed
+        """
+        if _IMPORT_ERROR is not None:
+            logger.error(f"Required package not installed: {str(_IMPORT_ERROR)}")
             raise RuntimeError(
-                f"Required package not installed: {str(e)}. "
+                f"Required package not installed: {str(_IMPORT_ERROR)}. "
                 f"Please install openai and PyPDF2."
             )
+    
+    @classmethod
+    def get_supported_types(cls) -> FrozenSet[str]:
+        """Get the document types OpenAI can process.
         
-        except Exception as e:
-            logger.error(f"Error processing document with OpenAI: {str(e)}")
-            raise
+        Returns:
+            FrozenSet[str]: PDFs with a text layer and plain text
+        """
+        return frozenset({PDF, TEXT})
     
     @classmethod
     def get_param_schema(cls) -> Dict[str, Any]:
@@ -140,9 +266,11 @@ class OpenAITechnology(BaseTechnology):
                 "type": "string",
                 "description": "Template for the prompt, use {text} as placeholder for document text",
                 "default": "Extract the key information from this document:\n\n{text}"
-            }
+            },
+            "pages": PAGES_SCHEMA,
+            "regions": REGIONS_SCHEMA
         }
 
 
 # Register the technology
-TechnologyFactory.register(OpenAITechnology)
\ No newline at end of file
+TechnologyFactory.register(OpenAITechnology)
@@ -1,78 +1,591 @@
 """Tesseract OCR technology implementation."""
 
+import asyncio
+import io
 import logging
-from typing import Any, Dict, List
+import os
+import re
+import tempfile
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Set, Tuple
 
+from core import metrics
 from core.base import BaseTechnology
+from core.context import current_job, to_thread
 from core.factory import TechnologyFactory
+from core.limits import (
+    DEFAULT_DPI, DocumentTooLargeError, PageSize, PixelBudget, allow_decoding,
+    image_bytes
+)
 from core.models import DocumentChunk, ProcessingResult
+from core.selection import (
+    PAGES_SCHEMA, REGIONS_SCHEMA, PageSelection, Region, crop_box, parse_pages,
+    parse_regions
+)
+from core.sniff import IMAGE_TYPES, PDF, check_supported, sniff
+from technologies.tesseract_pool import TesseractPool
+from technologies.tesseract_tiles import (
+    DEFAULT_TILE_OVERLAP, DEFAULT_TILE_PIXELS, DEFAULT_TILE_SIZE, Box, Word,
+    parse_words, plan_tiles, stitch
+)
+
+# Optional dependencies are imported once with the module rather than on every
+# run, so the cost is paid when the technology is first loaded or warmed up.
+try:
+    import pdf2image
+    import pytesseract
+    from PIL import Image
+except ImportError as e:  # pragma: no cover - depends on the environment
+    pdf2image = pytesseract = Image = None
+    _IMPORT_ERROR = e
+else:
+    _IMPORT_ERROR = None
 
 logger = logging.getLogger(__name__)
 
+# Page size line of pdfinfo run on a range of pages, e.g.
+# "Page    3 size: 612 x 792 pts (letter)"
+_PAGE_SIZE_KEY = re.compile(r"Page\s+(\d+) size")
+_PAGE_SIZE_VALUE = re.compile(r"([\d.]+) x ([\d.]+)")
+
+# Consecutive PDF pages rasterized by one pdftoppm run
+DEFAULT_RASTERIZE_BATCH = 8
+
+
+def _done(result: Any) -> "asyncio.Future[Any]":
+    """Get a future that already has a result."""
+    future = asyncio.get_running_loop().create_future()
+    future.set_result(result)
+    return future
+
 
 class TesseractTechnology(BaseTechnology):
     """Tesseract OCR technology for extracting text from images and PDFs."""
     
+    # Pool of OCR worker processes, when ``ocr_workers`` is configured
+    _pool: Optional[TesseractPool] = None
+    # Tiles of large pages cropped and recognized at once, across jobs
+    _tile_slots: Optional[asyncio.Semaphore] = None
+    
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """Initialize the technology.
+        
+        Args:
+            config: Technology-specific settings from the configuration file
+        """
+        super().__init__(config)
+        allow_decoding(PixelBudget.from_config(self.config).max_decode_pixels)
+    
+    async def startup(self) -> None:
+        """Check the dependencies and the Tesseract binary once at startup."""
+        self._require_dependencies()
+        version = await to_thread(pytesseract.get_tesseract_version)
+        logger.info(f"Using Tesseract {version}")
+        self._get_pool()
+        await super().startup()
+    
+    async def shutdown(self) -> None:
+        """Stop the OCR worker processes."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+        self._tile_slots = None
+        await super().shutdown()
+    
+    def configure(self, config: Dict[str, Any]) -> None:
+        """Apply changed settings, resizing the OCR worker pool.
+        
+        Args:
+            config: The new technology-specific settings
+        """
+        super().configure(config)
+        self._tiling()
+        allow_decoding(PixelBudget.from_config(self.config).max_decode_pixels)
+        # Sized again to the new number of OCR workers when next needed
+        self._tile_slots = None
+        if self._pool is None:
+            return
+        workers = int(self.config.get("ocr_workers") or 0)
+        if workers:
+            self._pool.resize(workers, self.config.get("languages_per_worker"))
+            self._pool.max_pages, self._pool.max_rss = self._recycling()
+        else:
+            self._pool.close()
+            self._pool = None
+    
+    def _get_pool(self) -> Optional[TesseractPool]:
+        """Get the OCR worker pool, creating it on first use if configured.
+        
+        Returns:
+            Optional[TesseractPool]: The pool, or None to OCR in threads
+        """
+        workers = int(self.config.get("ocr_workers") or 0)
+        if self._pool is None and workers:
+            max_pages, max_rss = self._recycling()
+            self._pool = TesseractPool(
+                workers,
+                self.config.get("languages_per_worker") or 2,
+                max_pages=max_pages,
+                max_rss=max_rss
+            )
+        return self._pool
+    
+    def _get_tile_slots(self) -> asyncio.Semaphore:
+        """Get the limit on tiles recognized at once, creating it on first use.
+        
+        Returns:
+            asyncio.Semaphore: A slot per OCR worker, or per core without them
+        """
+        if self._tile_slots is None:
+            pool = self._get_pool()
+            self._tile_slots = asyncio.Semaphore(
+                pool.size if pool is not None else os.cpu_count() or 1
+            )
+        return self._tile_slots
+    
+    def _recycling(self) -> Tuple[Optional[int], Optional[int]]:
+        """Get when OCR workers are replaced by fresh processes.
+        
+        Returns:
+            Tuple[Optional[int], Optional[int]]: The pages a worker recognizes
+                and its resident memory in bytes before it is replaced, None
+                to keep it
+        """
+        max_pages = self.config.get("max_pages_per_worker") or None
+        max_rss_mb = self.config.get("max_worker_rss_mb") or None
+        return max_pages, int(max_rss_mb * 2 ** 20) if max_rss_mb else None
+    
+    def _tiling(self) -> Tuple[Optional[int], int, int]:
+        """Get when and how large pages are recognized in tiles.
+        
+        Returns:
+            Tuple[Optional[int], int, int]: The pixels above which a page is
+                tiled (None to never tile), the tile size and the overlap of
+                neighbouring tiles in pixels
+        
+        Raises:
+            ValueError: If the overlap isn't smaller than the tile size
+        """
+        overlap = self.config.get("tile_overlap")
+        tile_size = int(self.config.get("tile_size") or DEFAULT_TILE_SIZE)
+        tile_overlap = int(DEFAULT_TILE_OVERLAP if overlap is None else overlap)
+        if not 0 <= tile_overlap < tile_size:
+            raise ValueError("tile_overlap must be smaller than tile_size")
+        return (
+            self.config.get("tile_pixels", DEFAULT_TILE_PIXELS) or None,
+            tile_size,
+            tile_overlap
+        )
+    
     async def run(self, document: bytes, **params) -> ProcessingResult:
         """Process a document using Tesseract OCR.
         
         Args:
             document: The document content as bytes
             **params: Additional parameters for Tesseract
-            
+        
         Returns:
             ProcessingResult: The processing result
         """
         try:
-            # Lazy import to avoid requiring pytesseract for all users
-            import pytesseract
-            from PIL import Image
-            import io
-            import pdf2image
+            self._require_dependencies()
+            params = self.resolve_params(params)
             
             # Get parameters
             lang = params.get("lang", "eng")
             config = params.get("config", "")
+            selection = parse_pages(params.get("pages"))
+            regions = parse_regions(params.get("regions"))
+            
+            document_type = sniff(document)
+            check_supported(self.get_name(), document_type, self.get_supported_types())
             
-            # Check if document is PDF or image
+            # Check the pages against the page and pixel budgets before any is
+            # decoded; the budgets come from the settings, not the request
+            budget = PixelBudget.from_config(self.config, self._tiling()[0])
+            # Poppler reads PDFs from a file, which is written once per job
+            # rather than once per call
+            path = None
+            if document_type == PDF:
+                path = await to_thread(self._write_temp, document)
             try:
-                # Try to open as image
-                image = Image.open(io.BytesIO(document))
-                pages = [image]
-            except Exception:
-                # Try to convert PDF to images
-                pages = pdf2image.convert_from_bytes(document)
+                return await self._process(
+                    document, document_type, path, lang, config, selection, regions,
+                    budget
+                )
+            finally:
+                if path is not None:
+                    os.unlink(path)
+        
+        except Exception as e:
+            logger.error(f"Error processing document with Tesseract: {str(e)}")
+            raise
+    
+    async def _process(
+        self,
+        document: bytes,
+        document_type: str,
+        path: Optional[str],
+        lang: str,
+        config: str,
+        selection: Optional[PageSelection],
+        regions: Optional[List[Region]],
+        budget: PixelBudget
+    ) -> ProcessingResult:
+        """Rasterize or decode the pages of a document and recognize them.
+        
+        Args:
+            document: The document content as bytes
+            document_type: The detected document type
+            path: A temporary copy of a PDF, None for images
+            lang: The language set
+            config: Additional Tesseract configuration
+            selection: The pages to process, None for every page
+            regions: The regions to process on every page, None for the whole page
+            budget: The page and pixel budget of the job
+        
+        Returns:
+            ProcessingResult: The processing result
+        """
+        numbers = await to_thread(
+            self._page_numbers, path, document_type, selection, budget
+        )
+        sizes: Dict[int, PageSize] = {}
+        limited = budget.max_page_pixels or budget.tile_pixels
+        if document_type == PDF and numbers and limited:
+            sizes = await to_thread(self._page_sizes, path, numbers)
+        
+        pool = self._get_pool()
+        job = current_job()
+        tile_pixels, tile_size, tile_overlap = self._tiling()
+        tiled: Set[int] = set()
+        
+        def is_large(image: Any) -> bool:
+            return bool(tile_pixels) and image.width * image.height > tile_pixels
+        
+        async def ocr_tiles(image: Any) -> str:
+            # Tiles are recognized in parallel, in the OCR worker processes
+            # or in a thread per core, and only as many are cropped at once
+            boxes = plan_tiles(image.width, image.height, tile_size, tile_overlap)
+            slots = self._get_tile_slots()
+            
+            async def ocr_tile(box: Box) -> List[Word]:
+                async with slots:
+                    tile = await to_thread(image.crop, box)
+                    with metrics.stage(self.get_name(), "ocr_tile"):
+                        if pool is not None:
+                            tsv = await pool.recognize(tile, lang, config, tsv=True)
+                        else:
+                            tsv = await to_thread(
+                                pytesseract.image_to_data,
+                                tile,
+                                lang=lang,
+                                config=config,
+                            )
+                return parse_words(tsv, box, image.size)
             
-            # Process each page
-            chunks: List[DocumentChunk] = []
-            for i, page in enumerate(pages):
-                text = pytesseract.image_to_string(page, lang=lang, config=config)
-                chunks.append(DocumentChunk(
-                    text=text,
-                    page=i + 1,
-                    metadata={"page": i + 1}
-                ))
+            tiles = await asyncio.gather(*(ocr_tile(box) for box in boxes))
+            return await to_thread(stitch, [word for words in tiles for word in words])
+        
+        async def ocr_page(image: Any) -> str:
+            if is_large(image):
+                return await ocr_tiles(image)
+            with metrics.stage(self.get_name(), "ocr_page"):
+                if pool is not None:
+                    return await pool.recognize(image, lang, config)
+                return await to_thread(
+                    pytesseract.image_to_string, image, lang=lang, config=config
+                )
+        
+        # PDF pages are rasterized a few consecutive pages per pdftoppm run,
+        # so a stopped job doesn't rasterize the rest of the document. With
+        # OCR worker processes the next pages are rasterized while the
+        # previous ones are recognized, up to two pages per worker ahead.
+        in_flight = asyncio.Semaphore(2 * pool.size if pool is not None else 1)
+        
+        async def process_page(
+            number: int, page: Any, nbytes: int
+        ) -> List[DocumentChunk]:
+            # OCR only the requested regions of the page, in parallel when
+            # there are OCR worker processes
+            crops: List[Tuple[Optional[Region], Any]] = (
+                [(None, page)]
+                if regions is None
+                else [
+                    (region, page.crop(crop_box(region, *page.size)))
+                    for region in regions
+                ]
+            )
+            if any(is_large(image) for _, image in crops):
+                tiled.add(number)
+            try:
+                if pool is not None:
+                    texts = await asyncio.gather(
+                        *(ocr_page(image) for _, image in crops)
+                    )
+                else:
+                    texts = [await ocr_page(image) for _, image in crops]
+            finally:
+                in_flight.release()
+                if job is not None:
+                    job.free(nbytes)
             
-            # Create result
-            return ProcessingResult(
-                data=chunks,
-                technology_used=self.get_name(),
-                metadata={
-                    "num_pages": len(pages),
-                    "lang": lang
-                }
+            chunks = []
+            for (region, _), text in zip(crops, texts):
+                chunk_metadata: Dict[str, Any] = {"page": number}
+                if region is not None:
+                    chunk_metadata["region"] = list(region)
+                chunks.append(
+                    DocumentChunk(text=text, page=number, metadata=chunk_metadata)
+                )
+            # Keep the finished page in case the job runs out of time or
+            # is interrupted
+            if job is not None:
+                job.add_page(number, chunks)
+            return chunks
+        
+        # Decoding and OCR block, so they run in worker threads to keep
+        # the event loop responsive while jobs are running
+        tasks: Dict[int, "asyncio.Future[List[DocumentChunk]]"] = {}
+        reused = 0
+        pending: List[Tuple[int, int]] = []
+        for number in numbers:
+            resumed = job.resumed_page(number) if job is not None else None
+            if resumed is not None:
+                # Done before the job was interrupted
+                tasks[number] = _done(resumed)
+                reused += 1
+            elif document_type == PDF:
+                pending.append((number, budget.pdf_dpi(number, sizes.get(number))))
+            else:
+                pending.append((number, DEFAULT_DPI))
+        try:
+            for batch, dpi in self._batches(pending):
+                images = await to_thread(
+                    self._load_pages, document, path, document_type, batch, budget, dpi
+                )
+                for number, page in zip(batch, images):
+                    nbytes = image_bytes(page)
+                    if job is not None:
+                        job.allocate(nbytes)
+                    await in_flight.acquire()
+                    tasks[number] = asyncio.ensure_future(
+                        process_page(number, page, nbytes)
+                    )
+                    if pool is None:
+                        await tasks[number]
+                if len(images) < len(batch):
+                    # Past the last page of the document
+                    break
+            pages = await asyncio.gather(
+                *(tasks[number] for number in numbers if number in tasks)
             )
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+        chunks = [chunk for page_chunks in pages for chunk in page_chunks]
+        
+        metrics.pages_processed.inc(len(pages) - reused, technology=self.get_name())
+        
+        # Create result
+        metadata: Dict[str, Any] = {
+            "num_pages": len(pages),
+            "lang": lang
+        }
+        if selection is not None:
+            metadata["pages"] = selection.to_list()
+        if regions is not None:
+            metadata["regions"] = [list(region) for region in regions]
+        if budget.downscaled:
+            metadata["downscaled_pages"] = sorted(budget.downscaled)
+        if tiled:
+            metadata["tiled_pages"] = sorted(tiled)
+        return ProcessingResult(
+            data=chunks,
+            technology_used=self.get_name(),
+            metadata=metadata
+        )
+    
+    @staticmethod
+    def _write_temp(document: bytes) -> str:
+        """Write a document to a temporary file.
+        
+        Args:
+            document: The document content as bytes
+        
+        Returns:
+            str: The path of the file, to be removed by the caller
+        """
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as file:
+            file.write(document)
+        return file.name
+    
+    def _batches(
+        self, pending: List[Tuple[int, int]]
+    ) -> Iterator[Tuple[List[int], int]]:
+        """Group the pages to rasterize into runs of consecutive pages.
+        
+        Args:
+            pending: The page numbers and resolutions, in order
+        
+        Yields:
+            Tuple[List[int], int]: Consecutive page numbers rasterized at the
+                same resolution, and that resolution
+        """
+        size = int(
+            self.config.get("rasterize_batch_pages") or DEFAULT_RASTERIZE_BATCH
+        )
+        batch: List[int] = []
+        batch_dpi = DEFAULT_DPI
+        for number, dpi in pending:
+            if batch and (
+                len(batch) == size or number != batch[-1] + 1 or dpi != batch_dpi
+            ):
+                yield batch, batch_dpi
+                batch = []
+            batch.append(number)
+            batch_dpi = dpi
+        if batch:
+            yield batch, batch_dpi
+    
+    @staticmethod
+    def _page_numbers(
+        path: Optional[str],
+        document_type: str,
+        selection: Optional[PageSelection] = None,
+        budget: Optional[PixelBudget] = None
+    ) -> List[int]:
+        """Get the numbers of the pages to process.
+        
+        Args:
+            path: The path of the PDF, None for images
+            document_type: The detected document type
+            selection: The pages to process, None for every page
+            budget: The page budget of the job
+        
+        Returns:
+            List[int]: The page numbers, in order
+        
+        Raises:
+            DocumentTooLargeError: If there are more pages than the budget allows
+        """
+        if document_type != PDF:
+            return [1] if selection is None or 1 in selection else []
+        
+        # The selection comes from the request, so it is only expanded up to
+        # the pages the document has
+        num_pages = int(pdf2image.pdfinfo_from_path(path)["Pages"])
+        numbers = (
+            list(range(1, num_pages + 1)) if selection is None
+            else selection.pages(num_pages)
+        )
+        if budget is not None:
+            budget.check_pages(len(numbers))
+        return numbers
+    
+    @staticmethod
+    def _page_sizes(path: str, numbers: List[int]) -> Dict[int, PageSize]:
+        """Get the sizes of PDF pages without rasterizing them.
+        
+        Args:
+            path: The path of the PDF
+            numbers: The page numbers, in order
+        
+        Returns:
+            Dict[int, PageSize]: The width and height in points by page number,
+                for the pages pdfinfo reports
+        """
+        info = pdf2image.pdfinfo_from_path(
+            path, first_page=numbers[0], last_page=numbers[-1]
+        )
+        sizes: Dict[int, PageSize] = {}
+        for key, value in info.items():
+            key_match = _PAGE_SIZE_KEY.fullmatch(str(key).strip())
+            value_match = _PAGE_SIZE_VALUE.match(str(value))
+            if key_match and value_match:
+                sizes[int(key_match.group(1))] = (
+                    float(value_match.group(1)), float(value_match.group(2))
+                )
+        return sizes
+    
+    def _load_pages(
+        self,
+        document: bytes,
+        path: Optional[str],
+        document_type: str,
+        numbers: List[int],
+        budget: Optional[PixelBudget] = None,
+        dpi: int = DEFAULT_DPI
+    ) -> List[Any]:
+        """Decode consecutive pages of a document into images.
+        
+        Args:
+            document: The document content as bytes
+            path: The path of the PDF, None for images
+            document_type: The detected document type
+            numbers: Consecutive page numbers, counting from 1
+            budget: The pixel budget the pages are decoded within
+            dpi: The resolution to rasterize PDF pages at
+        
+        Returns:
+            List[Any]: The page images, fewer than the numbers if the document
+                ends before the last of them
+        
+        Raises:
+            DocumentTooLargeError: If an image is too large to decode
+        """
+        if document_type == PDF:
+            options: Dict[str, Any] = {
+                "first_page": numbers[0], "last_page": numbers[-1]
+            }
+            if dpi != DEFAULT_DPI:
+                options["dpi"] = dpi
+            with metrics.stage(self.get_name(), "rasterize"):
+                images = pdf2image.convert_from_path(path, **options)
+            # A page whose size pdfinfo didn't report is downscaled afterwards
+            return [
+                budget.fit(image, number) if budget is not None else image
+                for number, image in zip(numbers, images)
+            ]
+        
+        with metrics.stage(self.get_name(), "decode"):
+            try:
+                image = Image.open(io.BytesIO(document))
+            except Image.DecompressionBombError as e:
+                raise DocumentTooLargeError(str(e))
+            return [budget.load(image, numbers[0]) if budget is not None else image]
+    
+    @staticmethod
+    def _require_dependencies() -> None:
+        """Make sure the optional dependencies are installed.
         
-        except ImportError as e:
-            logger.error(f"Required package not installed: {str(e)}")
+        Raises:
+            RuntimeError: If a required package is not installed
+        """
+        if _IMPORT_ERROR is not None:
+            logger.error(f"Required package not installed: {str(_IMPORT_ERROR)}")
             raise RuntimeError(
-                f"Required package not installed: {str(e)}. "
+                f"Required package not installed: {str(_IMPORT_ERROR)}. "
                 f"Please install pytesseract, pillow, and pdf2image."
             )
+    
+    @classmethod
+    def get_supported_types(cls) -> FrozenSet[str]:
+        """Get the document types Tesseract can process.
         
-        except Exception as e:
-            logger.error(f"Error processing document with Tesseract: {str(e)}")
-            raise
+        Returns:
+            FrozenSet[str]: PDFs and raster images
+        """
+        return IMAGE_TYPES | {PDF}
+    
+    @classmethod
+    def splits_pages(cls) -> bool:
+        """Tell whether every chunk has its page number.
+        
+        Returns:
+            bool: Always True, there is a chunk per page or region of a page
+        """
+        return True
     
     @classmethod
     def get_param_schema(cls) -> Dict[str, Any]:
@@ -91,9 +604,11 @@ class TesseractTechnology(BaseTechnology):
                 "type": "string",
                 "description": "Additional Tesseract configuration",
                 "default": ""
-            }
+            },
+            "pages": PAGES_SCHEMA,
+            "regions": REGIONS_SCHEMA
         }
 
 
 # Register the technology
-TechnologyFactory.register(TesseractTechnology)
\ No newline at end of file
+TechnologyFactory.register(TesseractTechnology)
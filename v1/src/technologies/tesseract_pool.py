@@ -0,0 +1,578 @@
+"""Pool of OCR worker processes with language affinity.
+
+Loading the traineddata of a language is a large part of the cost of OCR with
+a fresh engine. Each worker process keeps engines for up to
+``max_languages`` language sets resident (with ``tesserocr``), unloading the
+least recently used one when another is needed, and the pool routes each page
+to a worker that already has its language set loaded.
+
+Without ``tesserocr`` the workers fall back to ``pytesseract``, which starts a
+Tesseract process per page, so nothing stays resident but pages of different
+jobs are still recognized in parallel.
+
+Long-lived workers grow from heap fragmentation, so a worker is replaced by a
+fresh process after ``max_pages`` pages or once its resident memory reaches
+``max_rss`` bytes.
+
+Pages are handed to the workers as raw pixels in a shared memory segment
+rather than pickled through the executor's pipe, which would copy each bitmap
+several times. The server copies the decoded pixels once, straight into the
+segment, and the worker maps the segment into an image without copying it.
+RGB pages travel as RGBX, which is how Pillow holds them in memory, and are
+converted back in the worker, as Tesseract can't read RGBX. The server
+unlinks the segment as soon as the page is done.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from core import metrics
+
+try:
+    import tesserocr
+except ImportError:  # pragma: no cover - depends on the environment
+    tesserocr = None
+
+try:
+    import pytesseract
+except ImportError:  # pragma: no cover - depends on the environment
+    pytesseract = None
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # pragma: no cover - depends on the platform
+    shared_memory = None
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - depends on the environment
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+# Engines resident in this worker process by language set, least recently used first
+_engines: "OrderedDict[str, Any]" = OrderedDict()
+
+# Image modes shared through shared memory, with the mode Pillow maps the
+# segment as without copying it and the bytes per pixel in that mode. Pages in
+# other modes are pickled
+_SHARED_MODES: Dict[str, Tuple[str, int]] = {
+    "L": ("L", 1),
+    "I;16": ("I;16", 2),
+    "RGB": ("RGBX", 4),
+    "RGBA": ("RGBA", 4),
+    "RGBX": ("RGBX", 4),
+    "CMYK": ("CMYK", 4),
+}
+
+# Directory backing POSIX shared memory, checked for room before a page is copied
+_SHM_DIRECTORY = "/dev/shm"
+
+
+class SharedPage:
+    """Descriptor of a page image in a shared memory segment."""
+    
+    def __init__(self, name: str, mode: str, size: Tuple[int, int], dpi: Any = None):
+        """Initialize the descriptor.
+        
+        Args:
+            name: Name of the shared memory segment
+            mode: The image mode, e.g. "RGB"
+            size: Width and height of the image in pixels
+            dpi: Resolution of the image, if known
+        """
+        self.name = name
+        self.mode = mode
+        self.size = size
+        self.dpi = dpi
+
+
+def _shm_has_room(nbytes: int) -> bool:
+    """Check that shared memory has room for a segment.
+    
+    Writing past the size of ``/dev/shm`` (64 MB in a default Docker
+    container) kills the process with SIGBUS instead of raising an error.
+    """
+    try:
+        stats = os.statvfs(_SHM_DIRECTORY)
+    except (AttributeError, OSError):
+        # Not backed by a filesystem, e.g. on Windows or macOS
+        return True
+    return stats.f_bavail * stats.f_frsize >= nbytes
+
+
+def _map_segment(segment: Any, mode: str, size: Tuple[int, int]) -> Any:
+    """Map an image onto a shared memory segment, without copying it."""
+    shared_mode = _SHARED_MODES[mode][0]
+    return Image.frombuffer(shared_mode, size, segment.buf, "raw", shared_mode, 0, 1)
+
+
+@contextmanager
+def share_image(image: Any) -> Iterator[Any]:
+    """Copy the pixels of an image into shared memory for a worker process.
+    
+    The pixels are copied once, straight into the segment. The segment is
+    unlinked when the block ends, so it is released once the page is done even
+    if the job is cancelled while the worker reads it.
+    
+    Args:
+        image: The page image
+    
+    Yields:
+        Any: A SharedPage describing the segment, or the image itself if it
+            can't be shared and has to be pickled
+    """
+    if shared_memory is None or getattr(image, "mode", None) not in _SHARED_MODES:
+        yield image
+        return
+    
+    nbytes = image.width * image.height * _SHARED_MODES[image.mode][1]
+    if not nbytes or not _shm_has_room(nbytes):
+        yield image
+        return
+    
+    try:
+        segment = shared_memory.SharedMemory(create=True, size=nbytes)
+    except OSError as e:
+        logger.warning(f"Sending page through a pipe, no shared memory: {str(e)}")
+        yield image
+        return
+    
+    try:
+        image.load()
+        target = _map_segment(segment, image.mode, image.size)
+        try:
+            # Pasting into the core image writes through the mapping, where
+            # Image.paste would copy the read-only mapped image first. RGB and
+            # RGBX pixels have the same layout, so RGB pages paste as they are
+            target.im.paste(image.im, (0, 0) + image.size)
+        finally:
+            # Drops the image's view of the segment, which must go before it closes
+            target.close()
+        yield SharedPage(segment.name, image.mode, image.size, image.info.get("dpi"))
+    finally:
+        segment.close()
+        segment.unlink()
+
+
+@contextmanager
+def _open_page(page: Any) -> Iterator[Any]:
+    """Map a page shared by the server process into an image, in a worker.
+    
+    Args:
+        page: A SharedPage, or an image sent through the pipe
+    
+    Yields:
+        Any: The page image, valid until the block ends
+    """
+    if not isinstance(page, SharedPage):
+        yield page
+        return
+    
+    segment = shared_memory.SharedMemory(name=page.name)
+    try:
+        image = _map_segment(segment, page.mode, page.size)
+        if image.mode != page.mode:
+            # Tesseract reads RGB but not RGBX, so this one is copied
+            mapped = image
+            try:
+                image = mapped.convert(page.mode)
+            finally:
+                mapped.close()
+        if page.dpi is not None:
+            image.info["dpi"] = page.dpi
+        try:
+            yield image
+        finally:
+            # Drops the image's view of the segment, which must go before it closes
+            image.close()
+    finally:
+        segment.close()
+
+
+def _rss() -> int:
+    """Get the resident memory of the current process in bytes, 0 if unknown."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is not None:
+        # Peak rather than current memory, in kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return 0
+
+
+def recognize(
+    page: Any,
+    lang: str,
+    config: str,
+    max_languages: int,
+    tsv: bool = False
+) -> Tuple[str, int, bool]:
+    """Recognize the text of an image, in a worker process.
+    
+    Args:
+        page: The page image, or a SharedPage describing it
+        lang: The language set, e.g. "eng" or "eng+deu"
+        config: Additional Tesseract configuration
+        max_languages: Number of language sets to keep resident
+        tsv: Whether to return Tesseract's TSV output, with the box of every
+            word, instead of the text
+    
+    Returns:
+        Tuple[str, int, bool]: The recognized text, the resident memory of the
+            worker process in bytes and whether the engine of the language set
+            stays loaded for later pages
+    """
+    try:
+        with _open_page(page) as image:
+            if tesserocr is None or config:
+                # Command line configuration is only understood by the binary
+                ocr = pytesseract.image_to_data if tsv else pytesseract.image_to_string
+                return ocr(image, lang=lang, config=config), _rss(), False
+            
+            engine = _engines.pop(lang, None)
+            if engine is None:
+                while _engines and len(_engines) >= max_languages:
+                    _, unloaded = _engines.popitem(last=False)
+                    unloaded.End()
+                engine = tesserocr.PyTessBaseAPI(lang=lang)
+            _engines[lang] = engine
+            
+            engine.SetImage(image)
+            text = engine.GetTSVText(0) if tsv else engine.GetUTF8Text()
+            return text, _rss(), True
+    except Exception as e:
+        # Not every exception survives the trip back to the server process
+        raise RuntimeError(f"{type(e).__name__}: {str(e)}") from None
+
+
+class OcrWorker:
+    """One OCR worker process and the language sets resident in it."""
+    
+    def __init__(self, index: int, max_languages: int):
+        """Initialize the worker.
+        
+        The process is started when the first page is sent to it.
+        
+        Args:
+            index: Number of the worker in the pool
+            max_languages: Number of language sets to keep resident
+        """
+        self.index = index
+        self.max_languages = max_languages
+        self.executor = ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        )
+        # Mirror of the worker's resident engines, least recently used first
+        self.languages: "OrderedDict[str, None]" = OrderedDict()
+        self.busy = False
+        self.retired = False
+        self.pages = 0
+        # Resident memory of the process after its last page, in bytes
+        self.rss = 0
+    
+    def is_resident(self, lang: str) -> bool:
+        """Check whether a language set is loaded in the worker."""
+        return lang in self.languages
+    
+    def use(self, lang: str) -> None:
+        """Record that a page of a language set is sent to the worker.
+        
+        Follows the unloading order of ``recognize`` in the worker process.
+        
+        Args:
+            lang: The language set
+        """
+        if lang in self.languages:
+            self.languages.move_to_end(lang)
+            return
+        while self.languages and len(self.languages) >= self.max_languages:
+            self.languages.popitem(last=False)
+        self.languages[lang] = None
+    
+    def close(self) -> None:
+        """Stop the worker process once its current page is done."""
+        self.executor.shutdown(wait=False)
+
+
+class _Waiter:
+    """A page waiting for a free worker."""
+    
+    def __init__(self, lang: str, future: asyncio.Future):
+        self.lang = lang
+        self.future = future
+        # Number of times a later page with a resident language went first
+        self.skipped = 0
+
+
+class TesseractPool:
+    """Routes pages to OCR worker processes that have their language loaded.
+    
+    Each worker recognizes one page at a time. A page goes to an idle worker
+    with its language set resident if there is one, otherwise to the idle
+    worker that has to unload the least. When every worker is busy, pages wait,
+    and a worker that becomes free takes the oldest waiting page of a resident
+    language; the oldest page is taken regardless once it was passed over
+    ``max_skips`` times, so no language starves.
+    
+    A worker that recognized ``max_pages`` pages or whose resident memory
+    reached ``max_rss`` bytes is replaced once its page is done.
+    """
+    
+    def __init__(
+        self,
+        workers: int,
+        max_languages: int = 2,
+        max_skips: int = 4,
+        max_pages: Optional[int] = None,
+        max_rss: Optional[int] = None
+    ):
+        """Initialize the pool.
+        
+        Args:
+            workers: Number of worker processes
+            max_languages: Number of language sets each worker keeps resident
+            max_skips: Times a waiting page may be passed over for affinity
+            max_pages: Pages a worker recognizes before it is replaced, None
+                to keep it
+            max_rss: Resident memory in bytes at which a worker is replaced,
+                None to keep it
+        """
+        self.max_languages = max(1, max_languages)
+        self.max_skips = max_skips
+        self.max_pages = max_pages
+        self.max_rss = max_rss
+        self._workers: List[OcrWorker] = []
+        self._waiters: Deque[_Waiter] = deque()
+        self._next_index = 0
+        self.resize(workers, max_languages)
+    
+    @property
+    def size(self) -> int:
+        """Number of worker processes."""
+        return len(self._workers)
+    
+    async def recognize(
+        self,
+        image: Any,
+        lang: str,
+        config: str = "",
+        tsv: bool = False
+    ) -> str:
+        """Recognize the text of a page in a worker process.
+        
+        Args:
+            image: The page image
+            lang: The language set
+            config: Additional Tesseract configuration
+            tsv: Whether to return Tesseract's TSV output with word boxes
+        
+        Returns:
+            str: The recognized text, or the TSV output
+        """
+        worker = self._idle_worker(lang)
+        if worker is None:
+            future = asyncio.get_running_loop().create_future()
+            waiter = _Waiter(lang, future)
+            self._waiters.append(waiter)
+            try:
+                worker = await future
+            except BaseException:
+                if future.done() and not future.cancelled():
+                    self._release(future.result())
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+                raise
+        
+        try:
+            resident = worker.is_resident(lang)
+            worker.pages += 1
+            text, kept = await self._execute(worker, image, lang, config, tsv)
+            if kept:
+                # Only engines kept by tesserocr stay loaded, the binary
+                # loads the language set for every page
+                metrics.record_cache_lookup("ocr_language", resident)
+                worker.use(lang)
+            return text
+        except BrokenProcessPool:
+            # The worker process died (e.g. killed for its memory), replace it
+            logger.error(f"OCR worker {worker.index} died, starting a new one")
+            metrics.ocr_workers_recycled.inc(reason="died")
+            self._replace(worker)
+            raise
+        finally:
+            reason = self._recycle_reason(worker)
+            if reason is not None:
+                logger.info(
+                    f"Recycling OCR worker {worker.index} after {worker.pages} page(s) "
+                    f"at {worker.rss // 2 ** 20} MiB ({reason})"
+                )
+                metrics.ocr_workers_recycled.inc(reason=reason)
+                self._replace(worker)
+            self._release(worker)
+    
+    async def _execute(
+        self,
+        worker: OcrWorker,
+        image: Any,
+        lang: str,
+        config: str,
+        tsv: bool = False
+    ) -> Tuple[str, bool]:
+        """Run the recognition of a page in a worker process.
+        
+        Returns:
+            Tuple[str, bool]: The recognized text and whether the worker kept
+                the engine of the language set loaded
+        """
+        with share_image(image) as page:
+            text, worker.rss, kept = await asyncio.get_running_loop().run_in_executor(
+                worker.executor,
+                recognize,
+                page,
+                lang,
+                config,
+                worker.max_languages,
+                tsv,
+            )
+        return text, kept
+    
+    def _recycle_reason(self, worker: OcrWorker) -> Optional[str]:
+        """Tell why a worker should be replaced by a fresh process, if it should."""
+        if worker.retired:
+            return None
+        if self.max_pages and worker.pages >= self.max_pages:
+            return "pages"
+        if self.max_rss and worker.rss >= self.max_rss:
+            return "memory"
+        return None
+    
+    def _idle_worker(self, lang: str) -> Optional[OcrWorker]:
+        """Claim the best idle worker for a language set, if any."""
+        idle = [worker for worker in self._workers if not worker.busy]
+        if not idle:
+            return None
+        
+        resident = [worker for worker in idle if worker.is_resident(lang)]
+        if resident:
+            worker = resident[0]
+        else:
+            # Prefer a worker with room for another language set
+            worker = min(
+                idle,
+                key=lambda w: (len(w.languages) >= w.max_languages, len(w.languages))
+            )
+        worker.busy = True
+        return worker
+    
+    def _release(self, worker: OcrWorker) -> None:
+        """Hand a worker to a waiting page or mark it idle."""
+        worker.busy = False
+        if worker.retired:
+            worker.close()
+            return
+        
+        # Drop pages whose job was cancelled while waiting
+        while self._waiters and self._waiters[0].future.done():
+            self._waiters.popleft()
+        if not self._waiters:
+            return
+        
+        oldest = self._waiters[0]
+        chosen = oldest
+        if oldest.skipped < self.max_skips and not worker.is_resident(oldest.lang):
+            for waiter in self._waiters:
+                if not waiter.future.done() and worker.is_resident(waiter.lang):
+                    chosen = waiter
+                    break
+        
+        if chosen is not oldest:
+            oldest.skipped += 1
+        self._waiters.remove(chosen)
+        worker.busy = True
+        chosen.future.set_result(worker)
+    
+    def _add_worker(self) -> None:
+        """Start a new worker, which can take a waiting page right away."""
+        worker = OcrWorker(self._next_index, self.max_languages)
+        self._next_index += 1
+        self._workers.append(worker)
+        worker.busy = True
+        self._release(worker)
+    
+    def _replace(self, worker: OcrWorker) -> None:
+        """Retire a worker and start a new one in its place."""
+        if worker in self._workers:
+            self._workers.remove(worker)
+            worker.retired = True
+            self._add_worker()
+    
+    def resize(self, workers: int, max_languages: Optional[int] = None) -> None:
+        """Change the number of workers without interrupting pages in progress.
+        
+        Workers removed from the pool finish their current page first.
+        
+        Args:
+            workers: Number of worker processes
+            max_languages: Number of language sets each worker keeps resident
+        """
+        if max_languages is not None:
+            self.max_languages = max(1, max_languages)
+            for worker in self._workers:
+                worker.max_languages = self.max_languages
+        
+        while len(self._workers) < workers:
+            self._add_worker()
+        
+        while len(self._workers) > max(workers, 0):
+            # Retire idle workers first
+            worker = min(self._workers, key=lambda w: w.busy)
+            self._workers.remove(worker)
+            worker.retired = True
+            if not worker.busy:
+                worker.close()
+    
+    def stats(self) -> List[Dict[str, Any]]:
+        """Get the state of every worker.
+        
+        Returns:
+            List[Dict[str, Any]]: Resident languages, busy flag, pages done and
+                resident memory
+        """
+        return [
+            {
+                "worker": worker.index,
+                "languages": list(worker.languages),
+                "busy": worker.busy,
+                "pages": worker.pages,
+                "rss": worker.rss,
+            }
+            for worker in self._workers
+        ]
+    
+    def close(self) -> None:
+        """Stop every worker process."""
+        for worker in self._workers:
+            worker.retired = True
+            worker.close()
+        self._workers = []
+        for waiter in self._waiters:
+            if not waiter.future.done():
+                waiter.future.cancel()
+        self._waiters.clear()
@@ -0,0 +1,221 @@
+"""Tiling of very large page images for OCR.
+
+Tesseract recognizes a page on a single core, and a scanned drawing or map of
+hundreds of megapixels takes minutes. Such pages are split into overlapping
+tiles that are recognized in parallel, with the position of every word, and
+the words are stitched back into lines in reading order.
+
+A word cut by the edge of a tile is whole in the neighbouring tile, as long as
+the overlap is wider than the word, and a word in the overlap is recognized by
+both tiles. Of words that cover each other, only the one farthest from the
+edges of its tile is kept.
+"""
+
+import math
+from collections import defaultdict
+from typing import DefaultDict, List, Optional, Tuple
+
+# Left, top, right and bottom of a box in pixels
+Box = Tuple[int, int, int, int]
+
+# Default pixels above which a page is recognized in tiles, below the default
+# pixel budget of a page so that large pages are tiled rather than downscaled
+DEFAULT_TILE_PIXELS = 16_000_000
+
+# Default width and height of a tile in pixels
+DEFAULT_TILE_SIZE = 4096
+
+# Default pixels neighbouring tiles share, wider than the widest expected word
+DEFAULT_TILE_OVERLAP = 400
+
+# Share of a word's box covered by a more central word that makes it a duplicate
+_DUPLICATE_COVERAGE = 0.5
+
+# Size of the cells of the grid used to find words covering each other
+_CELL = 256
+
+# Level of word rows in Tesseract's TSV output
+_WORD_LEVEL = "5"
+
+
+class Word:
+    """A word recognized in a tile, with its box on the page."""
+    
+    def __init__(self, text: str, box: Box, tile: Box, margin: float):
+        """Initialize the word.
+        
+        Args:
+            text: The text of the word
+            box: The box of the word on the page
+            tile: The box of the tile it was recognized in
+            margin: Distance from the word to the nearest edge of its tile that
+                is inside the page, infinite if the tile is the whole page
+        """
+        self.text = text
+        self.box = box
+        self.tile = tile
+        self.margin = margin
+    
+    @property
+    def height(self) -> int:
+        """Height of the word's box."""
+        return self.box[3] - self.box[1]
+    
+    @property
+    def middle(self) -> float:
+        """Vertical center of the word's box."""
+        return (self.box[1] + self.box[3]) / 2
+
+
+def _spans(length: int, tile_size: int, overlap: int) -> List[Tuple[int, int]]:
+    """Split a length into overlapping spans of at most ``tile_size``."""
+    if length <= tile_size:
+        return [(0, length)]
+    count = math.ceil((length - overlap) / (tile_size - overlap))
+    step = (length - overlap) / count
+    return [
+        (round(index * step), min(length, round((index + 1) * step + overlap)))
+        for index in range(count)
+    ]
+
+
+def plan_tiles(width: int, height: int, tile_size: int, overlap: int) -> List[Box]:
+    """Split a page into overlapping tiles of equal size.
+    
+    Args:
+        width: Width of the page in pixels
+        height: Height of the page in pixels
+        tile_size: Largest width and height of a tile
+        overlap: Pixels neighbouring tiles share
+    
+    Returns:
+        List[Box]: The boxes of the tiles, row by row
+    
+    Raises:
+        ValueError: If the overlap leaves no room for the tiles to advance
+    """
+    if not 0 <= overlap < tile_size:
+        raise ValueError("Tile overlap must be smaller than the tile size")
+    return [
+        (left, top, right, bottom)
+        for top, bottom in _spans(height, tile_size, overlap)
+        for left, right in _spans(width, tile_size, overlap)
+    ]
+
+
+def parse_words(tsv: str, tile: Box, size: Tuple[int, int]) -> List[Word]:
+    """Read the words of a tile from Tesseract's TSV output.
+    
+    Args:
+        tsv: The TSV output for the tile, with or without its header row
+        tile: The box of the tile on the page
+        size: Width and height of the page
+    
+    Returns:
+        List[Word]: The words, with their boxes moved onto the page
+    """
+    width, height = size
+    words = []
+    for row in tsv.splitlines():
+        fields = row.split("\t")
+        if len(fields) < 12 or fields[0] != _WORD_LEVEL or not fields[11].strip():
+            continue
+        left, top, box_width, box_height = (int(value) for value in fields[6:10])
+        box = (
+            tile[0] + left, tile[1] + top,
+            tile[0] + left + box_width, tile[1] + top + box_height
+        )
+        # Only edges shared with another tile can cut a word
+        edges = []
+        if tile[0] > 0:
+            edges.append(box[0] - tile[0])
+        if tile[1] > 0:
+            edges.append(box[1] - tile[1])
+        if tile[2] < width:
+            edges.append(tile[2] - box[2])
+        if tile[3] < height:
+            edges.append(tile[3] - box[3])
+        words.append(Word(fields[11].strip(), box, tile, min(edges, default=math.inf)))
+    return words
+
+
+def _cells(box: Box) -> List[Tuple[int, int]]:
+    """Get the grid cells a box touches."""
+    return [
+        (column, row)
+        for row in range(box[1] // _CELL, box[3] // _CELL + 1)
+        for column in range(box[0] // _CELL, box[2] // _CELL + 1)
+    ]
+
+
+def _coverage(box: Box, other: Box) -> float:
+    """Get the share of a box covered by another box."""
+    width = min(box[2], other[2]) - max(box[0], other[0])
+    height = min(box[3], other[3]) - max(box[1], other[1])
+    if width <= 0 or height <= 0:
+        return 0.0
+    area = max(1, (box[2] - box[0]) * (box[3] - box[1]))
+    return width * height / area
+
+
+def deduplicate(words: List[Word]) -> List[Word]:
+    """Drop words recognized twice in the overlap of neighbouring tiles.
+    
+    Words are kept from the one farthest from the edges of its tile inward,
+    so of a word cut by one tile and whole in the next, the whole one is kept.
+    
+    Args:
+        words: The words of every tile
+    
+    Returns:
+        List[Word]: The words that aren't covered by a more central word
+    """
+    kept: List[Word] = []
+    grid: DefaultDict[Tuple[int, int], List[Word]] = defaultdict(list)
+    for word in sorted(words, key=lambda w: w.margin, reverse=True):
+        cells = _cells(word.box)
+        if any(
+            other.tile != word.tile
+            and _coverage(word.box, other.box) > _DUPLICATE_COVERAGE
+            for cell in cells
+            for other in grid.get(cell, ())
+        ):
+            continue
+        kept.append(word)
+        for cell in cells:
+            grid[cell].append(word)
+    return kept
+
+
+def stitch(words: List[Word]) -> str:
+    """Join the words of every tile of a page into its text.
+    
+    Words whose vertical centers are within half a word height form a line,
+    read left to right, and lines are read top to bottom, with an empty line
+    where the gap between lines is taller than a line.
+    
+    Args:
+        words: The words of every tile
+    
+    Returns:
+        str: The text of the page
+    """
+    lines: List[List[Word]] = []
+    for word in sorted(deduplicate(words), key=lambda w: w.middle):
+        if lines and word.middle - lines[-1][0].middle <= lines[-1][0].height / 2:
+            lines[-1].append(word)
+        else:
+            lines.append([word])
+    
+    text: List[str] = []
+    previous_bottom: Optional[int] = None
+    for line in lines:
+        top = min(word.box[1] for word in line)
+        height = max(word.height for word in line)
+        if previous_bottom is not None and top - previous_bottom > height:
+            text.append("")
+        text.append(
+            " ".join(word.text for word in sorted(line, key=lambda w: w.box[0]))
+        )
+        previous_bottom = max(word.box[3] for word in line)
+    return "\n".join(text)
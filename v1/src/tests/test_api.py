@@ -31,6 +31,14 @@ def test_api_status(client):
     assert response.json() == {"status": "running"}
 
 
+def test_metrics(client):
+    """Test the metrics endpoint."""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE document_reader_stage_duration_seconds histogram" in response.text
+
+
 @patch("core.factory.TechnologyFactory.get_technology")
 @patch("core.result_handler.ResultHandler.save_result")
 async def test_run_document_processing(mock_save_result, mock_get_technology, client):
@@ -97,4 +105,564 @@ async def test_get_result(mock_get_result, client):
     assert response.json()["status"] == "completed"
     
     # Check that the result handler was called correctly
-    mock_get_result.assert_called_once_with("test-job-id")
\ No newline at end of file
+    mock_get_result.assert_called_once_with("test-job-id")
+
+
+def test_run_records_timings_and_profile(client, tmp_path, monkeypatch):
+    """Test that a job records stage timings and can be profiled on demand."""
+    import time
+    
+    from config.settings import settings
+    from core import metrics
+    from core.base import BaseTechnology
+    from core.context import to_thread
+    from core.factory import TechnologyFactory
+    from core.result_handler import ResultHandler
+    
+    class SlowTechnology(BaseTechnology):
+        """Technology that spends some time in a worker thread."""
+        
+        async def run(self, document: bytes, **params) -> ProcessingResult:
+            with metrics.stage(self.get_name(), "ocr_page"):
+                await to_thread(time.sleep, 0.05)
+            return ProcessingResult(data="done", technology_used=self.get_name())
+    
+    monkeypatch.setattr(settings, "output_directory", str(tmp_path))
+    TechnologyFactory.register(SlowTechnology)
+    
+    response = client.post(
+        "/api/v1/run?profile=true",
+        files={"file": ("test.pdf", io.BytesIO(b"test content"), "application/pdf")},
+        data={"technology": "slow"}
+    )
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    
+    result = ResultHandler().get_result(job_id).result
+    timings = result.metadata["timings"]
+    assert timings["ocr_page"]["count"] == 1
+    assert timings["ocr_page"]["seconds"] >= 0.05
+    assert {"upload_read", "persist"} <= set(timings)
+    
+    assert result.metadata["profile"]["file"] == "profile.folded"
+    assert (tmp_path / job_id / "profile.folded").exists()
+    assert (tmp_path / job_id / "profile.json").exists()
+
+
+def test_get_result_reports_job_status(client, tmp_path, monkeypatch):
+    """Test that jobs without a result are answered with their shared status."""
+    from config.settings import settings
+    from core.job_store import FAILED, QUEUED, JobStore
+    
+    monkeypatch.setattr(settings, "output_directory", str(tmp_path))
+    # A job submitted to another worker process
+    JobStore().create("queued-job", "tesseract", "test.pdf", status=QUEUED)
+    
+    response = client.get("/api/v1/results/queued-job")
+    assert response.status_code == 202
+    assert response.json() == {
+        "job_id": "queued-job",
+        "status": "queued",
+        "error": None,
+    }
+    
+    JobStore().update("queued-job", FAILED, "OCR failed")
+    response = client.get("/api/v1/results/queued-job")
+    assert response.status_code == 200
+    assert response.json()["status"] == "failed"
+    assert response.json()["error"] == "OCR failed"
+    
+    assert client.get("/api/v1/results/unknown-job").status_code == 404
+
+
+def test_run_queues_job_for_worker(client, tmp_path, monkeypatch):
+    """Test that in enqueue mode a standalone worker processes the job."""
+    import asyncio
+    
+    from config.settings import settings
+    from core.base import BaseTechnology
+    from core.factory import TechnologyFactory
+    from core.job_queue import create_queue
+    from worker import process_job
+    
+    class EchoTechnology(BaseTechnology):
+        """Technology returning the document as text."""
+        
+        async def run(self, document: bytes, **params) -> ProcessingResult:
+            return ProcessingResult(
+                data=document.decode(), technology_used=self.get_name()
+            )
+    
+    monkeypatch.setattr(settings, "output_directory", str(tmp_path))
+    monkeypatch.setattr(settings, "queue_backend", "sqlite")
+    queue = create_queue()
+    monkeypatch.setattr(app.state, "job_queue", queue, raising=False)
+    TechnologyFactory.register(EchoTechnology)
+    
+    response = client.post(
+        "/api/v1/run",
+        files={"file": ("test.pdf", io.BytesIO(b"queued content"), "application/pdf")},
+        data={"technology": "echo"}
+    )
+    assert response.status_code == 202
+    assert response.json()["status"] == "queued"
+    job_id = response.json()["job_id"]
+    assert client.get(f"/api/v1/results/{job_id}").status_code == 202
+    
+    job = queue.get(timeout=0)
+    assert job.job_id == job_id
+    asyncio.run(process_job(job, queue))
+    
+    response = client.get(f"/api/v1/results/{job_id}")
+    assert response.status_code == 200
+    assert response.json()["result"]["data"] == "queued content"
+    assert not (tmp_path / job_id / "document").exists()
+
+
+def test_interrupted_job_resumes_from_checkpoint(client, tmp_path, monkeypatch):
+    """Test that a killed worker's job is queued again and skips checkpointed pages."""
+    import asyncio
+    
+    from config.settings import settings
+    from core.base import BaseTechnology
+    from core.context import current_job
+    from core.factory import TechnologyFactory
+    from core.job_queue import create_queue
+    from core.job_store import JobStore
+    from core.models import DocumentChunk
+    from core.processing import recover_interrupted_jobs
+    from worker import process_job
+    
+    processed = []
+    
+    class ResumableTechnology(BaseTechnology):
+        """Technology that takes a while for each of its six pages."""
+        
+        async def run(self, document: bytes, **params) -> ProcessingResult:
+            job = current_job()
+            chunks = []
+            for number in range(1, 7):
+                page = job.resumed_page(number)
+                if page is None:
+                    await asyncio.sleep(0.1)
+                    processed.append(number)
+                    page = [DocumentChunk(text=f"page {number}", page=number)]
+                    job.add_page(number, page)
+                chunks.extend(page)
+            return ProcessingResult(data=chunks, technology_used=self.get_name())
+    
+    monkeypatch.setattr(settings, "output_directory", str(tmp_path))
+    monkeypatch.setattr(settings, "queue_backend", "sqlite")
+    queue = create_queue()
+    monkeypatch.setattr(app.state, "job_queue", queue, raising=False)
+    TechnologyFactory.register(ResumableTechnology)
+    
+    response = client.post(
+        "/api/v1/run",
+        files={"file": ("test.txt", io.BytesIO(b"long document"), "text/plain")},
+        data={"technology": "resumable"}
+    )
+    job_id = response.json()["job_id"]
+    
+    # The worker is killed partway through the job
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(asyncio.wait_for(process_job(queue.get(timeout=0), queue), 0.35))
+    assert JobStore().get(job_id)["status"] == "processing"
+    checkpointed = list(processed)
+    assert 1 <= len(checkpointed) < 6
+    
+    assert recover_interrupted_jobs(queue, stale_after=0) == 1
+    assert recover_interrupted_jobs(queue, stale_after=0) == 0
+    processed.clear()
+    asyncio.run(process_job(queue.get(timeout=0), queue))
+    
+    result = client.get(f"/api/v1/results/{job_id}").json()["result"]
+    assert [chunk["page"] for chunk in result["data"]] == [1, 2, 3, 4, 5, 6]
+    assert result["metadata"]["resumes"] == 1
+    assert result["metadata"]["resumed_pages"] == len(checkpointed)
+    assert processed == [n for n in range(1, 7) if n not in checkpointed]
+    assert not (tmp_path / job_id / "checkpoint.jsonl").exists()
+
+
+def test_interrupted_in_process_job_fails(tmp_path, monkeypatch):
+    """Test that a job the API was processing itself is failed after a restart."""
+    from config.settings import settings
+    from core.job_store import PROCESSING, JobStore
+    from core.processing import recover_interrupted_jobs
+    
+    monkeypatch.setattr(settings, "output_directory", str(tmp_path))
+    monkeypatch.setattr(settings, "queue_backend", None)
+    JobStore().create("in-process", "tesseract", status=PROCESSING)
+    
+    assert recover_interrupted_jobs(None, stale_after=0) == 0
+    record = JobStore().get("in-process")
+    assert record["status"] == "failed"
+    assert record["error"] == "Interrupted"
+
+
+def test_update_config(client, monkeypatch):
+    """Test that configuration updates are validated and applied atomically."""
+    from config.settings import settings
+    from core.admission import admission
+    
+    monkeypatch.setattr(settings, "technology_settings", {
+        "tuned": {"lang": "eng", "max_concurrency": 1, "max_queue": 2}
+    })
+    monkeypatch.setattr(settings, "debug", settings.debug)
+    limiter = admission.limiter("tuned")
+    
+    response = client.post("/api/v1/config", json={
+        "api": {"port": 9999},
+        "technologies": {"tuned": {"max_concurrency": 4}}
+    })
+    assert response.status_code == 200
+    assert response.json()["applied"] == ["technology_settings"]
+    assert response.json()["require_restart"] == ["port"]
+    assert settings.technology_settings["tuned"] == {
+        "lang": "eng", "max_concurrency": 4, "max_queue": 2
+    }
+    assert settings.port != 9999
+    assert limiter.max_concurrency == 4
+    
+    # An invalid value rejects the whole update
+    response = client.post("/api/v1/config", json={
+        "api": {"debug": not settings.debug},
+        "technologies": {"tuned": {"max_queue": -1}}
+    })
+    assert response.status_code == 400
+    assert settings.technology_settings["tuned"]["max_queue"] == 2
+    assert limiter.max_queue == 2
+    
+    # So are tuning settings of the wrong type or out of range
+    for tuning in (
+        {"ocr_workers": "lots"},
+        {"max_page_pixels": "big"},
+        {"languages_per_worker": 0},
+        {"tile_size": 400, "tile_overlap": 400},
+    ):
+        response = client.post(
+            "/api/v1/config", json={"technologies": {"tuned": tuning}}
+        )
+        assert response.status_code == 400
+    assert settings.technology_settings["tuned"] == {
+        "lang": "eng", "max_concurrency": 4, "max_queue": 2
+    }
+
+
+def test_update_config_rolls_back_rejected_settings(client, monkeypatch):
+    """Test that settings a technology fails to apply are rolled back."""
+    from config.settings import settings
+    from core.base import BaseTechnology
+    from core.factory import TechnologyFactory
+    
+    class PickyTechnology(BaseTechnology):
+        """Technology rejecting an unknown language when reconfigured."""
+        
+        def configure(self, config):
+            super().configure(config)
+            if self.config.get("lang") == "xx":
+                raise ValueError("unknown language")
+        
+        async def run(self, document: bytes, **params) -> ProcessingResult:
+            return ProcessingResult(data="", technology_used=self.get_name())
+    
+    monkeypatch.setattr(settings, "technology_settings", {"picky": {"lang": "eng"}})
+    monkeypatch.setattr(TechnologyFactory, "_instances", {})
+    TechnologyFactory.register(PickyTechnology)
+    instance = TechnologyFactory.get_technology("picky")
+    
+    response = client.post("/api/v1/config", json={
+        "technologies": {"picky": {"lang": "xx"}}
+    })
+    assert response.status_code == 400
+    assert "unknown language" in response.json()["detail"]
+    assert settings.technology_settings["picky"] == {"lang": "eng"}
+    assert instance.config == {"lang": "eng"}
+
+
+def test_run_rejects_unsupported_documents(client, tmp_path, monkeypatch):
+    """Test that documents are sniffed, rejected early and their type recorded."""
+    from config.settings import settings
+    from core.base import BaseTechnology
+    from core.factory import TechnologyFactory
+    from core.result_handler import ResultHandler
+    
+    class PdfOnlyTechnology(BaseTechnology):
+        """Technology that only processes PDFs."""
+        
+        runs = 0
+        
+        @classmethod
+        def get_supported_types(cls):
+            return frozenset({"pdf"})
+        
+        async def run(self, document: bytes, **params) -> ProcessingResult:
+            PdfOnlyTechnology.runs += 1
+            return ProcessingResult(data="pdf", technology_used=self.get_name())
+    
+    monkeypatch.setattr(settings, "output_directory", str(tmp_path))
+    TechnologyFactory.register(PdfOnlyTechnology)
+    
+    response = client.post(
+        "/api/v1/run",
+        files={
+            "file": ("scan.pdf", io.BytesIO(b"\x89PNG\r\n\x1a\n"), "application/pdf")
+        },
+        data={"technology": "pdfonly"},
+    )
+    assert response.status_code == 415
+    assert "png" in response.json()["detail"]
+    assert PdfOnlyTechnology.runs == 0
+    
+    response = client.post(
+        "/api/v1/run",
+        files={"file": ("doc.pdf", io.BytesIO(b"%PDF-1.4\n%%EOF"), "application/pdf")},
+        data={"technology": "pdfonly"}
+    )
+    assert response.status_code == 202
+    result = ResultHandler().get_result(response.json()["job_id"]).result
+    assert result.metadata["document_type"] == "pdf"
+
+
+def test_run_returns_partial_result_after_timeout(client, tmp_path, monkeypatch):
+    """Test that a job out of time keeps its finished pages and can be cancelled."""
+    import time
+    
+    from config.settings import settings
+    from core.base import BaseTechnology
+    from core.context import current_job, to_thread
+    from core.factory import TechnologyFactory
+    from core.job_store import QUEUED, JobStore
+    from core.models import DocumentChunk
+    from core.result_handler import ResultHandler
+    
+    class PagedTechnology(BaseTechnology):
+        """Technology that takes a while for each of its ten pages."""
+        
+        async def run(self, document: bytes, **params) -> ProcessingResult:
+            chunks = []
+            for number in range(1, 11):
+                await to_thread(time.sleep, 0.1)
+                chunk = DocumentChunk(text=f"page {number}", page=number)
+                current_job().add_page(number, [chunk])
+                chunks.append(chunk)
+            return ProcessingResult(data=chunks, technology_used=self.get_name())
+    
+    monkeypatch.setattr(settings, "output_directory", str(tmp_path))
+    TechnologyFactory.register(PagedTechnology)
+    
+    started = time.monotonic()
+    response = client.post(
+        "/api/v1/run",
+        files={"file": ("test.txt", io.BytesIO(b"test content"), "text/plain")},
+        data={"technology": "paged", "timeout": "0.35"}
+    )
+    assert response.status_code == 202
+    assert time.monotonic() - started < 0.8
+    
+    result = ResultHandler().get_result(response.json()["job_id"]).result
+    assert result.metadata["partial"] is True
+    assert 1 <= result.metadata["num_pages"] < 10
+    assert [chunk.page for chunk in result.data] == list(
+        range(1, result.metadata["num_pages"] + 1)
+    )
+    
+    assert client.post(
+        "/api/v1/run",
+        files={"file": ("test.txt", io.BytesIO(b"test content"), "text/plain")},
+        data={"technology": "paged", "timeout": "0"}
+    ).status_code == 400
+    
+    # A queued job is cancelled once
+    JobStore().create("queued-job", "paged", "test.txt", status=QUEUED)
+    response = client.post("/api/v1/results/queued-job/cancel")
+    assert response.status_code == 200
+    assert response.json()["status"] == "cancelled"
+    assert client.post("/api/v1/results/queued-job/cancel").status_code == 409
+    assert client.get("/api/v1/results/queued-job").json()["status"] == "cancelled"
+    assert client.post("/api/v1/results/unknown-job/cancel").status_code == 404
+
+
+def test_search_finds_saved_results(client, tmp_path, monkeypatch):
+    """Test that saved results are indexed and searchable down to the page."""
+    from config.settings import settings
+    from core.models import DocumentChunk, ProcessRequest
+    from core.result_handler import ResultHandler
+    
+    monkeypatch.setattr(settings, "output_directory", str(tmp_path))
+    handler = ResultHandler()
+    request = ProcessRequest(technology="tesseract", filename="invoice.pdf")
+    handler.save_result(
+        ProcessingResult(
+            data=[
+                DocumentChunk(text="Invoice 2023-01 for consulting", page=1),
+                DocumentChunk(text="Payment due in thirty days", page=2),
+            ],
+            technology_used="tesseract"
+        ),
+        request,
+        "invoice-job"
+    )
+    handler.save_result(
+        ProcessingResult(data="Consulting agreement draft", technology_used="openai"),
+        ProcessRequest(technology="openai", filename="contract.pdf"),
+        "contract-job"
+    )
+    
+    response = client.get("/api/v1/search", params={"q": "consult*"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == 2
+    assert {(hit["job_id"], hit["page"]) for hit in body["hits"]} == {
+        ("invoice-job", 1), ("contract-job", None)
+    }
+    
+    hits = client.get("/api/v1/search", params={"q": "2023-01 invoice"}).json()["hits"]
+    assert [(hit["job_id"], hit["page"], hit["filename"]) for hit in hits] == [
+        ("invoice-job", 1, "invoice.pdf")
+    ]
+    assert "<b>Invoice</b>" in hits[0]["snippet"]
+    
+    body = client.get(
+        "/api/v1/search", params={"q": "consulting", "technology": "openai"}
+    ).json()
+    assert [hit["job_id"] for hit in body["hits"]] == ["contract-job"]
+    body = client.get(
+        "/api/v1/search", params={"q": "consult*", "limit": 1, "offset": 1}
+    ).json()
+    assert body["total"] == 2 and len(body["hits"]) == 1
+    
+    # Saving a result again replaces its pages in the index
+    handler.save_result(
+        ProcessingResult(
+            data=[DocumentChunk(text="Credit note", page=1)],
+            technology_used="tesseract",
+        ),
+        request,
+        "invoice-job",
+    )
+    assert client.get("/api/v1/search", params={"q": "invoice"}).json()["total"] == 0
+    assert client.get("/api/v1/search", params={"q": "  "}).status_code == 400
+
+
+def test_get_result_reads_requested_chunks(client, tmp_path, monkeypatch):
+    """Test that a page range of a result is read through its chunk index."""
+    from config.settings import settings
+    from core.models import DocumentChunk, ProcessRequest
+    from core.result_handler import CHUNK_INDEX_FILE, ResultHandler
+    
+    monkeypatch.setattr(settings, "output_directory", str(tmp_path))
+    handler = ResultHandler()
+    chunks = [
+        DocumentChunk(text=f"Page {page} part {part}", page=page)
+        for page in range(1, 201) for part in range(2)
+    ]
+    handler.save_result(
+        ProcessingResult(
+            data=chunks, technology_used="tesseract", metadata={"num_pages": 200}
+        ),
+        ProcessRequest(technology="tesseract", filename="large.pdf"),
+        "large-job",
+    )
+    assert (tmp_path / "large-job" / CHUNK_INDEX_FILE).exists()
+    
+    body = client.get(
+        "/api/v1/results/large-job", params={"offset": 10, "limit": 3}
+    ).json()
+    assert [chunk["text"] for chunk in body["result"]["data"]] == [
+        "Page 6 part 0", "Page 6 part 1", "Page 7 part 0"
+    ]
+    assert body["result"]["metadata"] == {"num_pages": 200}
+    assert body["pagination"] == {
+        "offset": 10, "limit": 3, "pages": None, "total_chunks": 400
+    }
+    
+    body = client.get("/api/v1/results/large-job", params={"pages": "2,199-"}).json()
+    pages = [chunk["page"] for chunk in body["result"]["data"]]
+    assert pages == [2, 2, 199, 199, 200, 200]
+    assert body["pagination"]["total_chunks"] == 6
+    body = client.get(
+        "/api/v1/results/large-job", params={"pages": "2,199-", "offset": 5}
+    ).json()
+    assert [chunk["text"] for chunk in body["result"]["data"]] == ["Page 200 part 1"]
+    assert client.get(
+        "/api/v1/results/large-job", params={"offset": 400}
+    ).json()["result"]["data"] == []
+    
+    # Without parameters the whole result is returned
+    body = client.get("/api/v1/results/large-job").json()
+    assert len(body["result"]["data"]) == 400 and body["pagination"] is None
+    
+    # Results saved without an index are sliced after loading them
+    (tmp_path / "large-job" / CHUNK_INDEX_FILE).unlink()
+    body = client.get(
+        "/api/v1/results/large-job", params={"pages": "3", "limit": 1}
+    ).json()
+    assert [chunk["text"] for chunk in body["result"]["data"]] == ["Page 3 part 0"]
+    assert body["pagination"]["total_chunks"] == 2
+    
+    assert (
+        client.get("/api/v1/results/large-job", params={"pages": "3-1"}).status_code
+        == 400
+    )
+
+
+def test_get_result_supports_etags_and_compression(client, tmp_path, monkeypatch):
+    """Test conditional requests and compressed responses for results."""
+    from config.settings import settings
+    from core.models import DocumentChunk, ProcessRequest
+    from core.result_handler import RESPONSE_FILE, ResultHandler
+    
+    monkeypatch.setattr(settings, "output_directory", str(tmp_path))
+    ResultHandler().save_result(
+        ProcessingResult(
+            data=[
+                DocumentChunk(text=f"Line {page} " * 50, page=page)
+                for page in range(1, 11)
+            ],
+            technology_used="tesseract",
+        ),
+        ProcessRequest(technology="tesseract", filename="report.pdf"),
+        "cached-job",
+    )
+    assert (tmp_path / "cached-job" / (RESPONSE_FILE + ".gz")).exists()
+    
+    response = client.get(
+        "/api/v1/results/cached-job",
+        headers={"Accept-Encoding": "gzip;q=1, identity;q=0.5"},
+    )
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Cache-Control"] == settings.result_cache_control
+    assert len(response.json()["result"]["data"]) == 10
+    etag = response.headers["ETag"]
+    assert etag.endswith('-gzip"')
+    
+    # The client's copy is still current, compressed or not
+    for headers in (
+        {"If-None-Match": etag},
+        {"If-None-Match": etag.replace("-gzip", "")},
+    ):
+        response = client.get("/api/v1/results/cached-job", headers=headers)
+        assert response.status_code == 304 and response.content == b""
+    
+    response = client.get(
+        "/api/v1/results/cached-job", headers={"Accept-Encoding": "identity"}
+    )
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["ETag"] == etag.replace("-gzip", "")
+    
+    # Parts of the result have ETags of their own
+    response = client.get("/api/v1/results/cached-job", params={"pages": "2"})
+    assert [chunk["page"] for chunk in response.json()["result"]["data"]] == [2]
+    assert response.headers["ETag"] != etag.replace("-gzip", "")
+    assert client.get(
+        "/api/v1/results/cached-job",
+        params={"pages": "2"},
+        headers={"If-None-Match": response.headers["ETag"]}
+    ).status_code == 304
+    assert client.get(
+        "/api/v1/results/cached-job",
+        params={"pages": "3"},
+        headers={"If-None-Match": response.headers["ETag"]}
+    ).status_code == 200
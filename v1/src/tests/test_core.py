@@ -0,0 +1,283 @@
+"""Tests for the core components."""
+
+import asyncio
+
+import pytest
+
+from core.admission import CapacityExceededError, ConcurrencyLimiter
+
+
+def test_limiter_queues_and_rejects():
+    """Test that jobs over the limit wait and jobs over the queue are rejected."""
+    limiter = ConcurrencyLimiter("test", max_concurrency=1, max_queue=1)
+    order = []
+    
+    async def job(name, release):
+        async with limiter.slot():
+            order.append(name)
+            await release.wait()
+    
+    async def scenario():
+        release = asyncio.Event()
+        first = asyncio.create_task(job("first", release))
+        second = asyncio.create_task(job("second", release))
+        await asyncio.sleep(0)
+        assert limiter.in_flight == 1
+        assert limiter.queue_depth == 1
+        
+        # The queue is full, so a third job is rejected straight away
+        with pytest.raises(CapacityExceededError) as error:
+            await limiter.acquire()
+        assert error.value.retry_after >= 1
+        
+        release.set()
+        await asyncio.gather(first, second)
+    
+    asyncio.run(scenario())
+    assert order == ["first", "second"]
+    assert limiter.in_flight == 0
+    assert limiter.queue_depth == 0
+
+
+def test_limiter_queue_timeout():
+    """Test that a job waiting longer than the queue timeout is rejected."""
+    limiter = ConcurrencyLimiter(
+        "test", max_concurrency=1, max_queue=1, queue_timeout=0.01
+    )
+    
+    async def scenario():
+        await limiter.acquire()
+        with pytest.raises(CapacityExceededError):
+            await limiter.acquire()
+        limiter.release()
+    
+    asyncio.run(scenario())
+    assert limiter.in_flight == 0
+
+
+def test_metrics_render_prometheus_text():
+    """Test that metrics are rendered in the Prometheus text format."""
+    from core.metrics import Counter, Histogram, MetricsRegistry
+    
+    registry = MetricsRegistry()
+    requests = registry.register(Counter("requests_total", "Requests", ["outcome"]))
+    latency = registry.register(
+        Histogram("latency_seconds", "Latency", ["stage"], buckets=(0.1, 1.0))
+    )
+    
+    requests.inc(outcome="success")
+    requests.inc(2, outcome="success")
+    latency.observe(0.05, stage="ocr_page")
+    latency.observe(0.5, stage="ocr_page")
+    
+    output = registry.render()
+    assert "# TYPE requests_total counter" in output
+    assert 'requests_total{outcome="success"} 3' in output
+    assert 'latency_seconds_bucket{stage="ocr_page",le="0.1"} 1' in output
+    assert 'latency_seconds_bucket{stage="ocr_page",le="1"} 2' in output
+    assert 'latency_seconds_bucket{stage="ocr_page",le="+Inf"} 2' in output
+    assert 'latency_seconds_count{stage="ocr_page"} 2' in output
+
+
+def test_job_queues_hand_out_jobs_in_order(tmp_path):
+    """Test that both queue backends hand out each job once, oldest first."""
+    from core.job_queue import QueuedJob, RedisQueue, SQLiteQueue
+    from core.models import ProcessRequest
+    
+    class FakeRedis:
+        """Stand-in for a Redis server holding lists."""
+        
+        def __init__(self):
+            self.lists = {}
+        
+        def lpush(self, key, value):
+            self.lists.setdefault(key, []).insert(0, value)
+        
+        def brpop(self, key, timeout=0):
+            items = self.lists.get(key)
+            return (key, items.pop()) if items else None
+        
+        def close(self):
+            pass
+    
+    request = ProcessRequest(technology="tesseract", filename="test.pdf")
+    for queue in (
+        SQLiteQueue(str(tmp_path / "queue.db")),
+        RedisQueue(client=FakeRedis()),
+    ):
+        queue.put(QueuedJob(job_id="first", request=request))
+        queue.put(QueuedJob(job_id="second", request=request, profile=True))
+        
+        assert queue.get(timeout=0).job_id == "first"
+        second = queue.get(timeout=0)
+        assert second.job_id == "second"
+        assert second.profile
+        assert second.request.filename == "test.pdf"
+        assert queue.get(timeout=0) is None
+
+
+def test_limiter_resize_keeps_running_jobs():
+    """Test that resizing a limiter starts waiting jobs and never drops running ones."""
+    limiter = ConcurrencyLimiter("test", max_concurrency=1, max_queue=4)
+    
+    async def scenario():
+        await limiter.acquire()
+        waiters = [asyncio.create_task(limiter.acquire()) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert limiter.queue_depth == 3
+        
+        # Raising the limit starts two of the waiting jobs right away
+        limiter.resize(max_concurrency=3, max_queue=4)
+        await asyncio.sleep(0)
+        assert limiter.in_flight == 3
+        assert limiter.queue_depth == 1
+        
+        # Lowering it lets the running jobs finish before the last one starts
+        limiter.resize(max_concurrency=1, max_queue=4)
+        limiter.release()
+        limiter.release()
+        await asyncio.sleep(0)
+        assert limiter.in_flight == 1
+        assert limiter.queue_depth == 1
+        limiter.release()
+        await asyncio.gather(*waiters)
+        assert limiter.in_flight == 1
+        assert limiter.queue_depth == 0
+    
+    asyncio.run(scenario())
+
+
+def test_sniff_document_types():
+    """Test that documents are identified by their leading bytes."""
+    from core import sniff
+    
+    assert sniff.sniff(b"%PDF-1.7\n...") == sniff.PDF
+    assert sniff.sniff(b"\n\n%PDF-1.4\n") == sniff.PDF
+    assert sniff.sniff(b"\x89PNG\r\n\x1a\n\x00\x00") == sniff.PNG
+    assert sniff.sniff(b"\xff\xd8\xff\xe0\x00\x10JFIF") == sniff.JPEG
+    assert sniff.sniff(b"II*\x00\x08\x00\x00\x00") == sniff.TIFF
+    assert sniff.sniff(b"MM\x00*\x00\x00\x00\x08") == sniff.TIFF
+    assert sniff.sniff(b"RIFF\x24\x00\x00\x00WEBPVP8 ") == sniff.WEBP
+    assert (
+        sniff.sniff(b"BM\x36\x00\x0c\x00\x00\x00\x00\x00\x36\x00\x00\x00") == sniff.BMP
+    )
+    assert sniff.sniff("Grüße, plain text".encode()) == sniff.TEXT
+    assert sniff.sniff(b"BMW annual report") == sniff.TEXT
+    assert sniff.sniff(b"\x00\x01\x02\x03binary") == sniff.UNKNOWN
+    assert sniff.sniff(b"") == sniff.UNKNOWN
+    
+    sniff.check_supported("any", sniff.UNKNOWN, None)
+    with pytest.raises(sniff.UnsupportedDocumentError):
+        sniff.check_supported("ocr", sniff.TEXT, sniff.IMAGE_TYPES | {sniff.PDF})
+
+
+def test_page_and_region_selection():
+    """Test parsing of the pages and regions parameters."""
+    from core.selection import crop_box, parse_pages, parse_regions
+    
+    assert parse_pages(None) is None
+    selection = parse_pages("5-6, 1, 2-3, 10-")
+    assert selection.runs == [(1, 3), (5, 6), (10, None)]
+    assert selection.pages(11) == [1, 2, 3, 5, 6, 10, 11]
+    assert 12 in selection and 4 not in selection
+    assert selection.to_list() == ["1-3", "5-6", "10-"]
+    assert parse_pages([2, 1]).runs == [(1, 2)]
+    assert parse_pages(3).runs == [(3, 3)]
+    for invalid in ("0", "3-2", "a", "1-b"):
+        with pytest.raises(ValueError):
+            parse_pages(invalid)
+    
+    assert parse_regions([0, 0, 1, 0.25]) == [(0.0, 0.0, 1.0, 0.25)]
+    assert parse_regions([[0, 0.5, 0.5, 1], [0.5, 0.5, 1, 1]])[1] == (
+        0.5,
+        0.5,
+        1.0,
+        1.0,
+    )
+    for invalid in ([[0, 0, 1]], [[0.5, 0, 0.2, 1]], [[0, 0, 1, 1.5]], "top"):
+        with pytest.raises(ValueError):
+            parse_regions(invalid)
+    
+    assert crop_box((0, 0, 1, 0.25), 200, 400) == (0, 0, 200, 100)
+
+
+def test_cancelled_job_skips_pending_work():
+    """Test that cancelling a job stops it and skips work not started yet."""
+    import time
+    
+    from core.context import JobCancelledError, JobContext, job_context, to_thread
+    
+    started = []
+    
+    def page(number: int) -> None:
+        started.append(number)
+        time.sleep(0.05)
+    
+    async def process() -> None:
+        for number in range(10):
+            await to_thread(page, number)
+    
+    async def scenario() -> None:
+        job = JobContext("test")
+        with job_context(job):
+            running = asyncio.ensure_future(job.run(process()))
+            await asyncio.sleep(0.12)
+            job.cancel("Client disconnected")
+            with pytest.raises(JobCancelledError, match="Client disconnected"):
+                await running
+            
+            # Work queued for a thread after the cancellation doesn't start
+            with pytest.raises(JobCancelledError):
+                await to_thread(page, 99)
+    
+    asyncio.run(scenario())
+    assert 99 not in started
+    assert len(started) < 5
+
+
+def test_pixel_budget_downscales_or_rejects_large_pages():
+    """Test that pages over the pixel budget are downscaled or rejected up front."""
+    import io
+    
+    from PIL import Image
+    
+    from core.limits import DocumentTooLargeError, PixelBudget
+    
+    budget = PixelBudget(
+        max_pages=2, max_page_pixels=4_000_000, max_decode_pixels=8_000_000
+    )
+    
+    # A letter page fits at 200 DPI, a poster is rasterized at a lower DPI
+    assert budget.pdf_dpi(1, (612, 792)) == 200
+    assert 72 <= budget.pdf_dpi(2, (1191, 1684)) < 200
+    assert budget.downscaled == {2}
+    with pytest.raises(DocumentTooLargeError):
+        budget.pdf_dpi(3, (14400, 14400))
+    
+    budget.check_pages(2)
+    with pytest.raises(DocumentTooLargeError):
+        budget.check_pages(3)
+    
+    def open_image(size, format):
+        buffer = io.BytesIO()
+        Image.new("L", size).save(buffer, format=format)
+        return Image.open(io.BytesIO(buffer.getvalue()))
+    
+    small = PixelBudget(max_page_pixels=10_000, max_decode_pixels=40_000)
+    image = small.load(open_image((150, 150), "PNG"))
+    assert image.width * image.height <= 10_000
+    # A JPEG is decoded at a reduced scale, however large
+    image = small.load(open_image((800, 800), "JPEG"), 2)
+    assert image.width * image.height <= 10_000
+    assert small.downscaled == {1, 2}
+    # Other images too large to decode are rejected from their header
+    with pytest.raises(DocumentTooLargeError):
+        small.load(open_image((300, 300), "PNG"))
+    
+    # Pages that are tiled are only held to the decode budget
+    tiling = PixelBudget(
+        max_page_pixels=10_000, max_decode_pixels=40_000, tile_pixels=20_000
+    )
+    assert tiling.load(open_image((120, 120), "PNG")).size == (100, 100)
+    assert tiling.load(open_image((180, 180), "PNG")).size == (180, 180)
+    assert tiling.pdf_dpi(1, (72, 72), dpi=190) == 190
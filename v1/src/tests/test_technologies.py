@@ -1,5 +1,8 @@
 """Tests for the technology implementations."""
 
+import asyncio
+import os
+
 import pytest
 from unittest.mock import MagicMock, patch
 
@@ -30,21 +33,46 @@ def test_technology_registration():
     assert isinstance(openai, OpenAITechnology)
 
 
+def test_technology_instances_are_reused():
+    """Test that the factory keeps one warm instance per technology."""
+    TechnologyFactory._registry = {}
+    TechnologyFactory._instances = {}
+    TechnologyFactory.register(OpenAITechnology)
+    
+    first = TechnologyFactory.get_technology("openai")
+    assert TechnologyFactory.get_technology("openai") is first
+    
+    # Startup warms the shared instance and shutdown discards it
+    asyncio.run(TechnologyFactory.startup())
+    assert first.started
+    asyncio.run(TechnologyFactory.shutdown())
+    assert not first.started
+    assert TechnologyFactory.get_technology("openai") is not first
+
+
+def test_configured_defaults_are_applied():
+    """Test that configured defaults fill in missing request parameters."""
+    tech = TesseractTechnology({"lang": "deu", "max_concurrency": 2})
+    
+    assert tech.resolve_params({}) == {"lang": "deu"}
+    assert tech.resolve_params({"lang": "eng"}) == {"lang": "eng"}
+
+
 @patch("technologies.tesseract.pytesseract")
 @patch("technologies.tesseract.Image")
 @patch("technologies.tesseract.io")
 async def test_tesseract_technology(mock_io, mock_image, mock_pytesseract):
     """Test the Tesseract technology implementation."""
     # Mock the dependencies
-    mock_image_instance = MagicMock()
+    mock_image_instance = MagicMock(width=100, height=100, size=(100, 100))
     mock_image.open.return_value = mock_image_instance
     mock_pytesseract.image_to_string.return_value = "Test OCR result"
     
     # Create the technology
     tech = TesseractTechnology()
     
-    # Run the technology
-    result = await tech.run(b"test document")
+    # Run the technology on a PNG, routed to the image decoder by its header
+    result = await tech.run(b"\x89PNG\r\n\x1a\ntest document")
     
     # Check the result
     assert result.technology_used == "tesseract"
@@ -79,7 +107,7 @@ async def test_openai_technology(mock_pypdf2, mock_openai):
     
     # Run the technology
     result = await tech.run(
-        b"test document",
+        b"%PDF-1.4\ntest document",
         api_key="test-api-key",
         model="gpt-4"
     )
@@ -92,4 +120,501 @@ async def test_openai_technology(mock_pypdf2, mock_openai):
     # Check that the dependencies were called correctly
     mock_pypdf2.PdfReader.assert_called_once()
     mock_openai.ChatCompletion.create.assert_called_once()
-    assert mock_openai.api_key == "test-api-key"
\ No newline at end of file
+    # The key goes with the request rather than into the shared module
+    _, kwargs = mock_openai.ChatCompletion.create.call_args
+    assert kwargs["api_key"] == "test-api-key"
+
+
+def test_lazy_registration_imports_on_first_use():
+    """Test that lazily registered technologies are imported on first use."""
+    TechnologyFactory._registry = {}
+    TechnologyFactory._instances = {}
+    TechnologyFactory.register_lazy(
+        "tesseract", "technologies.tesseract:TesseractTechnology"
+    )
+    
+    assert TechnologyFactory.list_technologies()["tesseract"]["loaded"] is False
+    
+    tech = TechnologyFactory.get_technology("tesseract")
+    assert isinstance(tech, TesseractTechnology)
+    assert TechnologyFactory.list_technologies()["tesseract"]["loaded"] is True
+    
+    with pytest.raises(KeyError):
+        TechnologyFactory.get_technology("does_not_exist")
+
+
+def test_app_import_does_not_load_technologies():
+    """Test that importing the app doesn't import heavy technology modules."""
+    import subprocess
+    import sys
+    from pathlib import Path
+    
+    code = (
+        "import sys; import app.main; "
+        "heavy = ['technologies.tesseract', 'technologies.openai', "
+        "'pytesseract', 'pdf2image', 'openai', 'PyPDF2']; "
+        "print([m for m in heavy if m in sys.modules])"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).parent.parent,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    assert output.strip().splitlines()[-1] == "[]"
+
+
+def test_tesseract_pool_routes_by_language():
+    """Test that pages go to workers that have their language loaded."""
+    from technologies.tesseract_pool import TesseractPool
+    
+    class RecordingPool(TesseractPool):
+        """Pool that records the worker of each page instead of running OCR."""
+        
+        def __init__(self, *args, **kwargs):
+            self.routed = []
+            super().__init__(*args, **kwargs)
+        
+        async def _execute(self, worker, image, lang, config, tsv=False):
+            self.routed.append((lang, worker.index))
+            await asyncio.sleep(0.01)
+            return f"{lang} text", True
+    
+    async def scenario():
+        pool = RecordingPool(2, max_languages=1)
+        try:
+            # Warm up one worker per language
+            await asyncio.gather(
+                pool.recognize(None, "eng"), pool.recognize(None, "deu")
+            )
+            warm = dict(pool.routed)
+            pool.routed.clear()
+            
+            # Mixed traffic keeps going to the warm workers
+            texts = await asyncio.gather(*(
+                pool.recognize(None, lang) for lang in ["deu", "eng", "eng", "deu"] * 3
+            ))
+            assert texts == ["deu text", "eng text", "eng text", "deu text"] * 3
+            assert all(warm[lang] == index for lang, index in pool.routed)
+            
+            # A third language replaces the least recently used one of a worker
+            await pool.recognize(None, "jpn")
+            assert sorted(worker["languages"] for worker in pool.stats()) in (
+                [["deu"], ["jpn"]], [["eng"], ["jpn"]]
+            )
+        finally:
+            pool.close()
+    
+    asyncio.run(scenario())
+
+
+@patch("technologies.tesseract.pytesseract")
+@patch("technologies.tesseract.pdf2image")
+def test_tesseract_processes_selected_pages_and_regions(
+    mock_pdf2image, mock_pytesseract
+):
+    """Test that only the selected pages are rasterized and only regions are OCRed."""
+    from PIL import Image
+    
+    mock_pdf2image.pdfinfo_from_path.return_value = {"Pages": 3}
+    mock_pdf2image.convert_from_path.side_effect = lambda path, first_page, last_page: [
+        Image.new("L", (200, 400)) for _ in range(first_page, last_page + 1)
+    ]
+    mock_pytesseract.image_to_string.side_effect = (
+        lambda image, lang, config: f"{image.size[0]}x{image.size[1]}"
+    )
+    
+    tech = TesseractTechnology()
+    result = asyncio.run(tech.run(
+        b"%PDF-1.4\n", pages="1,3-", regions=[[0, 0, 1, 0.25], [0, 0.5, 0.5, 1]]
+    ))
+    
+    calls = mock_pdf2image.convert_from_path.call_args_list
+    assert [call.kwargs for call in calls] == [
+        {"first_page": 1, "last_page": 1}, {"first_page": 3, "last_page": 3}
+    ]
+    # Every call reads the same temporary copy, removed after the job
+    path = mock_pdf2image.pdfinfo_from_path.call_args.args[0]
+    assert {call.args[0] for call in calls} == {path}
+    assert not os.path.exists(path)
+    assert [(chunk.page, chunk.text) for chunk in result.data] == [
+        (1, "200x100"), (1, "100x200"), (3, "200x100"), (3, "100x200")
+    ]
+    assert result.data[1].metadata["region"] == [0.0, 0.5, 0.5, 1.0]
+    assert result.metadata["num_pages"] == 2
+    assert result.metadata["pages"] == ["1", "3-"]
+    
+    # A range past the end of the document only covers the pages it has
+    # and consecutive pages are rasterized together
+    mock_pdf2image.convert_from_path.reset_mock()
+    result = asyncio.run(tech.run(b"%PDF-1.4\n", pages="2-20000000"))
+    assert [chunk.page for chunk in result.data] == [2, 3]
+    calls = mock_pdf2image.convert_from_path.call_args_list
+    assert [call.kwargs for call in calls] == [{"first_page": 2, "last_page": 3}]
+
+
+@patch("technologies.cascade.PyPDF2")
+def test_cascade_escalates_poor_pages(mock_pypdf2):
+    """Test that the cascade only sends pages with poor text to the next tier."""
+    from core.base import BaseTechnology
+    from core.models import DocumentChunk, ProcessingResult
+    from technologies.cascade import CascadeTechnology, text_quality
+    
+    good = "The quick brown fox jumps over the lazy dog, again and again."
+    texts = {1: good, 2: "", 3: "|~; l1I ~~~ %$# ,,"}
+    pages = [
+        MagicMock(extract_text=MagicMock(return_value=texts[n])) for n in (1, 2, 3)
+    ]
+    mock_pypdf2.PdfReader.return_value.pages = pages
+    calls = []
+    
+    class FakeOcrTechnology(BaseTechnology):
+        """OCR that reads page 2 well and page 3 badly."""
+        
+        async def run(self, document, **params):
+            calls.append(("fakeocr", params["pages"]))
+            text = good if params["pages"] == "2" else "~~ |l1 ~~ |||"
+            return ProcessingResult(
+                data=[DocumentChunk(text=text, page=int(params["pages"]))],
+                technology_used="fakeocr"
+            )
+        
+        @classmethod
+        def get_param_schema(cls):
+            return {"pages": {}}
+    
+    class FakeLlmTechnology(FakeOcrTechnology):
+        """A model that fails."""
+        
+        async def run(self, document, **params):
+            calls.append(("fakellm", params["pages"]))
+            raise RuntimeError("Service unavailable")
+    
+    TechnologyFactory.register(FakeOcrTechnology)
+    TechnologyFactory.register(FakeLlmTechnology)
+    
+    result = asyncio.run(CascadeTechnology().run(
+        b"%PDF-1.4 test", tiers=["text", "fakeocr", "fakellm"]
+    ))
+    
+    # Only the pages without good text go to the next tier
+    assert sorted(calls) == [
+        ("fakellm", "3"), ("fakeocr", "2"), ("fakeocr", "3")
+    ]
+    assert [(chunk.page, chunk.metadata["tier"]) for chunk in result.data] == [
+        (1, "text"), (2, "fakeocr"), (3, "text")
+    ]
+    assert result.data[1].text == good
+    assert result.metadata["tiers"] == {"text": 2, "fakeocr": 1}
+    assert result.metadata["escalated_pages"] == 3
+    
+    assert text_quality(good)["word_ratio"] == 1.0
+    assert text_quality("|~; l1I ~~~")["word_ratio"] == 0.0
+
+
+@patch("technologies.cascade.PyPDF2")
+def test_cascade_runs_tiers_in_child_jobs(mock_pypdf2):
+    """Test that tiers run once in child jobs holding their own admission slots."""
+    from core.admission import admission
+    from core.base import BaseTechnology
+    from core.context import JobContext, current_job, job_context
+    from core.models import DocumentChunk, ProcessingResult
+    from technologies.cascade import CascadeTechnology
+    
+    good = "The quick brown fox jumps over the lazy dog, again and again."
+    mock_pypdf2.PdfReader.return_value.pages = [
+        MagicMock(extract_text=MagicMock(return_value="")) for _ in range(2)
+    ]
+    in_flight = []
+    
+    class PagingOcrTechnology(BaseTechnology):
+        """OCR that records its pages in the job, as Tesseract does."""
+        
+        async def run(self, document, **params):
+            in_flight.append(admission.limiter("pagingocr").in_flight)
+            chunks = []
+            for number in map(int, params["pages"].split(",")):
+                page = [DocumentChunk(text=good, page=number)]
+                current_job().add_page(number, page)
+                chunks.extend(page)
+            return ProcessingResult(data=chunks, technology_used="pagingocr")
+        
+        @classmethod
+        def splits_pages(cls):
+            return True
+        
+        @classmethod
+        def get_param_schema(cls):
+            return {"pages": {}}
+    
+    TechnologyFactory.register(PagingOcrTechnology)
+    job = JobContext("cascade")
+    checkpointed = []
+    job.on_page = lambda number, chunks: checkpointed.append(number)
+    
+    with job_context(job):
+        asyncio.run(CascadeTechnology().run(
+            b"%PDF-1.4 test", tiers=["text", "pagingocr"]
+        ))
+    
+    # Both pages were read in one run holding a slot of the tier, and only
+    # the cascade's pages count
+    assert in_flight == [1]
+    assert sorted(checkpointed) == [1, 2]
+    assert all(
+        chunk.metadata["tier"] == "pagingocr"
+        for chunks in job.pages.values() for chunk in chunks
+    )
+
+
+@patch("technologies.cascade.PyPDF2")
+def test_cascade_fails_when_a_tier_is_over_capacity(mock_pypdf2):
+    """Test that a full tier fails the cascade instead of leaving pages empty."""
+    from core.admission import CapacityExceededError
+    from core.base import BaseTechnology
+    from core.selection import InvalidSelectionError
+    from technologies.cascade import CascadeTechnology
+    
+    mock_pypdf2.PdfReader.return_value.pages = [
+        MagicMock(extract_text=MagicMock(return_value=""))
+    ]
+    
+    class BusyOcrTechnology(BaseTechnology):
+        """OCR whose queue is full."""
+        
+        async def run(self, document, **params):
+            raise CapacityExceededError("busyocr", 5)
+        
+        @classmethod
+        def get_param_schema(cls):
+            return {"pages": {}}
+    
+    TechnologyFactory.register(BusyOcrTechnology)
+    with pytest.raises(CapacityExceededError):
+        asyncio.run(CascadeTechnology().run(
+            b"%PDF-1.4 test", tiers=["text", "busyocr"]
+        ))
+    
+    # The cascade can't run itself as a tier
+    with pytest.raises(InvalidSelectionError):
+        asyncio.run(CascadeTechnology().run(b"%PDF-1.4 test", tiers=["cascade"]))
+
+
+@patch("technologies.tesseract.pytesseract")
+@patch("technologies.tesseract.pdf2image")
+def test_tesseract_keeps_pages_within_pixel_budget(mock_pdf2image, mock_pytesseract):
+    """Test that large pages are rasterized at a lower resolution or rejected."""
+    from PIL import Image
+    
+    from core.limits import DocumentTooLargeError
+    
+    mock_pdf2image.pdfinfo_from_path.return_value = {
+        "Pages": 2,
+        "Page    1 size": "612 x 792 pts (letter)",
+        "Page    2 size": "1191 x 1684 pts (A2)",
+    }
+    mock_pdf2image.convert_from_path.side_effect = lambda path, **options: [
+        Image.new("L", (100, 100))
+    ]
+    mock_pytesseract.image_to_string.return_value = "text"
+    
+    tech = TesseractTechnology({"max_page_pixels": 4_000_000})
+    result = asyncio.run(tech.run(b"%PDF-1.4\n"))
+    
+    calls = mock_pdf2image.convert_from_path.call_args_list
+    assert "dpi" not in calls[0].kwargs
+    assert 72 <= calls[1].kwargs["dpi"] < 200
+    assert result.metadata["downscaled_pages"] == [2]
+    
+    # Too many pages are rejected before any is rasterized
+    mock_pdf2image.convert_from_path.reset_mock()
+    tech = TesseractTechnology({"max_pages": 1})
+    with pytest.raises(DocumentTooLargeError):
+        asyncio.run(tech.run(b"%PDF-1.4\n"))
+    mock_pdf2image.convert_from_path.assert_not_called()
+
+
+def test_tesseract_pool_recycles_workers():
+    """Test that workers are replaced after a number of pages or a memory limit."""
+    from technologies.tesseract_pool import TesseractPool
+    
+    class FakePool(TesseractPool):
+        """Pool reporting a fixed resident memory instead of running OCR."""
+        
+        rss = 0
+        
+        async def _execute(self, worker, image, lang, config, tsv=False):
+            worker.rss = self.rss
+            return "text", False
+    
+    async def scenario():
+        pool = FakePool(1, max_pages=3, max_rss=100 * 2 ** 20)
+        try:
+            for _ in range(3):
+                await pool.recognize(None, "eng")
+            assert [worker["worker"] for worker in pool.stats()] == [1]
+            # Nothing stays loaded without tesserocr
+            assert pool.stats()[0]["languages"] == []
+            
+            pool.rss = 200 * 2 ** 20
+            await pool.recognize(None, "eng")
+            assert [worker["worker"] for worker in pool.stats()] == [2]
+            assert pool.stats()[0]["pages"] == 0
+        finally:
+            pool.close()
+    
+    asyncio.run(scenario())
+
+
+def test_tesseract_pool_shares_pages_through_shared_memory():
+    """Test that pages reach workers through shared memory that is then released."""
+    from multiprocessing import shared_memory
+    
+    from PIL import Image
+    
+    from technologies.tesseract_pool import SharedPage, _open_page, share_image
+    
+    image = Image.linear_gradient("L").convert("RGB")
+    image.info["dpi"] = (300, 300)
+    
+    with share_image(image) as page:
+        assert isinstance(page, SharedPage)
+        with _open_page(page) as shared:
+            assert shared.mode == "RGB" and shared.size == image.size
+            assert shared.tobytes() == image.tobytes()
+            assert shared.info["dpi"] == (300, 300)
+    
+    # The segment is gone once the page is done
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=page.name)
+    
+    # Grayscale pages are mapped onto the segment rather than copied out of it
+    with share_image(image.convert("L")) as page:
+        with _open_page(page) as shared:
+            assert shared.readonly
+            assert shared.tobytes() == image.convert("L").tobytes()
+    
+    # Images whose pixels need a palette are pickled instead
+    with share_image(image.convert("P")) as page:
+        assert not isinstance(page, SharedPage)
+
+
+def _tsv(*words):
+    """Build Tesseract TSV output for words as (text, left, top, width, height)."""
+    rows = [
+        "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num"
+        "\tleft\ttop\twidth\theight\tconf\ttext"
+    ]
+    for number, (text, left, top, width, height) in enumerate(words, 1):
+        rows.append(
+            f"5\t1\t1\t1\t1\t{number}\t{left}\t{top}\t{width}\t{height}\t91.5\t{text}"
+        )
+    return "\n".join(rows)
+
+
+def test_tesseract_tiles_stitch_words_across_overlaps():
+    """Test that words in the overlap of tiles are kept once, in reading order."""
+    from technologies.tesseract_tiles import parse_words, plan_tiles, stitch
+    
+    tiles = plan_tiles(1000, 400, 600, 200)
+    assert tiles == [(0, 0, 600, 400), (400, 0, 1000, 400)]
+    
+    # Both tiles see "shared" in their overlap; the left one cuts "drawing"
+    left = parse_words(
+        _tsv(
+            ("first", 50, 50, 100, 30), ("shared", 450, 50, 100, 30),
+            ("draw", 560, 50, 40, 30), ("second", 100, 300, 100, 30)
+        ),
+        tiles[0], (1000, 400)
+    )
+    right = parse_words(
+        _tsv(
+            ("shared", 50, 52, 100, 30), ("drawing", 160, 50, 140, 30),
+            ("last", 400, 50, 100, 30)
+        ),
+        tiles[1], (1000, 400)
+    )
+    
+    assert stitch(left + right) == "first shared drawing last\n\nsecond"
+
+
+@patch("technologies.tesseract.pytesseract")
+def test_tesseract_recognizes_large_images_in_tiles(mock_pytesseract):
+    """Test that images above the tiling threshold are recognized tile by tile."""
+    import io
+    
+    from PIL import Image
+    
+    buffer = io.BytesIO()
+    Image.new("L", (1000, 400), 255).save(buffer, format="PNG")
+    # Every tile reads a word near its top left corner
+    mock_pytesseract.image_to_data.side_effect = (
+        lambda image, lang, config: _tsv(("word", 10, 10, 50, 20))
+    )
+    
+    tech = TesseractTechnology(
+        {
+            "ocr_workers": 0,
+            "tile_pixels": 100_000,
+            "tile_size": 600,
+            "tile_overlap": 200,
+        }
+    )
+    result = asyncio.run(tech.run(buffer.getvalue()))
+    
+    assert result.data[0].text == "word word"
+    assert result.metadata["tiled_pages"] == [1]
+    assert mock_pytesseract.image_to_data.call_count == 2
+    mock_pytesseract.image_to_string.assert_not_called()
+
+
+@patch("technologies.tesseract.pytesseract")
+def test_tesseract_tiles_large_images_instead_of_downscaling(mock_pytesseract):
+    """Test that images past PIL's limit and the page budget are decoded and tiled."""
+    import io
+    
+    from PIL import Image
+    
+    from core.limits import DocumentTooLargeError
+    
+    buffer = io.BytesIO()
+    Image.new("L", (1000, 400), 255).save(buffer, format="PNG")
+    mock_pytesseract.image_to_data.side_effect = (
+        lambda image, lang, config: _tsv(("word", 10, 10, 50, 20))
+    )
+    config = {
+        "ocr_workers": 0,
+        "max_page_pixels": 100_000,
+        "max_decode_pixels": 1_000_000,
+        "tile_pixels": 200_000,
+        "tile_size": 600,
+        "tile_overlap": 200
+    }
+    
+    limit = Image.MAX_IMAGE_PIXELS
+    # Far below the image, so PIL alone would refuse to open it
+    Image.MAX_IMAGE_PIXELS = 100_000
+    try:
+        tech = TesseractTechnology(config)
+        assert Image.MAX_IMAGE_PIXELS == 1_000_000
+        # PIL's limit is shared by the process, so it is never lowered or removed
+        TesseractTechnology({"max_decode_pixels": 500_000})
+        TesseractTechnology({"max_decode_pixels": None})
+        assert Image.MAX_IMAGE_PIXELS == 1_000_000
+        
+        result = asyncio.run(tech.run(buffer.getvalue()))
+        
+        # Tiled at full resolution rather than downscaled to the page budget
+        assert result.metadata["tiled_pages"] == [1]
+        assert "downscaled_pages" not in result.metadata
+        tiles = [call.args[0] for call in mock_pytesseract.image_to_data.call_args_list]
+        assert [tile.size for tile in tiles] == [(600, 400), (600, 400)]
+        
+        # Images above the decode budget are still rejected
+        buffer = io.BytesIO()
+        Image.new("L", (2000, 1000), 255).save(buffer, format="PNG")
+        with pytest.raises(DocumentTooLargeError):
+            asyncio.run(tech.run(buffer.getvalue()))
+    finally:
+        Image.MAX_IMAGE_PIXELS = limit
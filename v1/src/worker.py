@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+"""Standalone worker processing the jobs queued by the API.
+
+Run the API with a queue backend (``queue.backend`` in ``config.yaml`` or
+``QUEUE_BACKEND``) and as many workers as needed, on the same or other
+machines sharing the output directory:
+
+    python src/worker.py --backend sqlite --concurrency 2
+    python src/worker.py --backend redis --queue-url redis://broker:6379/0
+"""
+
+import argparse
+import asyncio
+import logging
+import signal
+import sys
+from pathlib import Path
+from typing import Set
+
+# Add the src directory to the Python path
+src_dir = Path(__file__).parent
+sys.path.insert(0, str(src_dir))
+
+from config.loader import update_settings_from_yaml
+from config.settings import settings, watch_config_file
+from core import metrics
+from core.admission import CapacityExceededError
+from core.context import JobCancelledError, to_thread
+from core.factory import TechnologyFactory
+from core.job_queue import JobQueue, QueuedJob, create_queue
+from core.job_store import FAILED, get_job_store
+from core.plugins import discover_technologies
+from core.processing import execute_job, recover_periodically
+from core.result_handler import ResultHandler
+
+logger = logging.getLogger("worker")
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Document Reader worker")
+    parser.add_argument(
+        "--backend",
+        type=str,
+        default=None,
+        help="Queue backend, sqlite or redis (default: from the configuration)"
+    )
+    parser.add_argument(
+        "--queue-url",
+        type=str,
+        default=None,
+        help=(
+            "Database path or server URL of the queue "
+            "(default: from the configuration)"
+        ),
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Number of jobs processed at once (default: 1)"
+    )
+    parser.add_argument(
+        "--debug",
+        action="store_true",
+        default=settings.debug,
+        help="Enable debug mode"
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        default=None,
+        help="Directory shared with the API to store output files"
+    )
+    return parser.parse_args()
+
+
+async def process_job(job: QueuedJob, queue: JobQueue) -> None:
+    """Process a queued job and record its outcome in the job store.
+    
+    Jobs rejected by the admission limits of their technology are put back on
+    the queue.
+    
+    Args:
+        job: The queued job
+        queue: The queue the job was taken from
+    """
+    result_handler = ResultHandler()
+    technology = job.request.technology
+    
+    async def read_document() -> bytes:
+        return await to_thread(result_handler.get_document, job.job_id)
+    
+    try:
+        await execute_job(
+            job.request, job.job_id, read_document, profile=job.profile,
+            checkpoint=True
+        )
+    except CapacityExceededError as e:
+        logger.info(f"Requeueing job {job.job_id}: {str(e)}")
+        await asyncio.sleep(e.retry_after)
+        await to_thread(queue.put, job)
+        return
+    except JobCancelledError as e:
+        logger.info(f"Job {job.job_id} cancelled: {str(e)}")
+        metrics.requests_total.inc(technology=technology, outcome="cancelled")
+        result_handler.delete_document(job.job_id)
+        return
+    except Exception as e:
+        logger.exception(f"Job {job.job_id} failed")
+        metrics.requests_total.inc(technology=technology, outcome="error")
+        await to_thread(get_job_store().update, job.job_id, FAILED, str(e))
+        return
+    
+    metrics.requests_total.inc(technology=technology, outcome="success")
+    result_handler.delete_document(job.job_id)
+    logger.info(f"Completed job {job.job_id}")
+
+
+async def run_worker(concurrency: int, stop: asyncio.Event) -> None:
+    """Take jobs from the queue and process them until asked to stop.
+    
+    Jobs interrupted by a crashed or killed worker are queued again, to be
+    resumed from their last checkpointed page.
+    
+    Args:
+        concurrency: Number of jobs processed at once
+        stop: Set to stop taking new jobs, running jobs are finished
+    """
+    queue = create_queue()
+    discover_technologies()
+    await TechnologyFactory.startup(settings.preload_technologies)
+    logger.info(
+        f"Worker taking jobs from the {settings.queue_backend} queue, "
+        f"{concurrency} at a time"
+    )
+    
+    # Pick up changes to the configuration file without a restart
+    config_watcher = None
+    if settings.config_reload_interval:
+        config_watcher = asyncio.create_task(watch_config_file())
+    
+    slots = asyncio.Semaphore(concurrency)
+    running: Set[asyncio.Task] = set()
+    recovery = asyncio.create_task(recover_periodically(queue))
+    try:
+        while not stop.is_set():
+            await slots.acquire()
+            job = await to_thread(queue.get, 1.0)
+            if job is None:
+                slots.release()
+                continue
+            
+            task = asyncio.create_task(process_job(job, queue))
+            running.add(task)
+            task.add_done_callback(running.discard)
+            task.add_done_callback(lambda _: slots.release())
+        
+        if running:
+            logger.info(f"Finishing {len(running)} running job(s)")
+            await asyncio.gather(*running, return_exceptions=True)
+    finally:
+        recovery.cancel()
+        if config_watcher is not None:
+            config_watcher.cancel()
+        await TechnologyFactory.shutdown()
+        queue.close()
+
+
+def main():
+    """Main entry point."""
+    # Parse command line arguments
+    args = parse_args()
+    
+    # Load configuration from YAML file
+    update_settings_from_yaml()
+    
+    # Command line arguments override configuration file
+    settings.debug = args.debug
+    if args.backend is not None:
+        settings.queue_backend = args.backend
+    if args.queue_url is not None:
+        settings.queue_url = args.queue_url
+    if args.output_dir is not None:
+        settings.output_directory = args.output_dir
+    if not settings.queue_backend:
+        settings.queue_backend = "sqlite"
+    
+    # Configure logging
+    log_level = logging.DEBUG if settings.debug else logging.INFO
+    logging.basicConfig(
+        level=log_level,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    
+    async def run() -> None:
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop.set)
+        await run_worker(args.concurrency, stop)
+    
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
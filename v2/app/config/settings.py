@@ -14,4 +14,10 @@ class Settings(BaseSettings):
     api_port: int = 8000
     default_tech: str = "tesseract"
 
+    # Agentic Document Extraction API
+    agentic_endpoint: str = "https://api.va.landing.ai/v1/tools/agentic-document-analysis"
+    agentic_max_in_flight: int = 8
+    agentic_max_retries: int = 3
+    agentic_timeout: float = 120.0
+
 settings = Settings()
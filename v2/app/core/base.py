@@ -1,11 +1,42 @@
 """
 Abstract base class for all extraction technologies.
-Defines a common interface: run(self, image).
+Defines a common interface: run(self, image), and run_batch(self, images)
+for processing many images in one call.
 """
 
 from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+@dataclass
+class BatchResult:
+    """Outcome of one image of a batch: its result, or the error it raised."""
+    index: int
+    result: Any = None
+    error: Optional[str] = None
+    # Extractor-specific details, e.g. timings
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
 
 class BaseExtractor(ABC):
     @abstractmethod
     def run(self, image):
         pass
+
+    def run_batch(self, images: Iterable) -> List[BatchResult]:
+        """
+        Process several images, returning one BatchResult per image, in order.
+        An image that fails is reported in its BatchResult instead of failing
+        the batch. Extractors that can process images in parallel or amortize
+        setup across images override this; the default runs them one by one.
+        """
+        results = []
+        for index, image in enumerate(images):
+            try:
+                results.append(BatchResult(index, result=self.run(image)))
+            except Exception as e:
+                results.append(BatchResult(index, error=f"{type(e).__name__}: {e}"))
+        return results
@@ -1,14 +1,181 @@
 """
 Agentic Document Extraction implementation.
-Wraps LandingAI Agentic API or library.
+Wraps the LandingAI Agentic Document Extraction API over HTTP.
 """
 
-from app.core.base import BaseExtractor
+import asyncio
+import io
+import logging
+import os
+import random
+import time
+from typing import Iterable, List, Optional
+
+import httpx
+from app.config.settings import settings
+from app.core.base import BaseExtractor, BatchResult
+
+logger = logging.getLogger(__name__)
+
+# Responses worth trying again: rate limited or a temporary server error
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
 
 class AgenticExtractor(BaseExtractor):
-    def __init__(self, api_key: str, **kwargs):
+    """
+    Sends pages to the Agentic Document Extraction endpoint.
+
+    All requests of an extractor share one pooled async HTTP client, so pages
+    reuse connections, and a batch submits up to max_in_flight pages at once.
+    Connection errors, timeouts and retryable statuses are retried up to
+    max_retries times with full-jitter exponential backoff, honoring
+    Retry-After. Each result records the time and attempts it took.
+
+    Use it as an async context manager to share the client across calls, or
+    call run/run_batch from synchronous code.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        endpoint: str = None,
+        max_in_flight: int = None,
+        max_retries: int = None,
+        timeout: float = None,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        client: Optional[httpx.AsyncClient] = None,
+        **kwargs,
+    ):
         self.api_key = api_key
+        self.endpoint = endpoint or settings.agentic_endpoint
+        self.max_in_flight = max_in_flight or settings.agentic_max_in_flight
+        self.max_retries = settings.agentic_max_retries if max_retries is None else max_retries
+        self.timeout = timeout or settings.agentic_timeout
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._client = client
+        self._owns_client = client is None
+
+    async def __aenter__(self):
+        self._get_client()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        if self._client is not None and self._owns_client:
+            await self._client.aclose()
+            self._client = None
 
     def run(self, image):
-        # TODO: implement agentic document extraction call
-        pass
+        result = self.run_batch([image])[0]
+        if not result.ok:
+            raise RuntimeError(result.error)
+        return result.result
+
+    def run_batch(self, images: Iterable) -> List[BatchResult]:
+        async def run():
+            try:
+                return await self.extract_many(images)
+            finally:
+                await self.aclose()
+        return asyncio.run(run())
+
+    async def extract(self, image) -> dict:
+        """Extract one page, retrying transient failures."""
+        return (await self._extract(0, image)).result
+
+    async def extract_many(self, images: Iterable) -> List[BatchResult]:
+        """
+        Extract pages concurrently, at most max_in_flight at a time, returning
+        one BatchResult per page, in order.
+
+        max_in_flight workers take the next page as they finish one, so pages
+        are only read from images as they are sent.
+        """
+        pages = enumerate(images)
+        results = {}
+
+        async def worker():
+            for index, image in pages:
+                try:
+                    results[index] = await self._extract(index, image)
+                except Exception as e:
+                    results[index] = BatchResult(index, error=f"{type(e).__name__}: {e}")
+
+        await asyncio.gather(*(worker() for _ in range(self.max_in_flight)))
+        return [results[index] for index in range(len(results))]
+
+    async def _extract(self, index: int, image) -> BatchResult:
+        client = self._get_client()
+        # Reading a file or encoding an image blocks, keep it off the event loop
+        name, content = await asyncio.to_thread(_encode, image)
+        field = "pdf" if content.startswith(b"%PDF") else "image"
+        started = time.perf_counter()
+
+        for attempt in range(self.max_retries + 1):
+            request_started = time.perf_counter()
+            retry_after = None
+            try:
+                response = await client.post(
+                    self.endpoint,
+                    files={field: (name, content)},
+                    headers={"Authorization": f"Basic {self.api_key}"},
+                )
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                failure = f"{type(e).__name__}: {e}"
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    seconds = time.perf_counter() - started
+                    logger.debug(
+                        f"Page {index} extracted in {seconds:.3f}s "
+                        f"({attempt + 1} attempt(s), last request "
+                        f"{time.perf_counter() - request_started:.3f}s)"
+                    )
+                    payload = response.json()
+                    return BatchResult(
+                        index,
+                        result=payload.get("data", payload),
+                        metadata={"seconds": round(seconds, 6), "attempts": attempt + 1},
+                    )
+                failure = f"HTTP {response.status_code}"
+                retry_after = _retry_after(response)
+
+            if attempt == self.max_retries:
+                raise RuntimeError(f"Giving up after {attempt + 1} attempt(s): {failure}")
+            # Full jitter keeps retries of many pages from arriving in waves
+            delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+            logger.warning(f"Page {index} failed ({failure}), retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_in_flight,
+                    max_keepalive_connections=self.max_in_flight,
+                ),
+            )
+        return self._client
+
+def _encode(image):
+    """File name and bytes of a page given as a path, bytes or a PIL image."""
+    if isinstance(image, (str, os.PathLike)):
+        with open(image, "rb") as f:
+            return os.path.basename(image), f.read()
+    if isinstance(image, (bytes, bytearray)):
+        return "page", bytes(image)
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return "page.png", buffer.getvalue()
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
@@ -3,9 +3,83 @@ Tesseract OCR implementation.
 Uses pytesseract for extraction.
 """
 
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Iterable, Iterator, List
+
 import pytesseract
-from app.core.base import BaseExtractor
+from PIL import Image
+from app.core.base import BaseExtractor, BatchResult
+
+def _recognize(image, lang: str, config: str) -> str:
+    # Images may be given as file paths, which are cheaper to send to a worker
+    if isinstance(image, (str, os.PathLike)):
+        with Image.open(image) as opened:
+            return pytesseract.image_to_string(opened, lang=lang, config=config)
+    return pytesseract.image_to_string(image, lang=lang, config=config)
+
+def _recognize_in_process(image, lang: str, config: str) -> str:
+    try:
+        return _recognize(image, lang, config)
+    except Exception as e:
+        # Not every exception can be sent back from a worker process, and one
+        # that can't breaks the whole pool
+        raise RuntimeError(f"{type(e).__name__}: {e}") from None
 
 class TesseractExtractor(BaseExtractor):
+    """
+    Batches fan images out over a pool of workers. pytesseract runs the
+    tesseract binary for every image, so threads already recognize images in
+    parallel; use_processes=True also moves image decoding off the caller's
+    process. At most max_in_flight images are submitted at a time, so a batch
+    read lazily from an iterator never holds more than that many images.
+    """
+
+    def __init__(
+        self,
+        lang: str = "eng",
+        config: str = "",
+        max_workers: int = None,
+        max_in_flight: int = None,
+        use_processes: bool = False,
+    ):
+        self.lang = lang
+        self.config = config
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or 2 * self.max_workers
+        self.use_processes = use_processes
+
     def run(self, image):
-        return pytesseract.image_to_string(image)
+        return _recognize(image, self.lang, self.config)
+
+    def run_batch(self, images: Iterable) -> List[BatchResult]:
+        return list(self.iter_batch(images))
+
+    def iter_batch(self, images: Iterable) -> Iterator[BatchResult]:
+        """Like run_batch, but yields each result, in order, once it is ready."""
+        if self.use_processes:
+            executor_class, recognize = ProcessPoolExecutor, _recognize_in_process
+        else:
+            executor_class, recognize = ThreadPoolExecutor, _recognize
+        with executor_class(max_workers=self.max_workers) as executor:
+            pending = deque()
+            try:
+                for index, image in enumerate(images):
+                    future = executor.submit(recognize, image, self.lang, self.config)
+                    pending.append((index, future))
+                    if len(pending) >= self.max_in_flight:
+                        yield self._collect(*pending.popleft())
+                while pending:
+                    yield self._collect(*pending.popleft())
+            finally:
+                # Stopped early, e.g. the caller broke out of the loop
+                for _, future in pending:
+                    future.cancel()
+
+    @staticmethod
+    def _collect(index: int, future) -> BatchResult:
+        try:
+            return BatchResult(index, result=future.result())
+        except Exception as e:
+            return BatchResult(index, error=f"{type(e).__name__}: {e}")
@@ -1,11 +1,183 @@
 """
 Utility for saving extracted results to files.
-Supports configurable file paths and formats.
+Supports configurable file paths and formats:
+ - one JSON file per result (FileHandler.save)
+ - append-only JSON Lines segments for bulk exports (JsonlWriter)
 """
 
+import gzip
 import json
+import logging
+import os
+import re
+import threading
+
+logger = logging.getLogger(__name__)
 
 class FileHandler:
     def save(self, data, file_path: str):
         with open(file_path, "w") as f:
             json.dump(data, f)
+
+    def open_jsonl(self, file_path: str, **options):
+        """Open an append-only JSON Lines sink, see JsonlWriter."""
+        return JsonlWriter(file_path, **options)
+
+class JsonlWriter:
+    """
+    Buffered, append-only JSON Lines writer with rotation.
+
+    Records are serialized into an in-memory buffer and written to disk in
+    large sequential appends, when the buffer reaches `buffer_size` bytes or
+    every `flush_interval` seconds. Output goes to numbered segments next to
+    `file_path` (results.jsonl -> results.00001.jsonl, results.00002.jsonl,
+    ...); a new segment is started once the current one holds `max_file_size`
+    bytes of JSON, and with compress="gzip" segments are gzipped.
+
+    Safe for concurrent producer threads: producers only hold the buffer lock
+    while appending a line, so they never wait for the disk unless a flush is
+    needed, and lines are written in the order they were added.
+    """
+
+    SEGMENT_PATTERN = "{stem}.{index:05d}{suffix}"
+
+    def __init__(
+        self,
+        file_path: str,
+        buffer_size: int = 1024 * 1024,
+        flush_interval: float = 1.0,
+        max_file_size: int = 256 * 1024 * 1024,
+        compress: str = None,
+        compresslevel: int = 6,
+    ):
+        if compress not in (None, "gzip"):
+            raise ValueError(f"Unsupported compression: {compress}")
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.max_file_size = max_file_size
+        self.compress = compress
+        self.compresslevel = compresslevel
+
+        directory, name = os.path.split(os.path.abspath(file_path))
+        stem, suffix = os.path.splitext(name)
+        self.directory = directory
+        self.stem = stem
+        self.suffix = (suffix or ".jsonl") + (".gz" if compress == "gzip" else "")
+        os.makedirs(directory, exist_ok=True)
+
+        self._buffer = []
+        self._buffered = 0
+        self._buffer_lock = threading.Lock()
+        # Held while writing, so flushes reach the file in order
+        self._io_lock = threading.Lock()
+        self._file = None
+        self._file_size = 0
+        # Continue after the segments of earlier runs instead of appending to
+        # them, as their last write may have been cut short
+        self._index = self._last_index()
+        self.records = 0
+        self.closed = False
+
+        self._stop = threading.Event()
+        self._flusher = None
+        if flush_interval:
+            self._flusher = threading.Thread(
+                target=self._flush_periodically, name="jsonl-flusher", daemon=True
+            )
+            self._flusher.start()
+
+    @property
+    def segment_path(self):
+        """Path of the segment currently written to."""
+        return os.path.join(
+            self.directory,
+            self.SEGMENT_PATTERN.format(stem=self.stem, index=self._index, suffix=self.suffix),
+        )
+
+    def write(self, record):
+        """Add a record, flushing the buffer if it is full."""
+        line = (json.dumps(record, separators=(",", ":"), default=str) + "\n").encode()
+        with self._buffer_lock:
+            if self.closed:
+                raise ValueError("Write to a closed JsonlWriter")
+            self._buffer.append(line)
+            self._buffered += len(line)
+            self.records += 1
+            full = self._buffered >= self.buffer_size
+        if full:
+            self.flush()
+
+    def write_many(self, records):
+        """Add several records."""
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        """Write the buffered records to the current segment."""
+        with self._io_lock:
+            with self._buffer_lock:
+                lines, self._buffer, self._buffered = self._buffer, [], 0
+            if not lines:
+                return
+            data = b"".join(lines)
+            if self._file is None or self._file_size >= self.max_file_size:
+                self._rotate()
+            self._file.write(data)
+            self._file.flush()
+            self._file_size += len(data)
+
+    def close(self):
+        """Flush the remaining records and close the current segment."""
+        with self._buffer_lock:
+            if self.closed:
+                return
+            self.closed = True
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+        with self._io_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def segments(self):
+        """Paths of all segments written so far, oldest first."""
+        return [path for _, path in self._indexed_segments()]
+
+    def _indexed_segments(self):
+        pattern = re.compile(re.escape(self.stem) + r"\.(\d+)" + re.escape(self.suffix) + "$")
+        found = []
+        for name in os.listdir(self.directory):
+            match = pattern.match(name)
+            if match:
+                found.append((int(match.group(1)), os.path.join(self.directory, name)))
+        return sorted(found)
+
+    def _last_index(self):
+        segments = self._indexed_segments()
+        return segments[-1][0] if segments else 0
+
+    def _rotate(self):
+        if self._file is not None:
+            self._file.close()
+        self._index += 1
+        if self.compress == "gzip":
+            self._file = gzip.open(self.segment_path, "ab", compresslevel=self.compresslevel)
+        else:
+            self._file = open(self.segment_path, "ab")
+        # Sizes count JSON bytes, before compression
+        self._file_size = 0
+
+    def _flush_periodically(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception(f"Failed to flush {self.segment_path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -4,3 +4,71 @@ Unit tests for AgenticExtractor.
 
 def test_agentic_stub():
     assert True
+
+def test_extract_many_against_stub_server():
+    import json
+    import threading
+    import time
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    from app.technologies.agentic.agentic_extractor import AgenticExtractor
+
+    lock = threading.Lock()
+    state = {"in_flight": 0, "peak": 0, "failed_once": False, "requests": 0}
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            with lock:
+                state["requests"] += 1
+                state["in_flight"] += 1
+                state["peak"] = max(state["peak"], state["in_flight"])
+                fail = b"page-3" in body and not state["failed_once"]
+                state["failed_once"] = state["failed_once"] or fail
+            time.sleep(0.05)
+            with lock:
+                state["in_flight"] -= 1
+
+            if b"page-5" in body:
+                status, payload = 400, {"error": "bad page"}
+            elif fail:
+                status, payload = 503, {"error": "busy"}
+            else:
+                page = body.split(b"page-")[1][:1].decode()
+                payload = {"data": {"markdown": f"# Page {page}"}}
+                status = 200
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            if status == 503:
+                self.send_header("Retry-After", "0")
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        extractor = AgenticExtractor(
+            api_key="test-key",
+            endpoint=f"http://127.0.0.1:{server.server_port}/analyze",
+            max_in_flight=3,
+            backoff=0.01,
+        )
+        # Pages may come from a generator, read as the workers take them
+        results = extractor.run_batch(f"page-{i}".encode() for i in range(8))
+    finally:
+        server.shutdown()
+
+    assert [r.index for r in results] == list(range(8))
+    assert results[0].result == {"markdown": "# Page 0"}
+    assert results[3].ok and results[3].metadata["attempts"] == 2
+    assert results[5].error.startswith("HTTPStatusError")
+    assert all(r.metadata["seconds"] > 0 for r in results if r.ok)
+    assert 1 < state["peak"] <= 3
+    assert state["requests"] == 9
@@ -4,3 +4,46 @@ Unit tests for TesseractExtractor.
 
 def test_tesseract_stub():
     assert True
+
+def test_run_batch_keeps_order_and_reports_errors():
+    import threading
+    import time
+    from unittest.mock import patch
+
+    from app.technologies.tesseract.tesseract_extractor import TesseractExtractor
+
+    lock = threading.Lock()
+    in_flight = peak = 0
+
+    def image_to_string(image, lang, config):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.01 * (image % 3))
+        with lock:
+            in_flight -= 1
+        if image == 5:
+            raise RuntimeError("unreadable image")
+        return f"text {image}"
+
+    extractor = TesseractExtractor(max_workers=4, max_in_flight=4)
+    with patch("app.technologies.tesseract.tesseract_extractor.pytesseract") as mock:
+        mock.image_to_string.side_effect = image_to_string
+        results = extractor.run_batch(iter(range(20)))
+
+    assert [r.index for r in results] == list(range(20))
+    assert results[5].error == "RuntimeError: unreadable image"
+    assert [r.result for r in results if r.ok] == [f"text {i}" for i in range(20) if i != 5]
+    assert 1 < peak <= 4
+
+def test_default_run_batch_reports_errors():
+    from app.core.base import BaseExtractor
+
+    class Reciprocal(BaseExtractor):
+        def run(self, image):
+            return 1 / image
+
+    results = Reciprocal().run_batch([2, 0, 4])
+    assert [r.result for r in results] == [0.5, None, 0.25]
+    assert results[1].error.startswith("ZeroDivisionError")